@@ -1,25 +1,31 @@
 # -*- coding: utf-8 -*-
 """ @author: Gabriel Maccari """
 
+import multiprocessing
+import os
 import sys
-from PyQt6.QtWidgets import QApplication
 from icecream import ic
 from platform import platform
-from PyQt6 import sip  # necessário para criar o exe com pyinstaller
 
-from controller import UIController
+# Permite executar o aplicativo com "python -m table2spatial" a partir da pasta que contém o projeto
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 ic.configureOutput(prefix='LOG| ', includeContext=True)
 OS = platform()
 
 
-class App(QApplication):
-    def __init__(self, sys_argv):
-        super(App, self).__init__(sys_argv)
-        self.controller = UIController()
+def run_gui() -> int:
+    # A interface gráfica é importada apenas aqui, para que a linha de comando não dependa do PyQt
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6 import sip  # necessário para criar o exe com pyinstaller
 
+    from controller import UIController
+
+    class App(QApplication):
+        def __init__(self, sys_argv):
+            super(App, self).__init__(sys_argv)
+            self.controller = UIController()
 
-if __name__ == '__main__':
     app = App(sys.argv)
     if OS.startswith("Windows"):
         app.setStyle("windowsvista")
@@ -29,4 +35,15 @@ if __name__ == '__main__':
     else:
         app.setStyle("Fusion")
 
-    sys.exit(app.exec())
+    return app.exec()
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()  # necessário para a conversão em lote no exe criado com pyinstaller
+
+    if len(sys.argv) > 1:
+        import cli
+        if sys.argv[1] in (*cli.COMMANDS, "-h", "--help"):
+            sys.exit(cli.main(sys.argv[1:]))
+
+    sys.exit(run_gui())
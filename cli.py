@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+import argparse
+import concurrent.futures
+import csv
+import glob
+import os
+import sys
+import time
+
+from model import DataHandler, Recipe, CRS_DICT, EXCEL_ENGINES, SPATIAL_INDEX_MODES, PARQUET_COMPRESSIONS, \
+    benchmark_excel_engines, resolve_sheet_name
+
+# Subcomandos da linha de comando. Além deles, apenas -h/--help é tratado pela linha de comando. Qualquer outro
+# argumento inicia a interface gráfica
+COMMANDS = ("convert", "batch", "engines", "recipe")
+
+# Extensões de arquivo aceitas como entrada
+INPUT_EXTENSIONS = (".xlsx", ".xlsm", ".ods", ".csv", ".parquet")
+
+
+def resolve_crs_key(text: str) -> str:
+    """
+    Encontra a chave do CRS_DICT correspondente a um SRC informado pelo usuário.
+    :param text: A chave completa (ex: "SIRGAS 2000 (EPSG:4674)") ou apenas o código (ex: "EPSG:4674").
+    :return: A chave do SRC no CRS_DICT.
+    """
+    if text in CRS_DICT:
+        return text
+    matches = [key for key in CRS_DICT.search(text) if key.upper().endswith(f"({text.upper()})")]
+    if len(matches) != 1:
+        raise ValueError(f"SRC não encontrado: {text}.")
+    return matches[0]
+
+
+def convert_file(input_path: str, output_path: str | list[str], sheet: str | int = 0, x_column: str | None = None,
+                 y_column: str | None = None, z_column: str | None = None, crs: str | None = "EPSG:4674",
+                 dms: bool = False, target_crs: str | None = None, layer_name: str = "pontos",
+                 engine: str = "auto", chunk_size: int | None = None, spatial_index: str = "write",
+                 columns: list[str] | None = None, compression: str = "snappy",
+                 row_group_size: int | None = None) -> int:
+    """
+    Converte uma tabela de pontos em um arquivo vetorial ou tabela: lê o arquivo, cria a geometria, reprojeta (se
+    solicitado) e exporta.
+    :param input_path: Caminho da tabela de entrada (.xlsx, .xlsm, .ods, .csv ou .parquet). As geometrias de arquivos
+        GeoParquet são mantidas, sem a seleção de colunas de coordenadas.
+    :param output_path: Caminho do arquivo de saída, ou lista de caminhos para exportar em vários formatos ao mesmo tempo.
+    :param sheet: O nome (str) ou índice (int ou texto numérico) da planilha a ser lida (ignorado para arquivos CSV).
+        Ver resolve_sheet_name.
+    :param x_column: O rótulo da coluna de coordenadas X. Se None, procura uma coluna com nome típico (ex: "longitude").
+    :param y_column: O rótulo da coluna de coordenadas Y. Se None, procura uma coluna com nome típico (ex: "latitude").
+    :param z_column: O rótulo da coluna de coordenadas Z (apenas para SRCs geográficos 3D).
+    :param crs: O SRC das coordenadas (chave do CRS_DICT ou código, ex: "EPSG:4674"). None para tabelas sem coordenadas.
+    :param dms: True caso as coordenadas estejam em formato Graus, Minutos e Segundos. Do contrário, False.
+    :param target_crs: O SRC para o qual os pontos serão reprojetados. None para manter o SRC original.
+    :param layer_name: Nome da camada (para arquivos geopackage).
+    :param engine: O leitor de planilhas (uma das chaves do EXCEL_ENGINES ou "auto").
+    :param chunk_size: Se informado, converte arquivos CSV em partes com esse número de linhas, sem carregá-los inteiros na memória.
+    :param spatial_index: Quando criar o índice espacial de arquivos geopackage (uma das chaves do SPATIAL_INDEX_MODES).
+    :param columns: Colunas a serem lidas de arquivos Parquet. None para ler todas.
+    :param compression: O algoritmo de compressão de arquivos Parquet de saída (um dos PARQUET_COMPRESSIONS).
+    :param row_group_size: Número de linhas de cada grupo de linhas de arquivos Parquet de saída.
+    :return: O número de pontos (linhas) exportados.
+    """
+    handler = DataHandler(history_budget=0)  # Sem interface, não há o que desfazer
+    is_csv = input_path.lower().endswith(".csv")
+    crs_key = resolve_crs_key(crs) if crs is not None else None
+
+    if is_csv and chunk_size:
+        if target_crs is not None:
+            raise ValueError("A reprojeção não está disponível na conversão em partes.")
+        if isinstance(output_path, list):
+            if len(output_path) > 1:
+                raise ValueError("A conversão em partes aceita apenas um arquivo de saída.")
+            output_path = output_path[0]
+        handler.read_csv_file(input_path, nrows=chunk_size)
+        x_column, y_column, z_column = select_coordinates_columns(handler, crs_key, x_column, y_column, z_column)
+        return handler.stream_csv_file(input_path, output_path, crs_key, x_column, y_column, z_column, dms,
+                                       chunk_size=chunk_size, layer_name=layer_name)
+
+    has_geometry = False
+    if input_path.lower().endswith(".parquet"):
+        has_geometry = handler.read_parquet_file(input_path, columns)
+    elif is_csv:
+        handler.read_csv_file(input_path)
+    else:
+        handler.read_excel_file(input_path, engine)
+        handler.read_excel_sheet(resolve_sheet_name(sheet, handler.excel_file.sheet_names))
+
+    handler.convert_numeric_text_columns()
+
+    if crs_key is not None or has_geometry:
+        if not has_geometry:
+            x_column, y_column, z_column = select_coordinates_columns(handler, crs_key, x_column, y_column, z_column)
+            handler.set_geodataframe_geometry(crs_key, x_column, y_column, z_column, dms)
+        if target_crs is not None:
+            handler.reproject_geodataframe(resolve_crs_key(target_crs))
+
+    if isinstance(output_path, list):
+        reports = handler.export_geodataframes(output_path, layer_name, spatial_index, compression, row_group_size)
+        errors = [f"{report['path']}: {report['error']}" for report in reports if report["error"] is not None]
+        if errors:
+            raise RuntimeError("; ".join(errors))
+        return len(handler.gdf.index)
+
+    return handler.export_geodataframe(output_path, layer_name, spatial_index, compression, row_group_size)["rows"]
+
+
+def apply_recipe(recipe_path: str, input_path: str | None = None, output_paths: list[str] | None = None) -> list[dict]:
+    """
+    Reaplica uma receita salva na interface gráfica (ver model.Recipe) a uma tabela.
+    :param recipe_path: Caminho do arquivo JSON da receita.
+    :param input_path: Caminho da tabela de entrada. None para ler a mesma tabela usada ao gravar a receita.
+    :param output_paths: Caminhos dos arquivos de saída. None para gravar os mesmos arquivos da receita.
+    :return: Lista com os relatórios dos arquivos exportados (ver DataHandler.export_geodataframes).
+    """
+    reports = DataHandler(history_budget=0).run_recipe(Recipe.load(recipe_path), input_path, output_paths)
+    if not reports:
+        raise ValueError("A receita não exporta nenhum arquivo. Informe o arquivo de saída com -o.")
+    errors = [f"{report['path']}: {report['error']}" for report in reports if report["error"] is not None]
+    if errors:
+        raise RuntimeError("; ".join(errors))
+    return reports
+
+
+def find_input_files(source: str) -> list[str]:
+    """
+    Lista as tabelas de entrada de uma conversão em lote.
+    :param source: Uma pasta (são usadas todas as tabelas contidas nela) ou um padrão glob (ex: "campo/**/*.xlsx").
+    :return: Lista com os caminhos das tabelas, em ordem alfabética.
+    """
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        paths = glob.glob(source, recursive=True)
+    # Ignora arquivos temporários do Excel (ex: "~$pontos.xlsx")
+    return sorted(
+        path for path in paths
+        if os.path.isfile(path) and path.lower().endswith(INPUT_EXTENSIONS) and not os.path.basename(path).startswith("~$")
+    )
+
+
+def convert_batch_item(input_path: str, output_path: str, options: dict) -> dict:
+    """
+    Converte uma tabela de uma conversão em lote. É executada em um processo separado e nunca levanta erros: o
+    resultado (sucesso ou falha) é retornado para o resumo.
+    :param input_path: Caminho da tabela de entrada.
+    :param output_path: Caminho do arquivo de saída.
+    :param options: Demais parâmetros da função convert_file, compartilhados por todas as tabelas.
+    :return: Dicionário no formato {"input", "output", "status", "rows", "seconds", "error"}.
+    """
+    start = time.perf_counter()
+    result = {"input": input_path, "output": output_path, "status": "ok", "rows": 0, "seconds": 0.0, "error": ""}
+    try:
+        result["rows"] = convert_file(input_path, output_path, **options)
+    except Exception as error:
+        result["status"] = "erro"
+        result["error"] = str(error)
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def convert_batch(input_paths: list[str], output_dir: str, output_format: str, options: dict,
+                  workers: int | None = None, callback=None) -> list[dict]:
+    """
+    Converte várias tabelas com a mesma configuração, distribuindo-as entre processos.
+    :param input_paths: Caminhos das tabelas de entrada.
+    :param output_dir: Pasta onde os arquivos de saída serão gravados, com o mesmo nome das tabelas de entrada. Tabelas
+        de subpastas diferentes são gravadas nas mesmas subpastas dentro da pasta de saída (ver get_batch_output_paths).
+    :param output_format: A extensão dos arquivos de saída. Ex: ".gpkg".
+    :param options: Demais parâmetros da função convert_file, compartilhados por todas as tabelas.
+    :param workers: Número de processos. Se None, usa o número de núcleos do computador.
+    :param callback: Função chamada com o resultado de cada tabela assim que ela termina de ser convertida.
+    :return: Lista com os resultados de cada tabela (ver convert_batch_item), na ordem de input_paths.
+    """
+    output_paths = get_batch_output_paths(input_paths, output_dir, output_format)
+    for folder in set(os.path.dirname(path) for path in output_paths):
+        os.makedirs(folder, exist_ok=True)
+
+    results = [None] * len(input_paths)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(convert_batch_item, input_path, output_path, options): i
+            for i, (input_path, output_path) in enumerate(zip(input_paths, output_paths))
+        }
+        for future in concurrent.futures.as_completed(futures):
+            results[futures[future]] = future.result()
+            if callback is not None:
+                callback(future.result())
+    return results
+
+
+def get_batch_output_paths(input_paths: list[str], output_dir: str, output_format: str) -> list[str]:
+    """
+    Define os caminhos dos arquivos de saída de uma conversão em lote. Cada arquivo mantém o caminho da tabela de entrada
+    relativo à pasta que contém todas as tabelas (ex: campo/a/pontos.xlsx e campo/b/pontos.xlsx --> saida/a/pontos.gpkg
+    e saida/b/pontos.gpkg). Tabelas com o mesmo nome e extensões diferentes na mesma pasta (ex: pontos.xlsx e
+    pontos.csv) recebem a extensão no nome.
+    :param input_paths: Caminhos das tabelas de entrada.
+    :param output_dir: Pasta onde os arquivos de saída serão gravados.
+    :param output_format: A extensão dos arquivos de saída. Ex: ".gpkg".
+    :return: Lista com os caminhos dos arquivos de saída, na ordem de input_paths.
+    """
+    if not input_paths:
+        return []
+    absolute_paths = [os.path.abspath(path) for path in input_paths]
+    root = os.path.commonpath([os.path.dirname(path) for path in absolute_paths])
+
+    stems = [os.path.splitext(os.path.relpath(path, root))[0] for path in absolute_paths]
+    output_paths = [
+        os.path.join(output_dir, (stem if stems.count(stem) == 1 else f"{stem}_{path.rsplit('.', 1)[-1]}") + output_format)
+        for stem, path in zip(stems, absolute_paths)
+    ]
+
+    # Dois arquivos gravados no mesmo caminho ao mesmo tempo fariam um deles ser perdido
+    normalized = [os.path.normcase(os.path.abspath(path)) for path in output_paths]
+    duplicates = sorted({path for path, key in zip(output_paths, normalized) if normalized.count(key) > 1})
+    if duplicates:
+        raise ValueError(f"Mais de uma tabela seria gravada no mesmo arquivo de saída: {', '.join(duplicates)}.")
+    return output_paths
+
+
+def write_batch_summary(results: list[dict], path: str) -> None:
+    """
+    Grava o resumo de uma conversão em lote em um arquivo CSV, com uma linha por tabela.
+    :param results: Os resultados retornados pela função convert_batch.
+    :param path: Caminho do arquivo CSV.
+    """
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["input", "output", "status", "rows", "seconds", "error"], delimiter=";")
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def select_coordinates_columns(handler: DataHandler, crs_key: str | None, x_column: str | None,
+                               y_column: str | None, z_column: str | None) -> (str, str, str | None):
+    """
+    Completa as colunas de coordenadas não informadas pelo usuário, procurando colunas com nomes típicos.
+    :return: Os rótulos das colunas de coordenadas X, Y e Z.
+    """
+    if crs_key is None:
+        return None, None, None
+
+    crs_type = CRS_DICT[crs_key]["type"]
+    columns = handler.gdf.columns
+    x_column = x_column or handler.search_coordinates_column_by_name("x", crs_type, columns)
+    y_column = y_column or handler.search_coordinates_column_by_name("y", crs_type, columns)
+    if crs_type == "Geographic 3D CRS":
+        z_column = z_column or handler.search_coordinates_column_by_name("z", crs_type, columns)
+    else:
+        z_column = None
+
+    if x_column is None or y_column is None:
+        raise ValueError("Não foi possível identificar as colunas de coordenadas. Informe-as com --x e --y.")
+    return x_column, y_column, z_column
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="table2spatial",
+        description="Converte tabelas de pontos em camadas vetoriais sem abrir a interface gráfica."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    convert = subparsers.add_parser("convert", help="Converte uma tabela de pontos em um arquivo vetorial ou tabela.")
+    convert.add_argument("input", help="Tabela de entrada (.xlsx, .xlsm, .ods, .csv ou .parquet).")
+    convert.add_argument("-o", "--output", required=True, nargs="+",
+                         help="Arquivo de saída (.gpkg, .geojson, .shp, .csv, .xlsx ou .parquet). Informe mais de "
+                              "um arquivo para exportar em vários formatos ao mesmo tempo.")
+    add_conversion_arguments(convert)
+
+    batch = subparsers.add_parser("batch", help="Converte várias tabelas com a mesma configuração, em paralelo.")
+    batch.add_argument("input", help="Pasta com as tabelas ou padrão glob (ex: \"campo/**/*.xlsx\").")
+    batch.add_argument("-o", "--output-dir", required=True, help="Pasta onde os arquivos de saída serão gravados.")
+    batch.add_argument("--format", default=".gpkg", choices=[".gpkg", ".geojson", ".shp", ".csv", ".xlsx", ".parquet"],
+                       help="Formato dos arquivos de saída. Padrão: .gpkg.")
+    batch.add_argument("--workers", type=int, help="Número de processos. Padrão: número de núcleos do computador.")
+    batch.add_argument("--summary", help="Arquivo CSV do resumo. Padrão: resumo.csv na pasta de saída.")
+    add_conversion_arguments(batch)
+
+    recipe = subparsers.add_parser("recipe", help="Reaplica a uma tabela uma receita salva na interface gráfica.")
+    recipe.add_argument("recipe", help="Arquivo da receita (.json).")
+    recipe.add_argument("input", nargs="?",
+                        help="Tabela de entrada, com a mesma estrutura da tabela usada ao salvar a receita. "
+                             "Padrão: a própria tabela usada ao salvar a receita.")
+    recipe.add_argument("-o", "--output", nargs="+",
+                        help="Arquivo(s) de saída, no lugar dos arquivos da última exportação da receita.")
+
+    engines = subparsers.add_parser("engines", help="Mede o tempo de leitura de uma planilha com cada leitor instalado.")
+    engines.add_argument("input", help="Pasta de trabalho (.xlsx, .xlsm ou .ods).")
+    engines.add_argument("--sheet", default="0",
+                         help="Nome ou índice da planilha (números são tratados como nomes quando existe uma planilha com "
+                              "esse nome). Padrão: 0 (primeira planilha).")
+
+    return parser
+
+
+def add_conversion_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--sheet", default="0",
+                        help="Nome ou índice da planilha (números são tratados como nomes quando existe uma planilha com "
+                             "esse nome). Padrão: 0 (primeira planilha).")
+    parser.add_argument("--x", dest="x_column", help="Coluna de coordenadas X (longitude/easting).")
+    parser.add_argument("--y", dest="y_column", help="Coluna de coordenadas Y (latitude/northing).")
+    parser.add_argument("--z", dest="z_column", help="Coluna de coordenadas Z (altitude), para SRCs geográficos 3D.")
+    parser.add_argument("--crs", default="EPSG:4674",
+                        help="SRC das coordenadas, pela chave completa ou pelo código. Padrão: EPSG:4674.")
+    parser.add_argument("--dms", action="store_true", help="As coordenadas estão em graus, minutos e segundos.")
+    parser.add_argument("--target-crs", help="SRC para o qual os pontos serão reprojetados.")
+    parser.add_argument("--no-coordinates", action="store_true", help="A tabela não possui coordenadas.")
+    parser.add_argument("--layer", default="pontos", help="Nome da camada (para arquivos geopackage).")
+    parser.add_argument("--engine", default="auto", choices=["auto", *EXCEL_ENGINES.keys()],
+                        help="Leitor de planilhas. Padrão: auto (o mais rápido instalado).")
+    parser.add_argument("--chunk-size", type=int,
+                        help="Converte arquivos CSV em partes com esse número de linhas, sem carregá-los na memória.")
+    parser.add_argument("--spatial-index", default="write", choices=SPATIAL_INDEX_MODES.keys(),
+                        help="Quando criar o índice espacial de arquivos geopackage: durante a gravação (write), "
+                             "após a gravação (after) ou não criar (none). Padrão: write.")
+    parser.add_argument("--columns", type=lambda text: text.split(","),
+                        help="Colunas a serem lidas de arquivos Parquet, separadas por vírgulas. Padrão: todas.")
+    parser.add_argument("--compression", default="snappy", choices=PARQUET_COMPRESSIONS,
+                        help="Compressão dos arquivos Parquet de saída. Padrão: snappy.")
+    parser.add_argument("--row-group-size", type=int,
+                        help="Número de linhas de cada grupo de linhas (row group) dos arquivos Parquet de saída.")
+
+
+def run_batch(args: argparse.Namespace) -> int:
+    input_paths = find_input_files(args.input)
+    if not input_paths:
+        raise ValueError(f"Nenhuma tabela encontrada em {args.input}.")
+
+    options = {
+        "sheet": args.sheet, "x_column": args.x_column, "y_column": args.y_column,
+        "z_column": args.z_column, "crs": None if args.no_coordinates else args.crs, "dms": args.dms,
+        "target_crs": args.target_crs, "layer_name": args.layer, "engine": args.engine, "chunk_size": args.chunk_size,
+        "spatial_index": args.spatial_index, "columns": args.columns, "compression": args.compression,
+        "row_group_size": args.row_group_size
+    }
+
+    def print_result(result):
+        message = f"{result['rows']} pontos" if result["status"] == "ok" else result["error"]
+        print(f"[{result['status']}] {result['input']} ({result['seconds']:.2f} s): {message}")
+
+    start = time.perf_counter()
+    results = convert_batch(input_paths, args.output_dir, args.format, options, args.workers, print_result)
+    summary_path = args.summary or os.path.join(args.output_dir, "resumo.csv")
+    write_batch_summary(results, summary_path)
+
+    failures = sum(result["status"] != "ok" for result in results)
+    print(f"{len(results) - failures} de {len(results)} tabelas convertidas em {time.perf_counter() - start:.2f} s. "
+          f"Resumo: {os.path.abspath(summary_path)}")
+    return 1 if failures else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    try:
+        if args.command == "engines":
+            for engine, seconds in benchmark_excel_engines(args.input, args.sheet).items():
+                print(f"{engine}: {seconds:.3f} s")
+            return 0
+
+        if args.command == "batch":
+            return run_batch(args)
+
+        if args.command == "recipe":
+            start = time.perf_counter()
+            for report in apply_recipe(args.recipe, args.input, args.output):
+                print(f"{report['rows']} pontos exportados para {os.path.abspath(report['path'])}.")
+            print(f"Receita aplicada em {time.perf_counter() - start:.2f} s.")
+            return 0
+
+        start = time.perf_counter()
+        rows = convert_file(
+            args.input, args.output, args.sheet, args.x_column, args.y_column, args.z_column,
+            None if args.no_coordinates else args.crs, args.dms, args.target_crs, args.layer, args.engine,
+            args.chunk_size, args.spatial_index, args.columns, args.compression, args.row_group_size
+        )
+        print(f"{rows} pontos exportados para {', '.join(os.path.abspath(path) for path in args.output)} "
+              f"em {time.perf_counter() - start:.2f} s.")
+        return 0
+
+    except Exception as error:
+        print(f"Erro: {error}", file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
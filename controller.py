@@ -3,25 +3,63 @@
 
 import os
 import pandas
+import time
 from PyQt6 import QtCore, QtGui, QtWidgets
 from icecream import ic
 
-from model import DataHandler, CRS_DICT, DATETIME_FORMATS, get_dtype_key
-from view import MainWindow, ListRow, ListWindow, center_window_on_point
-from dialogs import show_popup, show_file_dialog, show_selection_dialog, show_input_dialog, show_question_dialog
+from model import DataHandler, DatetimeConversionError, CRS_DICT, SPATIAL_INDEX_MODES, PARQUET_COMPRESSIONS, \
+    read_parquet_schema
+from view import MainWindow, ListWindow, PreviewWindow, center_window_on_point
+from dialogs import show_popup, show_file_dialog, show_selection_dialog, show_input_dialog, show_question_dialog, \
+    show_checklist_dialog, show_integer_dialog
+from tasks import Task, TaskRunner
 from extensions.stereogram import StereogramWindow
 from extensions.rose_chart import RoseChartWindow
 
+# Arquivos CSV maiores que isso (em bytes) podem ser convertidos em partes, sem carregá-los inteiros na memória
+STREAMING_CSV_SIZE = 512 * 1024 ** 2
+# Número de linhas lidas para a seleção das colunas de coordenadas na conversão em partes
+STREAMING_PREVIEW_ROWS = 10_000
+# Intervalo (ms) sem alterações na tela de importação antes de validar as colunas de coordenadas selecionadas
+XYZ_VALIDATION_DELAY = 150
+# Formatos oferecidos na exportação em vários formatos
+EXPORT_FORMATS = {
+    ".gpkg": "Geopackage",
+    ".shp": "Shapefile",
+    ".geojson": "GeoJSON",
+    ".csv": "Comma Separated Values",
+    ".xlsx": "Pasta de Trabalho do Excel",
+    ".parquet": "GeoParquet",
+}
+
 
 class UIController:
     def __init__(self):
         self.model = DataHandler()
         self.view = MainWindow()
 
-        self.column_list_widgets = []
-        self.dtypes_list = []
-
         self.no_coordinates_mode = False
+        self.streaming_csv_path = None
+        self.preview_window = None
+        self.candidate_columns_task = None
+        # A verificação das colunas tem o seu próprio pool, para que aguardar o seu fim não espere também pelas tarefas
+        # do TaskRunner
+        self.candidate_columns_pool = QtCore.QThreadPool(self.view)
+        self.candidate_columns_pool.setMaxThreadCount(1)
+
+        # Agrupa as alterações seguidas da tela de importação (ex: troca de SRC, que também troca as colunas
+        # selecionadas) em uma única validação
+        self.xyz_validation_timer = QtCore.QTimer(self.view)
+        self.xyz_validation_timer.setSingleShot(True)
+        self.xyz_validation_timer.setInterval(XYZ_VALIDATION_DELAY)
+        self.xyz_validation_timer.timeout.connect(self.check_if_selected_xyz_is_valid)
+
+        # Executa as operações do modelo fora da thread da interface
+        self.task_runner = TaskRunner(self.view)
+        self.task_runner.started.connect(lambda description: self.view.set_busy(True, description))
+        self.task_runner.progress.connect(self.view.show_progress)
+        self.task_runner.stopped.connect(lambda: self.view.set_busy(False))
+        self.view.cancel_task_btn.clicked.connect(self.task_runner.cancel)
 
         self.view.show()
 
@@ -31,6 +69,16 @@ class UIController:
         self.view.reproject_button.clicked.connect(self.reproject_button_clicked)
         self.view.export_button.clicked.connect(self.export_button_clicked)
         self.view.graph_button.clicked.connect(self.graph_button_clicked)
+        self.view.preview_button.clicked.connect(self.preview_button_clicked)
+        self.view.undo_action.triggered.connect(self.undo_action_triggered)
+        self.view.redo_action.triggered.connect(self.redo_action_triggered)
+
+        # Conecta a lista de colunas e seu menu de contexto às funções do controlador
+        self.view.columns_model.dtype_edited.connect(self.column_dtype_changed, QtCore.Qt.ConnectionType.QueuedConnection)
+        self.view.columns_list.customContextMenuRequested.connect(self.show_column_menu)
+        self.view.rename_action.triggered.connect(self.rename_column_action_triggered)
+        self.view.delete_action.triggered.connect(self.delete_column_action_triggered)
+        self.view.show_uniques_action.triggered.connect(self.show_uniques_action_triggered)
 
         # Conecta o botão de OK da tela de importação à função do controlador
         self.view.import_ok_btn.clicked.connect(self.import_ok_button_clicked)
@@ -47,11 +95,12 @@ class UIController:
             # Mostra um diálogo para seleção de um arquivo
             path = show_file_dialog(
                 caption="Selecione uma tabela contendo os dados de entrada.",
-                extension_filter=("Formatos suportados (*.xlsx *.xlsm *.csv *.ods);;"
+                extension_filter=("Formatos suportados (*.xlsx *.xlsm *.csv *.ods *.parquet);;"
                                   "Pasta de Trabalho do Excel (*.xlsx);;"
                                   "Pasta de Trabalho Habilitada para Macro do Excel (*.xlsm);;"
                                   "Comma Separated Values (*.csv);;"
-                                  "OpenDocument Spreadsheet (*.ods)"),
+                                  "OpenDocument Spreadsheet (*.ods);;"
+                                  "GeoParquet (*.parquet)"),
                 mode="open", parent=self.view
             )
 
@@ -59,29 +108,67 @@ class UIController:
             if not path:
                 return
 
-            toggle_wait_cursor(True)
-
-            # Lê o arquivo. Caso não seja um CSV, guarda também os nomes das planilhas (abas) do arquivo
             is_csv = path.endswith(".csv")
-            if is_csv:
-                self.model.read_csv_file(path)
-                self.model.excel_file = None
-                sheets = None
-            else:
-                self.model.read_excel_file(path)
-                sheets = self.model.excel_file.sheet_names
+            is_parquet = path.endswith(".parquet")
+            streaming_csv_path = None
+            if is_csv and os.path.getsize(path) > STREAMING_CSV_SIZE:
+                yes_or_no = show_question_dialog(
+                    "O arquivo é muito grande para ser carregado na memória. Deseja convertê-lo diretamente para um "
+                    "arquivo de saída (GeoPackage, CSV ou Parquet), em partes?", self.view
+                )
+                if yes_or_no == QtWidgets.QMessageBox.StandardButton.Yes.value:
+                    streaming_csv_path = path
+
+            # Em arquivos Parquet, o usuário escolhe as colunas a serem lidas (as demais nem são carregadas do disco)
+            columns = None
+            if is_parquet:
+                all_columns, geometry_columns = read_parquet_schema(path)
+                other_columns = [col for col in all_columns if col not in geometry_columns]
+                columns, ok_clicked = show_checklist_dialog("Selecione as colunas a serem importadas:", other_columns,
+                                                            title="Selecionar colunas", parent=self.view)
+                if not ok_clicked:
+                    return
 
-            # Troca para a tela de importação
-            self.setup_import_screen(csv=is_csv, sheets=sheets)
-            self.view.switch_stack(1)
+            # Lê o arquivo em um novo DataHandler, para que o arquivo atual continue intacto caso a leitura seja
+            # cancelada ou falhe. Caso não seja um CSV, lê também a primeira planilha (aba) do arquivo
+            def read_file(progress):
+                model = DataHandler(projection_cache=self.model.projection_cache)
+                progress(-1, "Lendo o arquivo...")
+                has_geometry = False
+                if is_parquet:
+                    has_geometry = model.read_parquet_file(path, columns)
+                elif streaming_csv_path is not None:
+                    # Carrega apenas o início do arquivo, para a seleção das colunas de coordenadas
+                    model.read_csv_file(path, nrows=STREAMING_PREVIEW_ROWS)
+                elif is_csv:
+                    model.read_csv_file(path)
+                else:
+                    model.read_excel_file(path)
+                    progress(-1, "Lendo a primeira planilha...")
+                    model.read_excel_sheet(0)
+                return model, has_geometry
+
+            def file_read(result):
+                model, has_geometry = result
+                self.model = model
+                self.streaming_csv_path = streaming_csv_path
+
+                # Arquivos GeoParquet já contêm os pontos, então não é preciso selecionar as colunas de coordenadas
+                if has_geometry:
+                    self.no_coordinates_mode = False
+                    self.show_imported_data()
+                    return
 
-            toggle_wait_cursor(False)
+                # Troca para a tela de importação
+                single_table = is_csv or is_parquet
+                self.setup_import_screen(csv=single_table, sheets=None if single_table else model.excel_file.sheet_names)
+                self.view.switch_stack(1)
+
+            self.start_task("Abrindo o arquivo...", read_file, on_finished=file_read,
+                            context="import_button_clicked()", message="Ops! Ocorreu um erro ao abrir o arquivo.")
 
         except Exception as error:
             self.handle_exception(error, "import_button_clicked()", "Ops! Ocorreu um erro ao abrir o arquivo.")
-            # Reconecta os componentes caso tenha dado erro na função model.process_data()
-            if isinstance(error, IndexError):
-                self.connect_import_screen_components(True)
 
     def setup_import_screen(self, csv: bool = False, sheets: list | None = None) -> None:
         # Desconecta os componentes para poder atualizar sem dar trigger nas funções
@@ -100,11 +187,10 @@ class UIController:
         # planilhas como opções na combobox
         if not csv:
             self.view.sheet_cbx.addItems(sheets)
-            self.model.read_excel_sheet(0)
 
         # Preenche a combobox de SRCs, caso já não esteja preenchida
         if self.view.crs_cbx.count() == 0:
-            self.view.crs_cbx.addItems(sorted(CRS_DICT.keys()))
+            self.view.crs_cbx.addItems(CRS_DICT.sorted_keys())
         self.view.crs_cbx.setCurrentText("SIRGAS 2000 (EPSG:4674)")
 
         # Desmarca por padrão o formato GMS
@@ -131,10 +217,10 @@ class UIController:
         if connect:
             self.view.sheet_cbx.currentTextChanged.connect(self.sheet_selected)
             self.view.crs_cbx.currentTextChanged.connect(self.crs_selected)
-            self.view.dms_chk.clicked.connect(self.check_if_selected_xyz_is_valid)
-            self.view.x_cbx.currentTextChanged.connect(self.check_if_selected_xyz_is_valid)
-            self.view.y_cbx.currentTextChanged.connect(self.check_if_selected_xyz_is_valid)
-            self.view.z_cbx.currentTextChanged.connect(self.check_if_selected_xyz_is_valid)
+            self.view.dms_chk.clicked.connect(self.dms_toggled)
+            self.view.x_cbx.currentTextChanged.connect(self.schedule_xyz_validation)
+            self.view.y_cbx.currentTextChanged.connect(self.schedule_xyz_validation)
+            self.view.z_cbx.currentTextChanged.connect(self.schedule_xyz_validation)
             self.view.no_coordinates_chk.checkStateChanged.connect(self.no_coordinates_mode_toggled)
         else:
             self.view.sheet_cbx.disconnect()
@@ -163,23 +249,23 @@ class UIController:
             column = self.model.search_coordinates_column_by_name(axis, crs_type, self.model.gdf.columns)
             getattr(self.view, f"{axis}_cbx").setCurrentText(column)
 
+    def schedule_xyz_validation(self):
+        # Reinicia a contagem a cada alteração, de modo que a validação só roda quando as alterações cessam
+        self.xyz_validation_timer.start()
+
     def check_if_selected_xyz_is_valid(self):
+        self.xyz_validation_timer.stop()
+        if self.model.gdf is None:
+            return
         crs_key = self.view.crs_cbx.currentText()
         crs_type = CRS_DICT[crs_key]["type"]
         dms_format = self.view.dms_chk.isChecked()
-        valid_x_cols, valid_y_cols, valid_z_cols = self.model.filter_coordinates_columns(crs_key, dms_format)
-
-        # eixo: coluna selecionada, colunas válidas
-        selected_columns = {
-            "x": (self.view.x_cbx.currentText(), valid_x_cols),
-            "y": (self.view.y_cbx.currentText(), valid_y_cols),
-            "z": (self.view.z_cbx.currentText(), valid_z_cols)
-        }
 
         result = {}
-        for axis, (selected_column, valid_columns) in selected_columns.items():
-            # Checa se a coluna selecionada está na lista de colunas válidas para o eixo em questão (x,y ou z)
-            result[axis] = selected_column in valid_columns
+        for axis in ("x", "y", "z"):
+            # Verifica apenas a coluna selecionada para o eixo em questão (x, y ou z)
+            selected_column = getattr(self.view, f"{axis}_cbx").currentText()
+            result[axis] = self.model.is_valid_coordinates_column(selected_column, axis, crs_key, dms_format)
             # Configura o ícone do botão de validação do eixo de acordo com o resultado
             getattr(self.view, f"{axis}_ok_icon").setIcon(QtGui.QIcon("icons/ok.png" if result[axis] else "icons/not_ok.png"))
 
@@ -188,14 +274,72 @@ class UIController:
         else:
             self.view.import_ok_btn.setEnabled(result["x"] and result["y"])
 
+    def find_candidate_columns(self):
+        """
+        Verifica todas as colunas em segundo plano, sem bloquear a interface, e marca nas caixas de seleção de X, Y e Z
+        as colunas válidas para cada eixo. Uma verificação anterior ainda em andamento é cancelada.
+        :return: Nada.
+        """
+        self.stop_candidate_columns_task()
+        for combo in (self.view.x_cbx, self.view.y_cbx, self.view.z_cbx):
+            for i in range(combo.count()):
+                combo.setItemIcon(i, QtGui.QIcon())
+        if self.model.gdf is None or self.view.no_coordinates_chk.isChecked():
+            return
+
+        model, crs_key, dms_format = self.model, self.view.crs_cbx.currentText(), self.view.dms_chk.isChecked()
+        gdf = model.gdf
+        # Os objetos do pyproj são criados na thread da interface. A verificação usa apenas os limites já calculados
+        model.projection_cache.get_bounds(crs_key)
+
+        def candidates_found(result):
+            # Descarta o resultado caso a planilha, o SRC ou o formato tenham mudado durante a verificação
+            if task is not self.candidate_columns_task or self.model.gdf is not gdf:
+                return
+            self.candidate_columns_task = None
+            icon = QtGui.QIcon("icons/ok.png")
+            for combo, valid_columns in zip((self.view.x_cbx, self.view.y_cbx, self.view.z_cbx), result):
+                for column in valid_columns:
+                    i = combo.findText(str(column))
+                    if i >= 0:
+                        combo.setItemIcon(i, icon)
+
+        # A verificação lê o GeoDataFrame capturado aqui, e não o atributo do modelo, que muda se outra planilha for lida
+        task = Task(lambda progress: model.filter_coordinates_columns(crs_key, dms_format, progress, gdf))
+        task.signals.finished.connect(candidates_found)
+        self.candidate_columns_task = task
+        self.candidate_columns_pool.start(task)
+
+    def stop_candidate_columns_task(self, wait: bool = False):
+        """
+        Cancela a verificação das colunas em segundo plano, caso esteja em andamento.
+        :param wait: True para aguardar o fim da verificação (ex: antes de alterar as colunas do GeoDataFrame).
+        :return: Nada.
+        """
+        if self.candidate_columns_task is not None:
+            self.candidate_columns_task.cancel()
+            self.candidate_columns_task = None
+            if wait:
+                self.candidate_columns_pool.waitForDone()
+
+    def dms_toggled(self):
+        self.schedule_xyz_validation()
+        self.find_candidate_columns()
+
     def sheet_selected(self):
         try:
-            toggle_wait_cursor(True)
             sheet = self.view.sheet_cbx.currentText()
-            self.model.read_excel_sheet(sheet)
-            self.fill_xyz_combos()
-            self.check_if_selected_xyz_is_valid()
-            toggle_wait_cursor(False)
+
+            def read_sheet(progress):
+                progress(-1, f"Lendo a planilha {sheet}...")
+                self.model.read_excel_sheet(sheet)
+
+            def sheet_read(_):
+                self.fill_xyz_combos()
+                self.schedule_xyz_validation()
+                self.find_candidate_columns()
+
+            self.start_task("Lendo a planilha...", read_sheet, on_finished=sheet_read, context="sheet_selected()")
         except Exception as error:
             self.handle_exception(error, "sheet_selected()")
 
@@ -207,7 +351,8 @@ class UIController:
             self.view.z_cbx.setEnabled(True if crs_type == "Geographic 3D CRS" else False)
             self.view.z_ok_icon.setEnabled(True if crs_type == "Geographic 3D CRS" else False)
             self.auto_select_xy_columns()
-            self.check_if_selected_xyz_is_valid()
+            self.schedule_xyz_validation()
+            self.find_candidate_columns()
             toggle_wait_cursor(False)
         except Exception as error:
             self.handle_exception(error, "crs_selected()")
@@ -232,102 +377,198 @@ class UIController:
                 crs_type = CRS_DICT[crs_key]["type"]
                 self.view.z_cbx.setEnabled(True if crs_type == "Geographic 3D CRS" else False)
                 self.view.z_ok_icon.setEnabled(True if crs_type == "Geographic 3D CRS" else False)
-                self.check_if_selected_xyz_is_valid()
+                self.schedule_xyz_validation()
+            self.find_candidate_columns()
 
         except Exception as error:
             self.handle_exception(error, "no_coordinates_mode_toggled()")
 
     def import_ok_button_clicked(self):
         try:
-            toggle_wait_cursor(True)
-
             self.no_coordinates_mode = self.view.no_coordinates_chk.isChecked()
+            # A verificação em segundo plano lê as colunas que serão convertidas a seguir
+            self.stop_candidate_columns_task(wait=True)
 
-            self.view.merge_button.setEnabled(
-                self.model.excel_file is not None and len(self.model.excel_file.sheet_names) > 1
-            )
-            self.view.reproject_button.setEnabled(not self.no_coordinates_mode)
-            self.view.export_button.setEnabled(True)
-            self.view.graph_button.setEnabled(True)
+            if self.streaming_csv_path is not None:
+                self.stream_csv_file()
+                return
 
-            if not self.no_coordinates_mode:
+            if self.no_coordinates_mode:
+                crs_key, x_column, y_column, z_column, dms = None, None, None, None, False
+            else:
                 crs_key = self.view.crs_cbx.currentText()
                 crs_type = CRS_DICT[crs_key]["type"]
                 x_column = self.view.x_cbx.currentText()
                 y_column = self.view.y_cbx.currentText()
                 z_column = (self.view.z_cbx.currentText() if crs_type == "Geographic 3D CRS" else None)
                 dms = self.view.dms_chk.isChecked()
+            # O SRC é criado na thread da interface: criá-lo nas threads do QThreadPool pode derrubar o aplicativo
+            crs = self.model.projection_cache.get_crs(crs_key) if crs_key is not None else None
+            optimize_dtypes = self.view.optimize_dtypes_chk.isChecked()
+
+            def import_data(progress):
+                # Converte para float as colunas de texto que contêm apenas números (ex: "-27,19899")
+                progress(-1, "Convertendo colunas numéricas...")
+                self.model.convert_numeric_text_columns()
+                if crs_key is not None:
+                    progress(-1, "Criando a geometria dos pontos...")
+                    self.model.set_geodataframe_geometry(crs_key, x_column, y_column, z_column, dms, crs=crs)
+                if optimize_dtypes:
+                    progress(-1, "Otimizando os tipos de dados...")
+                    return self.model.optimize_dtypes()
+
+            def data_imported(report):
+                self.show_imported_data()
+                if report is not None:
+                    show_popup(f"Uso de memória reduzido de {report['before'] / 1024 ** 2:.1f} MB para "
+                               f"{report['after'] / 1024 ** 2:.1f} MB ({len(report['columns'])} colunas convertidas).",
+                               parent=self.view)
+
+            self.start_task("Importando os dados...", import_data, on_finished=data_imported,
+                            context="import_ok_button_clicked()")
+        except Exception as error:
+            self.handle_exception(error, "import_ok_button_clicked()")
 
-                self.model.set_geodataframe_geometry(crs_key, x_column, y_column, z_column, dms)
-
-                crs_label = f"{self.model.gdf.crs.name} ({self.model.gdf.crs.type_name})"
-                label = f"Pontos: {len(self.model.gdf.index)}    SRC: {crs_label}"
-                # 85 porque é um soft cap do que cabe na interface
-                self.view.bottom_label.setText(label if len(label) < 85 else f"Pontos: {len(self.model.gdf.index)}")
+    def show_imported_data(self):
+        self.view.merge_button.setEnabled(
+            self.model.excel_file is not None and len(self.model.excel_file.sheet_names) > 1
+        )
+        self.view.reproject_button.setEnabled(not self.no_coordinates_mode)
+        self.view.export_button.setEnabled(True)
+        self.view.graph_button.setEnabled(True)
+        self.view.preview_button.setEnabled(True)
 
-            self.update_column_list()
+        if not self.no_coordinates_mode:
+            crs_label = f"{self.model.gdf.crs.name} ({self.model.gdf.crs.type_name})"
+            label = f"Pontos: {len(self.model.gdf.index)}    SRC: {crs_label}"
+            # 85 porque é um soft cap do que cabe na interface
+            self.view.bottom_label.setText(label if len(label) < 85 else f"Pontos: {len(self.model.gdf.index)}")
+
+        self.update_column_list()
+        self.view.switch_stack(0)
+
+    def stream_csv_file(self):
+        output_path = show_file_dialog(
+            caption="Salvar arquivo", mode="save", parent=self.view,
+            extension_filter=("Formatos suportados (*.gpkg *.csv *.parquet);;"
+                              "Geopackage (*.gpkg);;"
+                              "Comma Separated Values (*.csv);;"
+                              "Parquet (*.parquet)")
+        )
+        if output_path == "":
+            return
+
+        _, file_extension = os.path.splitext(output_path)
+        if not file_extension:
+            output_path += ".gpkg"
+
+        if self.no_coordinates_mode:
+            crs_key, x_column, y_column, z_column, dms = None, None, None, None, False
+        else:
+            crs_key = self.view.crs_cbx.currentText()
+            x_column = self.view.x_cbx.currentText()
+            y_column = self.view.y_cbx.currentText()
+            z_column = (self.view.z_cbx.currentText() if CRS_DICT[crs_key]["type"] == "Geographic 3D CRS" else None)
+            dms = self.view.dms_chk.isChecked()
+        crs = self.model.projection_cache.get_crs(crs_key) if crs_key is not None else None
+
+        def convert(progress):
+            return self.model.stream_csv_file(self.streaming_csv_path, output_path, crs_key, x_column, y_column,
+                                              z_column, dms, progress=progress, crs=crs)
+
+        def converted(rows):
+            # Descarta a pré-visualização do arquivo, pois os dados não foram carregados na memória
+            self.streaming_csv_path = None
+            self.model.gdf = None
+            self.model.history.clear()
+            self.update_history_actions()
+            self.view.columns_model.set_columns([], [])
+            self.view.bottom_label.setText("")
+            for button in (self.view.merge_button, self.view.reproject_button, self.view.export_button,
+                           self.view.graph_button, self.view.preview_button):
+                button.setEnabled(False)
+            if self.preview_window is not None:
+                self.preview_window.close()
             self.view.switch_stack(0)
 
-            toggle_wait_cursor(False)
-        except Exception as error:
-            self.handle_exception(error, "import_ok_button_clicked()")
+            show_popup(f"Arquivo convertido com sucesso! {rows} linhas foram gravadas em {output_path}.",
+                       parent=self.view)
+
+        self.start_task("Convertendo o arquivo em partes...", convert, on_finished=converted,
+                        context="stream_csv_file()")
 
     def update_column_list(self, current_row: int = -1):
         try:
-            toggle_wait_cursor(True)
-
-            self.view.columns_list.clear()
             columns = self.model.gdf.columns.to_list()
-            dtypes = self.model.gdf.dtypes.to_list()
-
-            row = 0
-            self.column_list_widgets = []
-            self.dtypes_list = []
-
-            for column_name, column_type in zip(columns, dtypes):
-                widget = ListRow(column_name, str(column_type))
-                widget.dtype_cbx.currentTextChanged.connect(lambda dtype_change, x=row: self.column_dtype_changed(x))
-
-                try:
-                    widget.rename_action.triggered.connect(self.rename_column_action_triggered)
-                    widget.delete_action.triggered.connect(self.delete_column_action_triggered)
-                    widget.show_uniques_action.triggered.connect(self.show_uniques_action_triggered)
-                except AttributeError:
-                    pass
+            dtypes = [str(dtype) for dtype in self.model.gdf.dtypes]
+            self.view.columns_model.set_columns(columns, dtypes)
+            self.view.columns_list.setCurrentIndex(self.view.columns_model.index(current_row))
+            self.refresh_preview()
+            self.update_history_actions()
+        except Exception as error:
+            self.handle_exception(error, "update_column_list()", "Ops! Ocorreu um erro ao atualizar a lista de colunas.")
 
-                if str(column_type) == "geometry":
-                    widget.setEnabled(False)
+    def update_column_row(self, row: int) -> None:
+        """
+        Atualiza apenas a linha da lista correspondente a uma coluna alterada.
+        :param row: O índice da linha (e da coluna no GeoDataFrame).
+        :return: Nada.
+        """
+        column = self.model.gdf.columns[row]
+        self.view.columns_model.update_column(row, column, str(self.model.gdf[column].dtype))
+        self.refresh_preview()
+        self.update_history_actions()
+
+    def update_history_actions(self) -> None:
+        """ Habilita os atalhos de desfazer e refazer de acordo com o histórico de edições do modelo. """
+        history = self.model.history
+        self.view.undo_action.setEnabled(history.can_undo())
+        self.view.redo_action.setEnabled(history.can_redo())
+        self.view.undo_action.setToolTip(f"Desfazer: {history.undo_steps[-1][0]}" if history.can_undo() else "")
+        self.view.redo_action.setToolTip(f"Refazer: {history.redo_steps[-1][0]}" if history.can_redo() else "")
+
+    def undo_action_triggered(self):
+        try:
+            if self.model.undo() is not None:
+                self.show_imported_data()
+        except Exception as error:
+            self.handle_exception(error, "undo_action_triggered()", "Ops! Não foi possível desfazer a edição.")
 
-                self.column_list_widgets.append(widget)
-                self.dtypes_list.append(get_dtype_key(str(column_type)))
+    def redo_action_triggered(self):
+        try:
+            if self.model.redo() is not None:
+                self.show_imported_data()
+        except Exception as error:
+            self.handle_exception(error, "redo_action_triggered()", "Ops! Não foi possível refazer a edição.")
 
-                item = QtWidgets.QListWidgetItem()
-                item.setIcon(widget.get_icon())
-                item.setSizeHint(QtCore.QSize(410, 30))
+    def refresh_preview(self) -> None:
+        """ Atualiza a janela de visualização dos dados, caso esteja aberta, após alterações no GeoDataFrame. """
+        if self.preview_window is not None and self.preview_window.isVisible():
+            self.preview_window.set_dataframe(self.model.gdf)
 
-                self.view.columns_list.addItem(item)
-                self.view.columns_list.setItemWidget(item, widget)
-                row += 1
+    def get_selected_column(self) -> (int, str):
+        row = self.view.columns_list.currentIndex().row()
+        return row, self.view.columns_model.columns[row]
 
-            self.view.columns_list.setCurrentRow(current_row)
-            toggle_wait_cursor(False)
-        except Exception as error:
-            self.handle_exception(error, "update_column_list()", "Ops! Ocorreu um erro ao atualizar a lista de colunas.")
+    def show_column_menu(self, position: QtCore.QPoint):
+        index = self.view.columns_list.indexAt(position)
+        if not index.flags() & QtCore.Qt.ItemFlag.ItemIsEnabled:
+            return
+        self.view.columns_list.setCurrentIndex(index)
+        self.view.column_menu.exec(self.view.columns_list.viewport().mapToGlobal(position))
 
-    def column_dtype_changed(self, row: int):
+    def column_dtype_changed(self, row: int, target_dtype: str):
         try:
             toggle_wait_cursor(True)
 
-            widget = self.column_list_widgets[row]
-            column = widget.column_lbl.text()
-            target_dtype = widget.dtype_cbx.currentText()
+            column = self.view.columns_model.columns[row]
 
             true_key, false_key, ok_clicked = None, None, True
 
             if target_dtype == "Boolean":
-                uniques = sorted([str(value) for value in self.model.gdf[column].unique()])
-                if "nan" in uniques:
-                    uniques.remove("nan")
+                # A codificação da coluna fica guardada no modelo e é reutilizada na conversão
+                _, labels = self.model.factorize_column(column)
+                uniques = sorted(set(labels))
                 uniques.append("<Células vazias>")
                 uniques.append("<Nenhum>")
                 toggle_wait_cursor(False)
@@ -349,23 +590,39 @@ class UIController:
                     self.model.change_column_dtype(column, target_dtype, true_key=true_key, false_key=false_key)
 
             elif target_dtype == "Datetime":
-                toggle_wait_cursor(False)
-                datetime_format, ok_clicked = show_selection_dialog(
-                    "Selecione o formato de data e hora presente no campo:",
-                    items=DATETIME_FORMATS.keys(), allow_edit=False, parent=self.view)
+                # Os formatos são testados em uma amostra da coluna. Se apenas um deles converte toda a amostra, ele é
+                # aplicado diretamente. Do contrário, são oferecidos do mais ao menos compatível
+                ranking = self.model.rank_datetime_formats(column)
+                if ranking[0][1] == 1.0 and ranking[1][1] < 1.0:
+                    datetime_format = ranking[0][0]
+                else:
+                    options = {f"{key}  ({rate:.0%} da amostra)": key for key, rate in ranking}
+                    toggle_wait_cursor(False)
+                    choice, ok_clicked = show_selection_dialog(
+                        "Selecione o formato de data e hora presente no campo:",
+                        items=list(options.keys()), allow_edit=False, parent=self.view)
+                    toggle_wait_cursor(True)
+                    datetime_format = options[choice] if ok_clicked else None
                 if ok_clicked:
-                    self.model.change_column_dtype(column, target_dtype, datetime_format=datetime_format)
-                toggle_wait_cursor(True)
+                    try:
+                        self.model.change_column_dtype(column, target_dtype, datetime_format=datetime_format)
+                    except DatetimeConversionError as error:
+                        toggle_wait_cursor(False)
+                        yes_or_no = show_question_dialog(f"{error}\n\nConverter mesmo assim, deixando esses valores "
+                                                         f"vazios?", self.view)
+                        toggle_wait_cursor(True)
+                        if yes_or_no == QtWidgets.QMessageBox.StandardButton.Yes.value:
+                            self.model.change_column_dtype(column, target_dtype, datetime_format=datetime_format,
+                                                           errors="coerce")
 
             else:
                 self.model.change_column_dtype(column, target_dtype)
 
-            self.dtypes_list[row] = target_dtype
-            self.update_column_list(row)
+            self.update_column_row(row)
 
             toggle_wait_cursor(False)
         except Exception as error:
-            self.update_column_list(row)
+            self.update_column_row(row)
             self.handle_exception(error, "column_dtype_changed()", "Ops! Não foi possível converter o tipo de dado da coluna.")
 
     def merge_button_clicked(self):
@@ -373,13 +630,22 @@ class UIController:
             merge_column, ok_clicked = show_selection_dialog(message="Selecione a coluna identificadora para a mescla:",
                                                              items=self.model.gdf.columns, title="Mesclar planilhas",
                                                              parent=self.view)
-            if ok_clicked:
-                merged_sheets, skipped_sheets = self.model.merge_sheets(merge_column)
+            if not ok_clicked:
+                return
+
+            def merge(progress):
+                return self.model.merge_sheets(merge_column, progress=progress)
+
+            def merged(result):
+                merged_sheets, skipped_sheets = result
                 show_popup(f"As seguintes planilhas foram mescladas com sucesso usando a coluna {merge_column}: "
                            f"{', '.join(merged_sheets)}.\nAs demais planilhas do arquivo foram ignoradas pois não "
                            f"contêm a coluna de mescla em questão.", parent=self.view)
                 self.update_column_list()
 
+            self.start_task("Mesclando as planilhas...", merge, on_finished=merged, context="merge_button_clicked()",
+                            message="Ops! Não foi possível mesclar as planilhas.")
+
         except Exception as error:
             self.handle_exception(error, "merge_button_clicked()", "Ops! Não foi possível mesclar as planilhas.")
 
@@ -391,7 +657,7 @@ class UIController:
 
             self.view.source_crs_lbl.setText(f"SRC atual: {self.model.crs_key})")
 
-            self.view.target_crs_cbx.addItems(sorted(CRS_DICT.keys()))
+            self.view.target_crs_cbx.addItems(CRS_DICT.sorted_keys())
             self.view.target_crs_cbx.setCurrentText("SIRGAS 2000 (EPSG:4674)")
 
             self.view.save_coords_chk.setChecked(False)
@@ -463,59 +729,71 @@ class UIController:
 
     def reproject_ok_button_clicked(self):
         try:
-            toggle_wait_cursor(True)
-
             crs_key = self.view.target_crs_cbx.currentText()
             save_coords = self.view.save_coords_chk.isChecked()
+            x_col = self.view.x_column_name_edt.text()
+            y_col = self.view.y_column_name_edt.text()
+            z_col = self.view.z_column_name_edt.text()
+            # O SRC de destino é criado na thread da interface: criá-lo nas threads do QThreadPool pode derrubar o
+            # aplicativo
+            target_crs = self.model.projection_cache.get_crs(crs_key)
+
+            def reproject(progress):
+                progress(-1, "Reprojetando os pontos...")
+                if save_coords:
+                    self.model.reproject_geodataframe(crs_key, x_col, y_col, z_col, progress=progress,
+                                                      target_crs=target_crs)
+                else:
+                    self.model.reproject_geodataframe(crs_key, progress=progress, target_crs=target_crs)
+
+            def reprojected(_):
+                self.update_column_list()
+                self.view.switch_stack()
 
-            self.model.reproject_geodataframe(crs_key)
-
-            if save_coords:
-                x_col = self.view.x_column_name_edt.text()
-                y_col = self.view.y_column_name_edt.text()
-
-                self.model.gdf[x_col] = self.model.gdf.geometry.x
-                self.model.gdf[y_col] = self.model.gdf.geometry.y
+                crs_label = f"{self.model.gdf.crs.name} ({self.model.gdf.crs.type_name})"
+                label = f"Pontos: {len(self.model.gdf.index)}    SRC: {crs_label}"
+                self.view.bottom_label.setText(label if len(label) < 87 else f"Pontos: {len(self.model.gdf.index)}")
 
-                if CRS_DICT[crs_key]["type"] == "Geographic 3D CRS":
-                    z_col = self.view.z_column_name_edt.text()
-                    self.model.gdf[z_col] = self.model.gdf.geometry.z
+                show_popup("Pontos reprojetados com sucesso!", parent=self.view)
 
-                # Reordena as colunas para que a geometria fique no final
-                if "geometry" in self.model.gdf.columns and self.model.gdf["geometry"].dtype == "geometry":
-                    cols = [col for col in self.model.gdf.columns if col != "geometry"]
-                    cols.append("geometry")
-                    self.model.gdf = self.model.gdf[cols]
+            self.start_task("Reprojetando os pontos...", reproject, on_finished=reprojected,
+                            context="reproject_ok_button_clicked()", message="Ops! Ocorreu um erro ao reprojetar.")
 
-            self.update_column_list()
-            self.view.switch_stack()
+        except Exception as error:
+            self.handle_exception(error, "reproject_ok_button_clicked()", "Ops! Ocorreu um erro ao reprojetar.")
 
-            crs_label = f"{self.model.gdf.crs.name} ({self.model.gdf.crs.type_name})"
-            label = f"Pontos: {len(self.model.gdf.index)}    SRC: {crs_label}"
-            self.view.bottom_label.setText(label if len(label) < 87 else f"Pontos: {len(self.model.gdf.index)}")
+    def export_button_clicked(self):
+        try:
+            action = self.view.export_button.click_menu.exec(self.view.export_button.mapToGlobal(self.view.export_button.rect().bottomLeft()))
 
-            toggle_wait_cursor(False)
-            show_popup("Pontos reprojetados com sucesso!", parent=self.view)
+            if action is self.view.export_file_action:
+                self.export_file()
+            elif action is self.view.export_multiple_action:
+                self.export_multiple_files()
+            elif action is self.view.save_recipe_action:
+                self.save_recipe()
 
         except Exception as error:
-            self.handle_exception(error, "reproject_ok_button_clicked()", "Ops! Ocorreu um erro ao reprojetar.")
+            self.handle_exception(error, "export_button_clicked()", "Ops! Não foi possível exportar.")
 
-    def export_button_clicked(self):
+    def export_file(self):
         try:
             if self.no_coordinates_mode:
                 output_formats = (
-                    "Formatos suportados (*.csv *.xlsx);;"
+                    "Formatos suportados (*.csv *.xlsx *.parquet);;"
                     "Comma Separated Values (*.csv);;"
-                    "Pasta de Trabalho do Excel (*.xlsx)"
+                    "Pasta de Trabalho do Excel (*.xlsx);;"
+                    "Parquet (*.parquet)"
                 )
             else:
                 output_formats = (
-                    "Formatos suportados (*.gpkg *.geojson *.shp *.csv *.xlsx);;"
+                    "Formatos suportados (*.gpkg *.geojson *.shp *.csv *.xlsx *.parquet);;"
                     "Geopackage (*.gpkg);;"
                     "GeoJSON (*.geojson);;"
                     "Shapefile (*.shp);;"
                     "Comma Separated Values (*.csv);;"
-                    "Pasta de Trabalho do Excel (*.xlsx)"
+                    "Pasta de Trabalho do Excel (*.xlsx);;"
+                    "GeoParquet (*.parquet)"
                 )
 
             file_name = show_file_dialog(
@@ -529,20 +807,119 @@ class UIController:
             if not file_extension:
                 file_name += ".gpkg"
 
-            layer_name = "pontos"
+            layer_name, spatial_index = "pontos", "write"
             if file_name.endswith(".gpkg"):
                 layer_name, ok_clicked = show_input_dialog("Insira um nome para a camada:", "Nome da camada",
                                                            layer_name, self.view)
                 if not ok_clicked:
                     return
 
-            toggle_wait_cursor(True)
-            self.model.export_geodataframe(file_name, layer_name)
-            toggle_wait_cursor(False)
-            show_popup("Pontos exportados com sucesso!", parent=self.view)
+                spatial_index_label, ok_clicked = show_selection_dialog(
+                    "Índice espacial da camada:", list(SPATIAL_INDEX_MODES.values()), title="Índice espacial",
+                    parent=self.view
+                )
+                if not ok_clicked:
+                    return
+                spatial_index = next(k for k, v in SPATIAL_INDEX_MODES.items() if v == spatial_index_label)
+
+            compression, row_group_size = "snappy", 0
+            if file_name.endswith(".parquet"):
+                compression, ok_clicked = show_selection_dialog("Algoritmo de compressão:", list(PARQUET_COMPRESSIONS),
+                                                                title="Compressão", parent=self.view)
+                if not ok_clicked:
+                    return
+                row_group_size, ok_clicked = show_integer_dialog(
+                    "Número de linhas de cada grupo de linhas (row group).\n0 para usar o padrão do pyarrow:",
+                    "Grupos de linhas", parent=self.view
+                )
+                if not ok_clicked:
+                    return
+
+            def export(progress):
+                progress(-1, f"Gravando {os.path.basename(file_name)}...")
+                return self.model.export_geodataframe(file_name, layer_name, spatial_index, compression,
+                                                      row_group_size or None, progress=progress)
+
+            def exported(report):
+                show_popup(f"Pontos exportados com sucesso!\n{report['rows']} linhas gravadas em "
+                           f"{report['seconds']:.2f} s (motor: {report['engine']}).", parent=self.view)
+
+            self.start_task("Exportando os pontos...", export, on_finished=exported, context="export_file()",
+                            message="Ops! Não foi possível exportar.")
 
         except Exception as error:
-            self.handle_exception(error, "export_button_clicked()", "Ops! Não foi possível exportar.")
+            self.handle_exception(error, "export_file()", "Ops! Não foi possível exportar.")
+
+    def export_multiple_files(self):
+        try:
+            formats = {ext: label for ext, label in EXPORT_FORMATS.items()
+                       if not self.no_coordinates_mode or ext in (".csv", ".xlsx", ".parquet")}
+            labels, ok_clicked = show_checklist_dialog(
+                "Selecione os formatos de saída:", [f"{label} ({ext})" for ext, label in formats.items()],
+                title="Exportar em vários formatos", parent=self.view
+            )
+            if not ok_clicked or not labels:
+                return
+            extensions = [ext for ext, label in formats.items() if f"{label} ({ext})" in labels]
+
+            file_name = show_file_dialog(
+                caption="Salvar arquivos (a extensão de cada formato será adicionada ao nome)", mode="save",
+                parent=self.view, extension_filter="Todos os arquivos (*)"
+            )
+            if file_name == "":
+                return
+            base_name = os.path.splitext(file_name)[0] if file_name.lower().endswith(tuple(formats)) else file_name
+
+            layer_name = "pontos"
+            if ".gpkg" in extensions:
+                layer_name, ok_clicked = show_input_dialog("Insira um nome para a camada:", "Nome da camada",
+                                                           layer_name, self.view)
+                if not ok_clicked:
+                    return
+
+            paths = [base_name + ext for ext in extensions]
+
+            def export(progress):
+                progress(-1, f"Gravando {len(paths)} arquivos...")
+                start = time.perf_counter()
+                return (self.model.export_geodataframes(paths, layer_name, progress=progress),
+                        time.perf_counter() - start)
+
+            def exported(result):
+                reports, seconds = result
+                lines = [
+                    f"{os.path.basename(r['path'])}: {r['seconds']:.2f} s ({r['engine']})" if r["error"] is None else
+                    f"{os.path.basename(r['path'])}: erro - {r['error']}"
+                    for r in reports
+                ]
+                failures = sum(r["error"] is not None for r in reports)
+                message = (f"{len(reports) - failures} de {len(reports)} arquivos exportados em {seconds:.2f} s.\n\n"
+                           + "\n".join(lines))
+                show_popup(message, msg_type="error" if failures else "notification", parent=self.view)
+
+            self.start_task("Exportando os pontos...", export, on_finished=exported,
+                            context="export_multiple_files()", message="Ops! Não foi possível exportar.")
+
+        except Exception as error:
+            self.handle_exception(error, "export_multiple_files()", "Ops! Não foi possível exportar.")
+
+    def save_recipe(self):
+        try:
+            file_name = show_file_dialog(caption="Salvar receita", mode="save", parent=self.view,
+                                         extension_filter="Receita (*.json)")
+            if file_name == "":
+                return
+            if not file_name.lower().endswith(".json"):
+                file_name += ".json"
+
+            self.model.recipe.save(file_name)
+            show_popup(f"Receita com {len(self.model.recipe)} passos salva. Para reaplicá-la a outra tabela com a mesma "
+                       f"estrutura, sem abrir a interface, use:\n\n"
+                       f"python -m table2spatial recipe \"{file_name}\" <tabela> -o <arquivo de saída>",
+                       parent=self.view)
+
+        except Exception as error:
+            self.handle_exception(error, "save_recipe()", "Ops! Não foi possível salvar a receita.")
 
     def graph_button_clicked(self):
         try:
@@ -561,10 +938,22 @@ class UIController:
         except Exception as error:
             self.handle_exception(error, "graph_button_clicked()", "Ops! Ocorreu um erro.")
 
+    def preview_button_clicked(self):
+        try:
+            if self.preview_window is None:
+                self.preview_window = PreviewWindow(self.model.gdf, self.view)
+                self.preview_window.show()
+                center_window_on_point(self.preview_window, self.view.geometry().center())
+            else:
+                self.preview_window.set_dataframe(self.model.gdf)
+                self.preview_window.show()
+                self.preview_window.raise_()
+        except Exception as error:
+            self.handle_exception(error, "preview_button_clicked()", "Ops! Não foi possível exibir os dados.")
+
     def rename_column_action_triggered(self):
         try:
-            row = self.view.columns_list.currentRow()
-            column = self.column_list_widgets[row].field
+            row, column = self.get_selected_column()
 
             new_name, ok_clicked = show_input_dialog("Insira um novo nome para a coluna:", "Renomear coluna", column, self.view)
 
@@ -572,21 +961,15 @@ class UIController:
                 return
 
             toggle_wait_cursor(True)
-
-            if new_name in self.model.gdf.columns:
-                raise ValueError("O nome inserido já está sendo utilizado por outra coluna do GeoDataFrame.")
-
-            self.model.gdf.rename(columns={column: new_name}, inplace=True)
-            self.column_list_widgets[row].field = new_name
-            self.update_column_list(row)
+            self.model.rename_column(column, new_name)
+            self.update_column_row(row)
             toggle_wait_cursor(False)
         except Exception as error:
             self.handle_exception(error, "rename_column_action_triggered()", "Ops! Não foi possível renomear a coluna.")
 
     def delete_column_action_triggered(self):
         try:
-            row = self.view.columns_list.currentRow()
-            column = self.column_list_widgets[row].field
+            row, column = self.get_selected_column()
 
             yes_or_no = show_question_dialog(f"Excluir coluna \"{column}\"?", self.view)
 
@@ -594,32 +977,48 @@ class UIController:
                 return
 
             toggle_wait_cursor(True)
-            self.model.gdf.drop(columns=[column], inplace=True)
-            self.column_list_widgets.pop(row)
-            self.update_column_list(row)
+            self.model.delete_column(column)
+            self.view.columns_model.remove_column(row)
+            self.refresh_preview()
+            self.update_history_actions()
             toggle_wait_cursor(False)
         except Exception as error:
             self.handle_exception(error, "delete_column_action_triggered()", "Ops! Não foi possível deletar a coluna.")
 
     def show_uniques_action_triggered(self):
         try:
-            toggle_wait_cursor(True)
-
-            row = self.view.columns_list.currentRow()
-            column = self.column_list_widgets[row].field
-
-            uniques = self.model.gdf[column].astype("string").unique()
-            has_na = any(pandas.isna(value) for value in uniques)
-            uniques = [value for value in uniques if not pandas.isna(value)]
-
-            toggle_wait_cursor(False)
-
-            list_window = ListWindow(sorted(uniques), has_na, self.view)
-            list_window.show()
-            center_window_on_point(list_window, list_window.parent.geometry().center())
+            _, column = self.get_selected_column()
+
+            def show_list(result):
+                value_counts, nulls = result
+                list_window = ListWindow(value_counts, nulls, self.view)
+                list_window.show()
+                center_window_on_point(list_window, list_window.parent.geometry().center())
+
+            # A contagem fica guardada no modelo, então a janela abre imediatamente nas próximas vezes
+            self.start_task("Contando os valores únicos...", lambda progress: self.model.get_value_counts(column),
+                            on_finished=show_list, context="show_uniques_action_triggered()",
+                            message="Ops! Ocorreu um erro ao obter a lista de valores únicos.")
         except Exception as error:
             self.handle_exception(error, "show_uniques_action_triggered()", "Ops! Ocorreu um erro ao obter a lista de valores únicos.")
 
+    def start_task(self, description: str, function, on_finished=None, context: str = "",
+                   message: str = "Ocorreu um erro."):
+        """
+        Executa uma operação do modelo em segundo plano, mantendo a interface responsiva.
+        :param description: Descrição da operação exibida na barra de progresso.
+        :param function: A função a ser executada. Recebe uma função progress(percent, message) como parâmetro.
+        :param on_finished: Função chamada na thread da interface com o resultado da operação.
+        :param context: Contexto exibido nos detalhes da mensagem de erro.
+        :param message: Mensagem de erro exibida caso a operação falhe.
+        :return: Nada.
+        """
+        self.task_runner.start(
+            description, function, on_finished=on_finished,
+            on_failed=lambda error: self.handle_exception(error, context, message),
+            on_cancelled=lambda: show_popup("Operação cancelada.", parent=self.view)
+        )
+
     def handle_exception(self, error, context, message: str = "Ocorreu um erro.", ):
         toggle_wait_cursor(False)
         ic(context, error)
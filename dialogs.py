@@ -3,7 +3,7 @@
 @author: Gabriel Maccari
 """
 
-from PyQt6 import QtWidgets, QtGui
+from PyQt6 import QtWidgets, QtGui, QtCore
 
 
 def show_popup(message: str, msg_type: str = "notification", details: str | None = None, parent: QtWidgets.QMainWindow = None):
@@ -69,6 +69,47 @@ def show_selection_dialog(message: str, items: list, selected=0, allow_edit=Fals
     return choice, ok
 
 
+def show_checklist_dialog(message: str, items: list[str], checked: list[str] | None = None,
+                          title: str = "Selecionar opções", parent: QtWidgets.QMainWindow = None) -> (list[str], bool):
+    """
+    Exibe um diálogo com uma lista de opções que podem ser marcadas.
+    :param message: Mensagem ao usuário.
+    :param items: Opções da lista.
+    :param checked: Opções marcadas por padrão. Se None, todas as opções começam marcadas.
+    :param title: Título da janela.
+    :param parent: Janela pai.
+    :return: As opções marcadas e se o botão de OK foi clicado (list[str], bool).
+    """
+    dialog = QtWidgets.QDialog(parent)
+    dialog.setWindowTitle(title)
+    layout = QtWidgets.QVBoxLayout(dialog)
+    layout.addWidget(QtWidgets.QLabel(message, dialog))
+
+    list_widget = QtWidgets.QListWidget(dialog)
+    for item in items:
+        list_item = QtWidgets.QListWidgetItem(item, list_widget)
+        list_item.setFlags(list_item.flags() | QtCore.Qt.ItemFlag.ItemIsUserCheckable)
+        is_checked = checked is None or item in checked
+        list_item.setCheckState(QtCore.Qt.CheckState.Checked if is_checked else QtCore.Qt.CheckState.Unchecked)
+    layout.addWidget(list_widget)
+
+    buttons = QtWidgets.QDialogButtonBox(
+        QtWidgets.QDialogButtonBox.StandardButton.Ok | QtWidgets.QDialogButtonBox.StandardButton.Cancel, dialog
+    )
+    buttons.button(QtWidgets.QDialogButtonBox.StandardButton.Cancel).setText("Cancelar")
+    buttons.accepted.connect(dialog.accept)
+    buttons.rejected.connect(dialog.reject)
+    layout.addWidget(buttons)
+
+    ok = dialog.exec() == QtWidgets.QDialog.DialogCode.Accepted.value
+    selected = [
+        list_widget.item(i).text() for i in range(list_widget.count())
+        if list_widget.item(i).checkState() == QtCore.Qt.CheckState.Checked
+    ]
+
+    return selected, ok
+
+
 def show_input_dialog(message: str, title: str = "Inserir", default_text: str = "",
                       parent: QtWidgets.QMainWindow = None) -> (str, bool):
     """
@@ -84,6 +125,23 @@ def show_input_dialog(message: str, title: str = "Inserir", default_text: str =
     return user_input, ok
 
 
+def show_integer_dialog(message: str, title: str = "Inserir", default_value: int = 0, minimum: int = 0,
+                        maximum: int = 2 ** 31 - 1, parent: QtWidgets.QMainWindow = None) -> (int, bool):
+    """
+    Exibe um diálogo para inserção de um número inteiro.
+    :param message: Mensagem ao usuário.
+    :param title: Título da janela.
+    :param default_value: Valor padrão na caixa.
+    :param minimum: Menor valor aceito.
+    :param maximum: Maior valor aceito.
+    :param parent: Janela pai.
+    :return: O número inserido e se o botão de OK foi clicado (int, bool)
+    """
+    user_input, ok = QtWidgets.QInputDialog.getInt(parent, title, message, default_value, minimum, maximum)
+
+    return user_input, ok
+
+
 def show_question_dialog(message: str, parent: QtWidgets.QMainWindow = None):
     """
     Exibe uma mensagem de confirmação.
@@ -1,15 +1,40 @@
 # -*- coding: utf-8 -*-
 """ @author: Gabriel Maccari """
 
+import bisect
+import concurrent.futures
+import contextlib
 import csv
+import importlib.util
+import itertools
+import json
+import numpy
+import os
 import pandas
 import geopandas
 import pyproj
 import re
+import shapely
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
 
 from icecream import ic
 
-# geopandas.options.io_engine = "pyogrio" #  pyogrio é melhor que fiona, mas não funciona com o pyinstaller
+try:
+    import pyarrow
+    import pyarrow.compute
+    import pyarrow.parquet
+except ImportError:  # O pyarrow é opcional. Ele acelera a leitura de coordenadas em GMS e permite gravar arquivos Parquet
+    pyarrow = None
+
+try:
+    import pyogrio
+except ImportError:  # pyogrio é melhor que fiona, mas não funciona com o pyinstaller. Sem ele, a exportação usa o fiona
+    pyogrio = None
 
 crs_types = {
     "PJType.GEOGRAPHIC_2D_CRS": "Geographic 2D CRS",
@@ -17,18 +42,492 @@ crs_types = {
     "PJType.PROJECTED_CRS": "Projected CRS",
 }
 
-crs_db = pyproj.database.query_crs_info(pj_types=("GEOGRAPHIC_2D_CRS", "PROJECTED_CRS", "GEOGRAPHIC_3D_CRS"))
-CRS_DICT = {
-    f"{crs_info.name} {'(3D) ' if crs_types[str(crs_info.type)] == 'Geographic 3D CRS' else ''}({crs_info.auth_name}:{crs_info.code})":
-    {
-        "name": crs_info.name,
-        "auth_name": crs_info.auth_name,
-        "code": crs_info.code,
-        "type": crs_types[str(crs_info.type)]
-    }
-    for crs_info in crs_db if not crs_info.auth_name.startswith("IAU")  # Os SRCs da IAU são para outros planetas
-}
-del crs_db
+
+class CRSCatalog(Mapping):
+    """
+    Catálogo de SRCs carregado sob demanda. Na primeira consulta, tenta ler o índice salvo em disco para a versão
+    atual do banco de dados do PROJ e, caso ele não exista, consulta o banco de dados e salva o índice para as próximas
+    execuções. Funciona como um dicionário somente leitura no formato {"name (auth:code)": {"name", "auth_name",
+    "code", "type"}}.
+    """
+    def __init__(self, cache_dir: str | None = None):
+        self.cache_dir = cache_dir
+        self._entries = None
+        self._sorted_keys = None
+        self._name_index = None
+        self._code_index = None
+
+    def __getitem__(self, key: str) -> dict:
+        return self._load()[key]
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def __contains__(self, key) -> bool:
+        return key in self._load()
+
+    def sorted_keys(self) -> list[str]:
+        """
+        Retorna as chaves do catálogo em ordem alfabética (a lista é calculada uma única vez).
+        :return: Lista de chaves no formato "name (auth:code)".
+        """
+        self._load()
+        return self._sorted_keys
+
+    def search(self, prefix: str, limit: int | None = None) -> list[str]:
+        """
+        Busca SRCs cujo nome ou código começa com o prefixo informado (sem diferenciar maiúsculas e minúsculas).
+        Ex: "SIRGAS 2000", "4674" ou "EPSG:4674".
+        :param prefix: O início do nome ou do código do SRC.
+        :param limit: Número máximo de resultados. None para retornar todos.
+        :return: Lista de chaves do catálogo que correspondem ao prefixo, em ordem alfabética.
+        """
+        self._load()
+        prefix = prefix.strip().lower()
+        matches = set()
+        for index in (self._name_index, self._code_index):
+            start = bisect.bisect_left(index, (prefix, ""))
+            for text, key in itertools.islice(index, start, None):
+                if not text.startswith(prefix):
+                    break
+                matches.add(key)
+        results = sorted(matches)
+        return results if limit is None else results[:limit]
+
+    def _load(self) -> dict:
+        if self._entries is not None:
+            return self._entries
+
+        version = get_proj_database_version()
+        cache_path = os.path.join(self.cache_dir or get_cache_dir(), f"crs_catalog_{version}.json")
+
+        rows = None
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+            if cache.get("version") == version:
+                rows = cache["rows"]
+        except (OSError, ValueError, KeyError):
+            rows = None
+
+        if rows is None:
+            rows = self._query_database()
+            temp_path = None
+            try:
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                # Vários processos podem refazer o índice ao mesmo tempo (ex: conversão em lote pela linha de comando).
+                # Ele é gravado em um arquivo temporário e só então substitui o índice, para nunca ser lido pela metade
+                fd, temp_path = tempfile.mkstemp(suffix=".tmp", prefix="crs_catalog_", dir=os.path.dirname(cache_path))
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump({"version": version, "rows": rows}, f, ensure_ascii=False, separators=(",", ":"))
+                os.replace(temp_path, cache_path)
+                temp_path = None
+            except OSError as error:
+                ic(error)  # O catálogo continua funcionando mesmo sem conseguir salvar o índice
+            finally:
+                if temp_path is not None and os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+        entries = {}
+        for name, auth_name, code, crs_type in rows:
+            key = f"{name} {'(3D) ' if crs_type == 'Geographic 3D CRS' else ''}({auth_name}:{code})"
+            entries[key] = {"name": name, "auth_name": auth_name, "code": code, "type": crs_type}
+
+        self._sorted_keys = sorted(entries.keys())
+        self._name_index = sorted((entry["name"].lower(), key) for key, entry in entries.items())
+        self._code_index = sorted(
+            text for key, entry in entries.items()
+            for text in ((entry["code"].lower(), key), (f"{entry['auth_name']}:{entry['code']}".lower(), key))
+        )
+        self._entries = entries
+        return entries
+
+    @staticmethod
+    def _query_database() -> list[list[str]]:
+        crs_db = pyproj.database.query_crs_info(pj_types=("GEOGRAPHIC_2D_CRS", "PROJECTED_CRS", "GEOGRAPHIC_3D_CRS"))
+        return [
+            [crs_info.name, crs_info.auth_name, crs_info.code, crs_types[str(crs_info.type)]]
+            for crs_info in crs_db if not crs_info.auth_name.startswith("IAU")  # Os SRCs da IAU são para outros planetas
+        ]
+
+
+def get_proj_database_version() -> str:
+    """
+    Identifica a versão do banco de dados do PROJ em uso, para que o índice de SRCs salvo em disco seja refeito
+    quando o pyproj/PROJ for atualizado.
+    :return: String com a versão do PROJ e das fontes de dados do banco (apenas caracteres seguros para nomes de arquivo).
+    """
+    parts = [pyproj.proj_version_str]
+    for source in ("EPSG.VERSION", "ESRI.VERSION", "IGNF.VERSION"):
+        parts.append(pyproj.database.get_database_metadata(source) or "")
+    return re.sub(r"[^\w.]+", "_", "-".join(parts))
+
+
+def get_cache_dir() -> str:
+    """
+    Retorna a pasta de cache do aplicativo (%LOCALAPPDATA% no Windows e ~/.cache nos demais sistemas).
+    :return: Caminho da pasta de cache.
+    """
+    base_dir = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base_dir, "table2spatial")
+
+
+class LRUCache:
+    """
+    Cache de tamanho limitado que descarta os itens usados há mais tempo (least recently used) e contabiliza os
+    acertos (hits) e falhas (misses) das consultas. Pode ser consultado por várias threads ao mesmo tempo.
+    """
+    def __init__(self, max_size: int = 64):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key, factory):
+        """
+        Retorna o item armazenado na chave informada. Caso ele não exista, cria o item chamando a função factory,
+        armazena-o e descarta o item mais antigo caso o tamanho máximo seja excedido.
+        :param key: A chave do item.
+        :param factory: Função sem parâmetros que cria o item caso ele não esteja no cache.
+        :return: O item.
+        """
+        with self._lock:
+            if key in self._items:
+                self.hits += 1
+                self._items.move_to_end(key)
+                return self._items[key]
+
+            self.misses += 1
+            value = factory()
+            self._items[key] = value
+            if len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+            return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.hits, self.misses = 0, 0
+
+
+class ProjectionCache:
+    """
+    Cache de objetos pyproj.CRS e dos limites da área de uso de cada SRC (no próprio SRC), para que a troca de SRCs na
+    interface não precise consultar o banco de dados do PROJ novamente. O cache cobre apenas os SRCs e seus limites:
+    os objetos pyproj.Transformer não são guardados, pois não podem ser compartilhados entre threads. A reprojeção
+    cria um transformador por thread a cada execução (ver DataHandler.reproject_geodataframe).
+    """
+    def __init__(self, max_size: int = 64):
+        self.crs = LRUCache(max_size)
+        self.bounds = LRUCache(max_size)
+
+    def get_crs(self, crs_key: str) -> pyproj.CRS:
+        """
+        :param crs_key: A chave para o dicionário de SRCs (CRS_DICT), no formato "name (auth:code)".
+        :return: O objeto pyproj.CRS correspondente.
+        """
+        return self.crs.get(
+            crs_key, lambda: pyproj.CRS.from_authority(CRS_DICT[crs_key]["auth_name"], CRS_DICT[crs_key]["code"])
+        )
+
+    def get_bounds(self, crs_key: str) -> (float, float, float, float):
+        """
+        Calcula os limites da área de uso do SRC em suas próprias coordenadas (graus para SRCs geográficos e metros
+        para SRCs projetados).
+        :param crs_key: A chave para o dicionário de SRCs (CRS_DICT), no formato "name (auth:code)".
+        :return: x_min, y_min, x_max, y_max
+        """
+        def compute_bounds():
+            crs = self.get_crs(crs_key)
+            if CRS_DICT[crs_key]["type"] in ["Geographic 2D CRS", "Geographic 3D CRS"]:
+                return crs.area_of_use.bounds
+            # Os limites ficam no cache, então o transformador só é usado uma vez
+            transformer = pyproj.Transformer.from_crs(crs.geodetic_crs, crs, always_xy=True)
+            return transformer.transform_bounds(*crs.area_of_use.bounds)
+
+        return self.bounds.get(crs_key, compute_bounds)
+
+    def stats(self) -> dict:
+        """
+        :return: Dicionário com o número de itens, acertos e falhas de cada cache. Ex: {"crs": {"size": 2, "hits": 5, "misses": 2}, ...}
+        """
+        return {
+            name: {"size": len(cache), "hits": cache.hits, "misses": cache.misses}
+            for name, cache in (("crs", self.crs), ("bounds", self.bounds))
+        }
+
+
+class SheetCache:
+    """
+    Cache das planilhas já lidas de uma pasta de trabalho, limitado por um orçamento de memória. Quando o orçamento é
+    excedido, as planilhas usadas há mais tempo são descartadas. As planilhas são entregues como cópias rasas, que
+    compartilham os arrays das colunas com o cache. Isso é seguro porque o DataHandler nunca altera esses arrays: as
+    edições substituem colunas inteiras (ex: gdf[coluna] = valores) ou alteram cópias delas (ver DataHandler.get_state).
+    """
+    def __init__(self, memory_budget: int = 1024 ** 3):
+        self.memory_budget = memory_budget
+        self.memory_usage = 0
+        self._sheets = OrderedDict()
+
+    def __contains__(self, sheet: str) -> bool:
+        return sheet in self._sheets
+
+    def get(self, sheet: str, loader) -> pandas.DataFrame:
+        """
+        Retorna uma cópia da planilha. Caso ela não esteja no cache, lê a planilha chamando a função loader.
+        :param sheet: O nome da planilha.
+        :param loader: Função sem parâmetros que lê e retorna o DataFrame da planilha.
+        :return: O DataFrame da planilha.
+        """
+        if sheet in self._sheets:
+            self._sheets.move_to_end(sheet)
+            return self._sheets[sheet][0].copy(deep=False)
+
+        df = loader()
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        if size <= self.memory_budget:
+            self._sheets[sheet] = (df, size)
+            self.memory_usage += size
+            while self.memory_usage > self.memory_budget:
+                _, (_, evicted_size) = self._sheets.popitem(last=False)
+                self.memory_usage -= evicted_size
+        return df.copy(deep=False)
+
+    def clear(self) -> None:
+        self._sheets.clear()
+        self.memory_usage = 0
+
+
+class EditHistory:
+    """
+    Pilhas de desfazer e refazer das edições do GeoDataFrame, limitadas por um orçamento de memória. Cada passo guarda
+    uma cópia rasa do estado anterior, que compartilha com os dados atuais as colunas não alteradas (as edições
+    substituem colunas inteiras ou alteram cópias próprias delas, sem alterar os arrays compartilhados; ver
+    DataHandler.get_state). Por isso, o custo de cada passo é estimado apenas pelas colunas que a edição alterou.
+    Quando o orçamento é excedido, os passos mais antigos são descartados.
+    """
+    def __init__(self, memory_budget: int = 1024 ** 3):
+        self.memory_budget = memory_budget
+        self.memory_usage = 0
+        self.undo_steps = []  # Listas de (descrição, estado, colunas alteradas, custo). O último é o mais recente
+        self.redo_steps = []
+
+    def can_undo(self) -> bool:
+        return len(self.undo_steps) > 0
+
+    def can_redo(self) -> bool:
+        return len(self.redo_steps) > 0
+
+    def push(self, description: str, state: dict, columns: list[str] | None) -> None:
+        """
+        Registra uma edição, descartando os passos que poderiam ser refeitos.
+        :param description: Descrição da edição. Ex: "Excluir coluna amostras".
+        :param state: O estado anterior à edição (ver DataHandler.get_state).
+        :param columns: As colunas substituídas ou excluídas pela edição. None caso todo o GeoDataFrame tenha mudado.
+        :return: Nada.
+        """
+        self._clear(self.redo_steps)
+        if self.memory_budget > 0:  # Orçamento zero desativa o histórico (ex: na reaplicação de receitas)
+            self._append(self.undo_steps, description, state, columns)
+
+    def undo(self, current_state: dict) -> tuple[str, dict] | None:
+        """
+        :param current_state: O estado atual, que passa para a pilha de refazer.
+        :return: A descrição da edição desfeita e o estado anterior a ela, ou None se não houver o que desfazer.
+        """
+        return self._move(self.undo_steps, self.redo_steps, current_state)
+
+    def redo(self, current_state: dict) -> tuple[str, dict] | None:
+        """
+        :param current_state: O estado atual, que volta para a pilha de desfazer.
+        :return: A descrição da edição refeita e o estado posterior a ela, ou None se não houver o que refazer.
+        """
+        return self._move(self.redo_steps, self.undo_steps, current_state)
+
+    def clear(self) -> None:
+        self._clear(self.undo_steps)
+        self._clear(self.redo_steps)
+
+    def _move(self, source: list, target: list, current_state: dict) -> tuple[str, dict] | None:
+        if not source:
+            return None
+        description, state, columns, size = source.pop()
+        self.memory_usage -= size
+        self._append(target, description, current_state, columns)
+        return description, state
+
+    def _append(self, steps: list, description: str, state: dict, columns: list[str] | None) -> None:
+        gdf = state["gdf"]
+        if gdf is None:
+            size = 0
+        elif columns is None:
+            size = estimate_memory_usage(gdf)
+        else:
+            size = estimate_memory_usage(gdf[[col for col in columns if col in gdf.columns]])
+        steps.append((description, state, columns, size))
+        self.memory_usage += size
+
+        # Descarta os passos mais antigos (primeiro os de desfazer, que estão mais distantes do estado atual)
+        while self.memory_usage > self.memory_budget and (self.undo_steps or self.redo_steps):
+            oldest = self.undo_steps if self.undo_steps else self.redo_steps
+            self.memory_usage -= oldest.pop(0)[3]
+
+    def _clear(self, steps: list) -> None:
+        self.memory_usage -= sum(step[3] for step in steps)
+        steps.clear()
+
+
+class Recipe:
+    """
+    Receita de processamento: as operações do DataHandler (leitura, conversões, mesclagem, reprojeção, exportação etc.)
+    executadas sobre uma tabela, com seus parâmetros e na ordem em que foram feitas. Pode ser salva em JSON e reaplicada
+    a outras tabelas sem a interface gráfica (ver DataHandler.run_recipe).
+    """
+    def __init__(self, steps: list[dict] | None = None):
+        self.steps = steps if steps is not None else []  # Dicionários {"operation": nome do método, "params": {...}}
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def record(self, operation: str, **params) -> None:
+        self.steps.append({"operation": operation, "params": params})
+
+    def truncate(self, operation: str) -> None:
+        """
+        Descarta os passos registrados depois do último passo de uma operação. Ex: ao ler outra planilha da mesma pasta
+        de trabalho, mantém apenas a leitura do arquivo.
+        :param operation: O nome da operação.
+        :return: Nada.
+        """
+        positions = [i for i, step in enumerate(self.steps) if step["operation"] == operation]
+        del self.steps[positions[-1] + 1 if positions else 0:]
+
+    def copy(self) -> "Recipe":
+        return Recipe(list(self.steps))
+
+    def save(self, path: str) -> None:
+        """
+        Grava a receita em um arquivo JSON.
+        :param path: Caminho do arquivo.
+        :return: Nada.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            # Rótulos de colunas e nomes de planilhas podem ser números do numpy
+            json.dump({"version": RECIPE_VERSION, "steps": self.steps}, f, ensure_ascii=False, indent=2,
+                      default=lambda value: value.item() if isinstance(value, numpy.generic) else str(value))
+
+    @classmethod
+    def load(cls, path: str) -> "Recipe":
+        """
+        Lê uma receita gravada pelo método save, verificando se todas as operações podem ser reaplicadas.
+        :param path: Caminho do arquivo JSON.
+        :return: A receita.
+        """
+        with open(path, encoding="utf-8") as f:
+            content = json.load(f)
+        if not isinstance(content, dict) or content.get("version") != RECIPE_VERSION:
+            raise ValueError(f"O arquivo {path} não é uma receita válida ou foi gravado por outra versão do programa.")
+        steps = content.get("steps", [])
+        for step in steps:
+            if step.get("operation") not in RECIPE_OPERATIONS or not isinstance(step.get("params"), dict):
+                raise ValueError(f"Operação inválida na receita: {step.get('operation')}.")
+        return cls(steps)
+
+    def with_paths(self, input_path: str | None = None, output_paths: list[str] | None = None) -> "Recipe":
+        """
+        Retorna uma cópia da receita que lê outra tabela e/ou grava outros arquivos de saída.
+        :param input_path: Caminho da tabela a ser lida no lugar da tabela original. None para manter a original.
+        :param output_paths: Caminhos dos arquivos a serem gravados pela última exportação da receita (que é
+            acrescentada ao final, caso a receita não tenha nenhuma). None para manter os arquivos originais.
+        :return: A nova receita.
+        """
+        steps = list(self.steps)
+
+        if input_path is not None:
+            reads = [i for i, step in enumerate(steps) if step["operation"] in RECIPE_READ_OPERATIONS]
+            if not reads:
+                raise ValueError("A receita não contém a leitura de uma tabela.")
+            steps[reads[0]] = {"operation": steps[reads[0]]["operation"],
+                               "params": {**steps[reads[0]]["params"], "path": input_path}}
+
+        if output_paths:
+            exports = [i for i, step in enumerate(steps)
+                       if step["operation"] in ("export_geodataframe", "export_geodataframes")]
+            params = {} if not exports else {
+                key: value for key, value in steps[exports[-1]]["params"].items() if key not in ("path", "paths")
+            }
+            if len(output_paths) == 1:
+                step = {"operation": "export_geodataframe", "params": {**params, "path": output_paths[0]}}
+            else:
+                step = {"operation": "export_geodataframes", "params": {**params, "paths": list(output_paths)}}
+            if exports:
+                steps[exports[-1]] = step
+            else:
+                steps.append(step)
+
+        return Recipe(steps)
+
+    def optimized(self) -> "Recipe":
+        """
+        Retorna uma versão da receita que produz o mesmo resultado com menos trabalho, para reaplicá-la sem a interface:
+        conversões de tipo de colunas excluídas mais adiante são descartadas, colunas de arquivos Parquet excluídas
+        sem terem sido usadas nem chegam a ser lidas e conversões de tipo consecutivas são fundidas em um único passo
+        (ver DataHandler.change_column_dtypes).
+        :return: A nova receita.
+        """
+        def uses(step, column):
+            # Exportações usam todas as colunas. Os demais passos usam as colunas citadas em seus parâmetros
+            if step["operation"] in ("export_geodataframe", "export_geodataframes", "change_column_dtypes"):
+                return True
+            return any(value == column or (isinstance(value, list) and column in value)
+                       for value in step["params"].values())
+
+        def deleted_later(steps, column, start):
+            # Verifica se a coluna é excluída a partir do passo start sem ser usada antes (exceto para convertê-la)
+            for step in steps[start:]:
+                if step["operation"] == "delete_column" and step["params"]["column"] == column:
+                    return True
+                if step["operation"] != "change_column_dtype" and uses(step, column):
+                    return False
+            return False
+
+        steps = [step for i, step in enumerate(self.steps)
+                 if step["operation"] != "change_column_dtype" or not deleted_later(self.steps, step["params"]["column"], i + 1)]
+
+        if steps and steps[0]["operation"] == "read_parquet_file" and pyarrow is not None:
+            params = steps[0]["params"]
+            columns = params.get("columns") or read_parquet_schema(params["path"])[0]
+            skipped = {column for column in columns if deleted_later(steps, column, 1)}
+            if skipped:
+                steps = [{"operation": "read_parquet_file",
+                          "params": {**params, "columns": [col for col in columns if col not in skipped]}}] + [
+                    step for step in steps[1:]
+                    if step["operation"] != "delete_column" or step["params"]["column"] not in skipped
+                ]
+
+        fused = []
+        for operation, group in itertools.groupby(steps, key=lambda step: step["operation"]):
+            group = list(group)
+            if operation == "change_column_dtype" and len(group) > 1:
+                conversions = [
+                    [step["params"]["column"], step["params"]["target_dtype_key"],
+                     {key: value for key, value in step["params"].items() if key not in ("column", "target_dtype_key")}]
+                    for step in group
+                ]
+                fused.append({"operation": "change_column_dtypes", "params": {"conversions": conversions}})
+            else:
+                fused.extend(group)
+        return Recipe(fused)
+
+
+CRS_DICT = CRSCatalog()
 
 DTYPES_DICT = {
     "String": {
@@ -53,6 +552,65 @@ DTYPES_DICT = {
     }
 }
 
+# Leitores de planilhas, em ordem de preferência (do mais rápido ao mais lento)
+EXCEL_ENGINES = {
+    "calamine": {"module": "python_calamine", "extensions": (".xlsx", ".xlsm", ".ods")},
+    "openpyxl": {"module": "openpyxl", "extensions": (".xlsx", ".xlsm")},
+    "odf": {"module": "odf", "extensions": (".ods",)},
+}
+
+# Padrões de coordenadas em GMS (GG°MM'SS,sss"D)
+DMS_PATTERNS = {
+    "x": r"^(?P<degrees>\d{1,3})[°º](?P<minutes>\d{1,2})['’′](?P<seconds>\d{1,2}(?:[.,]\d+)?)(?:[\"”″]|'')(?P<hemisphere>[EWOLewol])$",
+    "y": r"^(?P<degrees>\d{1,2})[°º](?P<minutes>\d{1,2})['’′](?P<seconds>\d{1,2}(?:[.,]\d+)?)(?:[\"”″]|'')(?P<hemisphere>[NSns])$",
+}
+
+VECTOR_DRIVERS = {
+    ".gpkg": "GPKG",
+    ".geojson": "GeoJSON",
+    ".shp": "ESRI Shapefile",
+}
+
+# Arquivos gravados junto com um Shapefile (ver export_dataframe)
+SHAPEFILE_EXTENSIONS = (".shp", ".shx", ".dbf", ".prj", ".cpg")
+
+# SRCs geográficos comparados aos SRCs sem código reconhecido, em ordem de preferência (ver get_crs_key)
+LONLAT_CRS_KEYS = ("WGS 84 (CRS84) (OGC:CRS84)", "WGS 84 (EPSG:4326)")
+
+# Modos de criação do índice espacial dos arquivos GeoPackage
+SPATIAL_INDEX_MODES = {
+    "write": "Criar durante a gravação",
+    "after": "Criar após a gravação",
+    "none": "Não criar",
+}
+
+REPROJECTION_CHUNK_SIZE = 500_000  # Número de pontos reprojetados de cada vez por thread
+
+EXPORT_BATCH_SIZE = 250_000  # Número de linhas gravadas de cada vez na exportação via Arrow
+
+# Colunas de texto com até essa proporção de valores distintos são convertidas para category na otimização de memória
+CATEGORY_RATIO = 0.5
+
+# Algoritmos de compressão de arquivos Parquet
+PARQUET_COMPRESSIONS = ("snappy", "zstd", "gzip", "brotli", "lz4", "none")
+
+# Memória máxima ocupada pelas versões anteriores dos dados guardadas para desfazer edições
+HISTORY_MEMORY_BUDGET = 1024 ** 3
+
+# Número máximo de valores testados com cada formato de data e hora na identificação automática do formato
+DATETIME_SAMPLE_SIZE = 1000
+
+# Versão do formato dos arquivos de receita (ver Recipe)
+RECIPE_VERSION = 1
+
+# Operações do DataHandler que podem ser registradas em receitas e reaplicadas
+RECIPE_READ_OPERATIONS = ("read_excel_file", "read_csv_file", "read_parquet_file")
+RECIPE_OPERATIONS = (
+    *RECIPE_READ_OPERATIONS, "read_excel_sheet", "convert_numeric_text_columns", "optimize_dtypes",
+    "set_geodataframe_geometry", "merge_sheets", "rename_column", "delete_column", "change_column_dtype",
+    "change_column_dtypes", "reproject_geodataframe", "export_geodataframe", "export_geodataframes"
+)
+
 DATETIME_FORMATS = {
     "DD/MM/YYYY": "%d/%m/%Y",
     "YYYY/MM/DD": "%Y/%m/%d",
@@ -69,23 +627,53 @@ DATETIME_FORMATS = {
 }
 
 
+class DatetimeConversionError(ValueError):
+    """ Levantado quando parte dos valores de uma coluna não corresponde ao formato de data e hora informado. """
+    def __init__(self, message: str, rows: list):
+        super().__init__(message)
+        self.rows = rows
+
+
 class DataHandler:
-    def __init__(self):
+    def __init__(self, projection_cache: ProjectionCache | None = None, history_budget: int = HISTORY_MEMORY_BUDGET):
         self.excel_file = None
+        self.excel_engine = "auto"
+        self.excel_engine_used = None
+        self.sheet_name = None
+        self.sheet_cache = SheetCache()
         self.gdf = None
         self.x_column = None
         self.y_column = None
         self.z_column = None
         self.crs_key = None
+        # Pode ser compartilhado entre instâncias, para não recriar os SRCs e transformações ao abrir outro arquivo
+        self.projection_cache = projection_cache if projection_cache is not None else ProjectionCache()
+        self.column_profiles = {}
+        self.cache_lock = threading.Lock()  # Protege column_profiles, preenchido também pela verificação em segundo plano
+        self.value_counts = {}
+        self.factorized_column = None  # (coluna, códigos, rótulos) da última coluna codificada por factorize_column
+        self.history = EditHistory(history_budget)
+        self.recipe = Recipe()  # Operações executadas desde a leitura da tabela
+        self.last_export_report = None
 
-    def read_excel_file(self, path: str) -> None:
+    def read_excel_file(self, path: str, engine: str | None = None) -> None:
         """
-        Função que lê uma pasta de trabalho do Excel/OpenDocument e a armazena como um objeto pandas.ExcelFile no
-        atributo "excel_file" da classe.
+        Função que lê uma pasta de trabalho do Excel/OpenDocument e a armazena no atributo "excel_file" da classe,
+        como um objeto pandas.ExcelFile.
         :param path: Caminho do arquivo a ser lido.
+        :param engine: O leitor a ser usado (uma das chaves do EXCEL_ENGINES ou "auto"). Se None, usa o atributo
+            "excel_engine" da classe. No modo "auto", usa o leitor mais rápido instalado que suporte o formato.
         :return: Nada.
         """
-        self.excel_file = pandas.ExcelFile(path)
+        requested_engine = engine or self.excel_engine
+        engine = select_excel_engine(path, requested_engine)
+        if self.excel_file is not None:
+            self.excel_file.close()
+        self.excel_file = open_workbook(path, engine)
+        self.excel_engine_used = engine
+        self.sheet_cache.clear()
+        self.recipe = Recipe()
+        self.recipe.record("read_excel_file", path=path, engine=requested_engine)
 
     def read_excel_sheet(self, sheet: str | int) -> None:
         """
@@ -95,28 +683,165 @@ class DataHandler:
         :param sheet: O nome (str) ou índice (int) da planilha a ser lida.
         :return: Nada.
         """
-        df = self.process_data(self.excel_file.parse(sheet_name=sheet))
+        if isinstance(sheet, int):
+            sheet = self.excel_file.sheet_names[sheet]
+        df = self.get_parsed_sheet(sheet)
         self.gdf = geopandas.GeoDataFrame(df)
+        self.sheet_name = sheet
+        self.invalidate_column_cache()
+        self.history.clear()
+        self.recipe.truncate("read_excel_file")
+        self.recipe.record("read_excel_sheet", sheet=sheet)
+
+    def get_parsed_sheet(self, sheet: str) -> pandas.DataFrame:
+        """
+        Retorna uma cópia da planilha já tratada pela função process_data, lendo-a do arquivo do atributo "excel_file"
+        apenas na primeira vez (as planilhas lidas ficam guardadas no atributo "sheet_cache").
+        :param sheet: O nome da planilha.
+        :return: O DataFrame da planilha.
+        """
+        return self.sheet_cache.get(sheet, lambda: self.process_data(self.excel_file.parse(sheet_name=sheet)))
 
-    def read_csv_file(self, path: str, decimal: str = ',') -> None:
+    def read_csv_file(self, path: str, decimal: str = ',', nrows: int | None = None) -> None:
         """
         Função que lê um arquivo CSV, identifica o delimitador de células e armazena os dados como um
         geopandas.GeoDataFrame no atributo "gdf" da classe. Automaticamente chama a função process_data para tratar os
         dados.
         :param path:  Caminho do arquivo a ser lido.
         :param decimal: O separador decimal usado no arquivo. O padrão é ',' (vírgula).
+        :param nrows: Número máximo de linhas a serem lidas (ex: para pré-visualizar arquivos muito grandes). None para ler todas.
         :return: Nada.
         """
-        sniffer = csv.Sniffer()
-        data = open(path, "r").read(4096)
-        sep = str(sniffer.sniff(data).delimiter)
+        sep, file_decimal = sniff_csv_format(path, decimal)
+        df = self.process_data(pandas.read_csv(path, delimiter=sep, decimal=file_decimal, nrows=nrows))
+        self.gdf = geopandas.GeoDataFrame(df)
+        self.invalidate_column_cache()
+        self.history.clear()
+        self.recipe = Recipe()
+        self.recipe.record("read_csv_file", path=path, decimal=decimal, nrows=nrows)
 
-        # Retirar isso caso seja implementada alguma seleção manual de separador decimal
-        if sep == ',':
-            decimal = '.'
+    def read_parquet_file(self, path: str, columns: list[str] | None = None) -> bool:
+        """
+        Lê um arquivo Parquet ou GeoParquet e armazena os dados como um geopandas.GeoDataFrame no atributo "gdf" da
+        classe. Arquivos GeoParquet já trazem a geometria e o SRC dos pontos, que são mantidos. Automaticamente chama a
+        função process_data para tratar os dados.
+        :param path: Caminho do arquivo a ser lido.
+        :param columns: Colunas a serem lidas (as demais nem são carregadas do disco). None para ler todas. As colunas
+            de geometria de arquivos GeoParquet são sempre lidas.
+        :return: True se o arquivo contém geometria (GeoParquet). Do contrário, False.
+        """
+        if pyarrow is None:
+            raise ImportError("A biblioteca pyarrow é necessária para ler arquivos Parquet.")
 
-        df = self.process_data(pandas.read_csv(path, delimiter=sep, decimal=decimal))
-        self.gdf = geopandas.GeoDataFrame(df)
+        _, geometry_columns = read_parquet_schema(path)
+        if columns is not None:
+            columns = list(columns) + [col for col in geometry_columns if col not in columns]
+
+        if geometry_columns:
+            gdf = self.process_data(geopandas.read_parquet(path, columns=columns))
+            self.gdf = geopandas.GeoDataFrame(gdf)
+            self.crs_key = get_crs_key(self.gdf.crs) if self.gdf.crs is not None else None
+        else:
+            df = self.process_data(pandas.read_parquet(path, columns=columns))
+            self.gdf = geopandas.GeoDataFrame(df)
+        self.invalidate_column_cache()
+        self.history.clear()
+        self.recipe = Recipe()
+        self.recipe.record("read_parquet_file", path=path, columns=columns)
+        return bool(geometry_columns)
+
+    def stream_csv_file(self, path: str, output_path: str, crs_key: str | None = None, x_column: str | None = None,
+                        y_column: str | None = None, z_column: str | None = None, dms: bool = False,
+                        chunk_size: int = 100_000, layer_name: str = "pontos", decimal: str = ',',
+                        progress=None, crs: pyproj.CRS | None = None) -> int:
+        """
+        Converte um arquivo CSV diretamente para um arquivo de saída (GPKG, CSV ou Parquet), lendo e gravando os dados
+        em partes de chunk_size linhas. Cada parte é tratada pela função process_data e recebe sua geometria antes de
+        ser gravada, de modo que o uso de memória depende do tamanho das partes e não do tamanho do arquivo. Os dados
+        não são armazenados no atributo "gdf" da classe.
+        :param path: Caminho do arquivo CSV a ser lido.
+        :param output_path: Caminho do arquivo de saída (.gpkg, .csv ou .parquet).
+        :param crs_key: A chave do SRC das coordenadas no CRS_DICT. None para converter a tabela sem coordenadas.
+        :param x_column: O rótulo da coluna que contém as coordenadas do eixo X.
+        :param y_column: O rótulo da coluna que contém as coordenadas do eixo Y.
+        :param z_column: O rótulo da coluna que contém as coordenadas do eixo Z.
+        :param dms: True caso as coordenadas estejam em formato Graus, Minutos e Segundos. Do contrário, False.
+        :param chunk_size: Número de linhas lidas e gravadas de cada vez.
+        :param layer_name: Nome da camada (para arquivos geopackage).
+        :param decimal: O separador decimal usado no arquivo. O padrão é ',' (vírgula).
+        :param progress: Função opcional progress(percent, message), chamada antes de cada parte ser lida.
+        :param crs: O pyproj.CRS de crs_key, já criado. Se None, é obtido do atributo "projection_cache" (ver
+            set_geodataframe_geometry).
+        :return: O número de linhas gravadas.
+        """
+        output_format = os.path.splitext(output_path)[1].lower()
+        if output_format not in (".gpkg", ".csv", ".parquet"):
+            raise ValueError(f"Formato de saída não suportado na conversão em partes: {output_format}.")
+        if output_format == ".gpkg" and crs_key is None:
+            raise ValueError("Arquivos GeoPackage precisam de coordenadas.")
+        if output_format == ".parquet" and pyarrow is None:
+            raise ImportError("A biblioteca pyarrow é necessária para gravar arquivos Parquet.")
+
+        if crs is None and crs_key is not None:
+            crs = self.projection_cache.get_crs(crs_key)
+        sep, decimal = sniff_csv_format(path, decimal)
+
+        # Os dados são gravados em um arquivo temporário, que só substitui o arquivo de saída se a conversão terminar.
+        # Um GeoPackage já existente é copiado antes, para manter as suas demais camadas
+        stem, extension = os.path.splitext(output_path)
+        temp_path = f"{stem}.tmp{extension}"
+        if output_format == ".gpkg" and os.path.exists(output_path):
+            shutil.copyfile(output_path, temp_path)
+
+        rows_written, schema, parquet_writer = 0, None, None
+        try:
+            for chunk in pandas.read_csv(path, delimiter=sep, decimal=decimal, chunksize=chunk_size):
+                if progress is not None:
+                    progress(-1, f"{rows_written} linhas gravadas...")
+                try:
+                    chunk = self.process_data(chunk)
+                except IndexError:  # Parte sem nenhuma linha preenchida
+                    continue
+
+                # Todas as partes recebem os tipos de dados da primeira, ampliados para aceitar células vazias
+                if schema is None:
+                    schema = chunk_schema(chunk)
+                chunk = conform_chunk(chunk, schema, fixed_schema=output_format != ".csv")
+
+                if crs is not None:
+                    geometry = points_from_columns(chunk, crs, x_column, y_column, z_column, dms)
+                    chunk = geopandas.GeoDataFrame(chunk, geometry=geometry, crs=crs)
+
+                first_chunk = rows_written == 0
+                if output_format == ".gpkg":
+                    chunk.to_file(filename=temp_path, layer=layer_name, driver="GPKG", encoding="utf-8",
+                                  mode="w" if first_chunk else "a")
+                elif output_format == ".csv":
+                    pandas.DataFrame(chunk).to_csv(temp_path, sep=";", decimal=".", index=False, encoding="utf-8",
+                                                   mode="w" if first_chunk else "a", header=first_chunk)
+                else:
+                    if crs is not None:
+                        table = geopandas.io.arrow._geopandas_to_arrow(chunk, index=False)
+                    else:
+                        table = pyarrow.Table.from_pandas(pandas.DataFrame(chunk), preserve_index=False)
+                    if parquet_writer is None:
+                        parquet_writer = pyarrow.parquet.ParquetWriter(temp_path, table.schema)
+                    parquet_writer.write_table(table.cast(parquet_writer.schema))
+
+                rows_written += len(chunk.index)
+            if parquet_writer is not None:
+                parquet_writer.close()
+                parquet_writer = None
+            if rows_written == 0:
+                raise IndexError('A tabela selecionada está vazia ou contém apenas cabeçalhos.')
+            os.replace(temp_path, output_path)
+        finally:
+            if parquet_writer is not None:
+                parquet_writer.close()
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        return rows_written
 
     @staticmethod
     def process_data(df: pandas.DataFrame) -> pandas.DataFrame:
@@ -138,42 +863,124 @@ class DataHandler:
             raise IndexError('A tabela selecionada está vazia ou contém apenas cabeçalhos.')
         return df
 
-    def filter_coordinates_columns(self, crs_key: str, dms_format: bool = False) -> (list[str], list[str], list[str]):
+    def filter_coordinates_columns(self, crs_key: str, dms_format: bool = False, progress=None,
+                                   gdf: geopandas.GeoDataFrame | None = None) -> (list[str], list[str], list[str]):
         """
         Encontra as colunas válidas para coordenadas no GeoDataFrame e retorna uma lista de colunas válidas para x
         (longitude/easting), y (latitude/northing) e z (altitude). São consideradas colunas válidas aquelas que podem
         ser convertidas para float e cujos valores estão dentro dos limites esperados para as coordenadas do SRC.
+        Usa os perfis das colunas (ver get_column_profile), portanto não altera os dados.
         :param crs_key: A chave para o dicionário de SRCs (CRS_DICT), no formato "name (auth:code)". Ex: "SIRGAS 2000 (EPSG:4674)".
         :param dms_format: Booleano indicando se as coordenadas estão em formato GMS (GG°MM'SS.ssss"H) ou não.
+        :param progress: Função opcional progress(percent, message), chamada antes da verificação de cada coluna.
+        :param gdf: O GeoDataFrame a ser verificado. Se None, usa o atributo "gdf" da classe. A verificação em segundo
+            plano recebe o GeoDataFrame da planilha aberta quando ela começou, para não misturar planilhas caso outra
+            seja carregada durante a verificação.
         :return: Listas contendo os rótulos das colunas válidas para x, y e z, respectivamente.
         """
-        x_columns, y_columns = [], []
-
-        z_columns = self.gdf.select_dtypes(include='number').columns.tolist()
+        gdf = self.gdf if gdf is None else gdf
+        x_columns, y_columns, z_columns = [], [], []
+        columns = gdf.columns
+        for i, col in enumerate(columns):
+            if progress is not None:
+                progress(100 * i // len(columns), f"Verificando a coluna {col}...")
+            for axis, valid_columns in (("x", x_columns), ("y", y_columns), ("z", z_columns)):
+                if self.is_valid_coordinates_column(col, axis, crs_key, dms_format, gdf):
+                    valid_columns.append(col)
+        return x_columns, y_columns, z_columns
 
+    def is_valid_coordinates_column(self, column: str, axis: str, crs_key: str, dms_format: bool = False,
+                                    gdf: geopandas.GeoDataFrame | None = None) -> bool:
+        """
+        Verifica se uma coluna do GeoDataFrame é válida como coordenada de um eixo, com os mesmos critérios de
+        filter_coordinates_columns, sem verificar as demais colunas.
+        :param column: O rótulo da coluna.
+        :param axis: "x" (longitude/easting), "y" (latitude/northing) ou "z" (altitude).
+        :param crs_key: A chave para o dicionário de SRCs (CRS_DICT), no formato "name (auth:code)". Ex: "SIRGAS 2000 (EPSG:4674)".
+        :param dms_format: Booleano indicando se as coordenadas estão em formato GMS (GG°MM'SS.ssss"H) ou não.
+        :param gdf: O GeoDataFrame que contém a coluna. Se None, usa o atributo "gdf" da classe.
+        :return: True se a coluna é válida e False do contrário.
+        """
+        gdf = self.gdf if gdf is None else gdf
+        if column not in gdf.columns:
+            return False
+        if axis == "z":
+            return self.get_column_profile(column, gdf)["numeric"]
         if dms_format:
-            x_columns, y_columns = self.filter_dms_coordinates_columns()
-            return x_columns, y_columns, z_columns
+            return self.is_dms_coordinates_column(column, axis, gdf)
 
-        crs = pyproj.CRS.from_authority(CRS_DICT[crs_key]["auth_name"], CRS_DICT[crs_key]["code"])
+        x_min, y_min, x_max, y_max = self.projection_cache.get_bounds(crs_key)
+        minimum, maximum = (x_min, x_max) if axis == "x" else (y_min, y_max)
+        return profile_within_bounds(self.get_column_profile(column, gdf), minimum, maximum)
 
-        if CRS_DICT[crs_key]["type"] in ["Geographic 2D CRS", "Geographic 3D CRS"]:
-            x_min, y_min, x_max, y_max = crs.area_of_use.bounds
-        else:
-            transformer = pyproj.Transformer.from_crs(crs.geodetic_crs, crs, always_xy=True)
-            x_min, y_min, x_max, y_max = transformer.transform_bounds(*crs.area_of_use.bounds)
+    def get_column_profile(self, column: str, gdf: geopandas.GeoDataFrame | None = None) -> dict:
+        """
+        Retorna o perfil de uma coluna do GeoDataFrame: se ela pode ser convertida para números, seus valores mínimo e
+        máximo e o número de células vazias. O perfil é calculado uma única vez para cada planilha carregada e só é
+        refeito caso o tipo de dado da coluna mude.
+        :param column: O rótulo da coluna.
+        :param gdf: O GeoDataFrame que contém a coluna. Se None, usa o atributo "gdf" da classe. O perfil só é guardado
+            se esse GeoDataFrame ainda for o do atributo "gdf".
+        :return: Dicionário no formato {"dtype": str, "numeric": bool, "min": float, "max": float, "nulls": int}. As
+            chaves "dms_x" e "dms_y" são adicionadas quando a coluna é verificada como coordenada em GMS.
+        """
+        gdf = self.gdf if gdf is None else gdf
+        dtype = str(gdf[column].dtype)
+        profile = self.column_profiles.get(column)
+        if profile is None or profile["dtype"] != dtype:
+            profile = {"dtype": dtype, "numeric": False, "min": numpy.nan, "max": numpy.nan,
+                       "nulls": int(gdf[column].isna().sum())}
+            values = parse_numeric_column(gdf[column])
+            if values is not None:
+                profile["numeric"] = True
+                if profile["nulls"] < len(values):
+                    profile["min"], profile["max"] = float(numpy.nanmin(values)), float(numpy.nanmax(values))
+            # O perfil pode ter sido calculado em segundo plano enquanto outra planilha era carregada. A trava impede
+            # que ele seja guardado depois que o cache da nova planilha foi limpo
+            with self.cache_lock:
+                if gdf is self.gdf:
+                    self.column_profiles[column] = profile
+        return profile
 
+    def convert_numeric_text_columns(self) -> list[str]:
+        """
+        Converte para float as colunas de texto cujos valores são todos números (aceitando vírgula como separador
+        decimal). Ex: "-27,19899" --> -27.19899.
+        :return: Lista com os rótulos das colunas convertidas.
+        """
+        converted = []
         for col in self.gdf.columns:
-            try:
-                self.gdf[col] = self.gdf[col].replace(",", ".", regex=True).astype(float)
-                if self.gdf[col].dropna().between(y_min, y_max).all():
-                    y_columns.append(col)
-                if self.gdf[col].dropna().between(x_min, x_max).all():
-                    x_columns.append(col)
-            except (ValueError, TypeError):
+            if not (pandas.api.types.is_object_dtype(self.gdf[col]) or pandas.api.types.is_string_dtype(self.gdf[col])):
                 continue
+            if self.get_column_profile(col)["numeric"]:
+                self.gdf[col] = parse_numeric_column(self.gdf[col])
+                converted.append(col)
+        self.invalidate_column_cache(converted)
+        self.recipe.record("convert_numeric_text_columns")
+        return converted
 
-        return x_columns, y_columns, z_columns
+    def optimize_dtypes(self, category_ratio: float = CATEGORY_RATIO) -> dict:
+        """
+        Reduz o uso de memória do GeoDataFrame: converte números inteiros e decimais para os menores tipos capazes de
+        guardar os valores sem perda, colunas de texto repetitivo para category e as demais colunas de texto para
+        strings do pyarrow (quando instalado). Os novos tipos continuam pertencendo aos mesmos grupos do DTYPES_DICT.
+        :param category_ratio: Proporção máxima de valores distintos (em relação ao número de linhas) para que uma
+            coluna de texto seja convertida para category.
+        :return: Dicionário com o uso de memória antes e depois da otimização, em bytes ("before" e "after"), e os
+            tipos antigo e novo de cada coluna convertida ("columns").
+        """
+        before = int(self.gdf.memory_usage(deep=True).sum())
+        converted = {}
+        for col in self.gdf.columns:
+            old_dtype = self.gdf[col].dtype
+            new_values = optimize_column_dtype(self.gdf[col], category_ratio)
+            if new_values is not None:
+                self.gdf[col] = new_values
+                converted[col] = (str(old_dtype), str(new_values.dtype))
+        self.invalidate_column_cache(list(converted))
+        self.recipe.record("optimize_dtypes", category_ratio=category_ratio)
+        after = int(self.gdf.memory_usage(deep=True).sum())
+        return {"before": before, "after": after, "columns": converted}
 
     def filter_dms_coordinates_columns(self):
         """
@@ -181,45 +988,29 @@ class DataHandler:
         de colunas válidas para x (longitude) e y (latitude).
         :return: Listas contendo os rótulos das colunas válidas para x e y, respectivamente.
         """
-        y_pattern = re.compile(r"^(\d{1,2})([°º])(\d{1,2})(['’′])(\d{1,2}([.,]\d+)?)([\"”″])([NSns])$")
-        x_pattern = re.compile(r"^(\d{1,3})([°º])(\d{1,2})(['’′])(\d{1,2}([.,]\d+)?)([\"”″])([EWOLewol])$")
-        x_columns, y_columns = [], []
-
-        for c in self.gdf.columns:
-            rows = self.gdf[c].values
-            x_ok, y_ok = True, True
-
-            for value in rows:
-                value = str(value).replace(" ", "")
-                if x_pattern.match(value) is None:
-                    x_ok = False
-                if y_pattern.match(value) is None:
-                    y_ok = False
-
-                if not x_ok and not y_ok:
-                    continue
-
-                parts = re.split(r'[^\d\w]+', value)
-                degrees = int(parts[0])
-                minutes = int(parts[1])
-                seconds = float(f"{parts[2]}.{parts[3]}" if parts[3].isdigit() else parts[2])
-
-                if degrees > 180:
-                    x_ok = False
-                    y_ok = False
-                elif degrees > 90:
-                    y_ok = False
-
-                if minutes > 60 or seconds > 60:
-                    x_ok, y_ok = False, False
-
-            if x_ok:
-                x_columns.append(c)
-            if y_ok:
-                y_columns.append(c)
-
+        x_columns = [c for c in self.gdf.columns if self.is_dms_coordinates_column(c, "x")]
+        y_columns = [c for c in self.gdf.columns if self.is_dms_coordinates_column(c, "y")]
         return x_columns, y_columns
 
+    def is_dms_coordinates_column(self, column: str, axis: str, gdf: geopandas.GeoDataFrame | None = None) -> bool:
+        """
+        Verifica se todos os valores de uma coluna são coordenadas válidas em formato GMS. O resultado fica guardado no
+        perfil da coluna.
+        :param column: O rótulo da coluna.
+        :param axis: "x" (longitude) ou "y" (latitude).
+        :param gdf: O GeoDataFrame que contém a coluna. Se None, usa o atributo "gdf" da classe.
+        :return: True se a coluna é válida e False do contrário.
+        """
+        gdf = self.gdf if gdf is None else gdf
+        values = gdf[column]
+        # Colunas numéricas, booleanas, de datas ou de geometria não podem conter coordenadas em GMS
+        if not (pandas.api.types.is_object_dtype(values) or pandas.api.types.is_string_dtype(values)):
+            return False
+        profile = self.get_column_profile(column, gdf)
+        if f"dms_{axis}" not in profile:
+            profile[f"dms_{axis}"] = not parse_dms_coordinates(values, axis)[1].any()
+        return profile[f"dms_{axis}"]
+
     @staticmethod
     def search_coordinates_column_by_name(axis: str, crs_type: str, column_names: list[str]) -> str | None:
         """
@@ -243,7 +1034,8 @@ class DataHandler:
 
         return next((col for col in column_names if str(col).lower() in common_names), None)
 
-    def set_geodataframe_geometry(self, crs_key: str, x_column: str, y_column: str, z_column: str = None, dms: bool = False) -> None:
+    def set_geodataframe_geometry(self, crs_key: str, x_column: str, y_column: str, z_column: str = None, dms: bool = False,
+                                  crs: pyproj.CRS | None = None) -> None:
         """
         Define a geometria e o crs do GeoDataFrame contido no adributo "gdf" da classe. Também define os atributos
         "crs_key", "x_column", "y_column" e "z_column" da classe com base nos parâmetros dados.
@@ -252,104 +1044,294 @@ class DataHandler:
         :param y_column: O rótulo da coluna que contém as coordenadas do eixo Y.
         :param z_column: O rótulo da coluna que contém as coordenadas do eixo Z.
         :param dms: True caso as coordenadas estejam em formato Graus, Minutos e Segundos. Do contrário, False.
+        :param crs: O pyproj.CRS de crs_key, já criado. Se None, é obtido do atributo "projection_cache". A interface
+            cria o SRC na sua própria thread, pois criá-lo nas threads do QThreadPool pode derrubar o aplicativo.
         """
-        crs = pyproj.CRS.from_authority(CRS_DICT[crs_key]["auth_name"], CRS_DICT[crs_key]["code"])
-
-        if dms:
-            x, y = self.convert_dms_to_decimal(x_column, y_column)
-        else:
-            x, y = self.gdf[x_column], self.gdf[y_column]
+        if crs is None:
+            crs = self.projection_cache.get_crs(crs_key)
 
-        z = self.gdf[z_column] if z_column is not None else None
-
-        geometry = geopandas.points_from_xy(x, y, z, crs=crs)
+        geometry = points_from_columns(self.gdf, crs, x_column, y_column, z_column, dms)
 
         self.gdf = geopandas.GeoDataFrame(self.gdf, geometry=geometry, crs=crs)
 
         self.x_column, self.y_column, self.z_column = x_column, y_column, z_column
         self.crs_key = crs_key
+        self.recipe.record("set_geodataframe_geometry", crs_key=crs_key, x_column=x_column, y_column=y_column,
+                           z_column=z_column, dms=dms)
+
+    def get_numeric_column(self, column: str) -> numpy.ndarray:
+        """
+        Retorna os valores de uma coluna convertidos para float, aceitando vírgula como separador decimal.
+        :param column: O rótulo da coluna.
+        :return: Array de floats (NaN nas células vazias).
+        """
+        return numeric_column_values(self.gdf, column)
 
-    def convert_dms_to_decimal(self, x_column: str, y_column: str):
+    def convert_dms_to_decimal(self, x_column: str, y_column: str) -> (numpy.ndarray, numpy.ndarray):
         """
         Converte coordenadas em formato GMS contidas em duas colunas distintas do GeoDataFrame para formato decimal.
         :param x_column: A coluna contendo as longitudes em GMS.
         :param y_column: A coluna contendo as latitudes em GMS.
-        :return: Duas listas contendo longitudes e latitudes, respectivamente, em formato decimal.
+        :return: Dois arrays contendo longitudes e latitudes, respectivamente, em formato decimal.
         """
-        x, y = [], []
-        for i, c in enumerate((x_column, y_column)):
-            rows = self.gdf[c].values
-            for value in rows:
-                value = str(value).strip()
-                parts = re.split(r"°|º|'|’|′|\"|”|″|''", value)
-                d, m, s = int(parts[0]), int(parts[1]), float(parts[2].replace(",", "."))
-                direction = parts[3]
+        return dms_column_values(self.gdf, x_column, "x"), dms_column_values(self.gdf, y_column, "y")
 
-                dd = d + (m / 60) + (s / 3600)
-
-                if direction in "SWOswo":
-                    dd *= -1
-
-                if i == 0:
-                    x.append(dd)
-                else:
-                    y.append(dd)
-        return x, y
-
-    def merge_sheets(self, merge_column: str) -> (list[str], list[str]):
+    def merge_sheets(self, merge_column: str, progress=None) -> (list[str], list[str]):
         """
         Mescla múltiplas abas de uma pasta de trabalho do Excel/OpenDocument armazenado no atributo "excel_file" da
         classe, com base em uma coluna de ID. Armazena os novos dados no atributo "gdf", usando os atributos
         "x_column", "y_column" e "crs" para construir a geometria e definir o SRC. Planilhas que não contenham a coluna
         merge_column são ignoradas.
         :param merge_column: A coluna identificadora.
+        :param progress: Função opcional progress(percent, message), chamada antes da leitura de cada planilha.
         :return: Listas contendo os rótulos das colunas que foram e não foram incluídas na mesclagem, respectivamente.
         """
+        previous_state = self.get_state()
         sheets_to_merge, sheets_to_skip = [], []
         sheet_dfs, merge_column_dtypes = [], []
 
-        no_coordinates_mode = True
+        geometry_sheet, geometry, crs = None, None, None
 
         # Itera pelo ExcelFile, convertendo as planilhas para DFs, e verifica se cada uma contém a coluna de mescla
-        for s in self.excel_file.sheet_names:
-            if s == self.excel_file.sheet_names[0]:
+        sheet_names = self.excel_file.sheet_names
+        for i, s in enumerate(sheet_names):
+            if progress is not None:
+                progress(100 * i // len(sheet_names), f"Lendo a planilha {s}...")
+            if s == self.sheet_name:
                 sheet_df = pandas.DataFrame(self.gdf)
-                if "geometry" in sheet_df.columns:
-                    sheet_df = sheet_df.drop(columns=["geometry"])
-                    no_coordinates_mode = False
+                if "geometry" in sheet_df.columns and sheet_df["geometry"].dtype == "geometry":
+                    # A geometria acompanha as linhas da planilha base e é movida para o final depois da mescla
+                    geometry_sheet, crs = s, self.gdf.crs
             else:
-                sheet_df = self.excel_file.parse(sheet_name=s)
+                try:
+                    sheet_df = self.get_parsed_sheet(s)
+                except IndexError:  # Planilha vazia
+                    sheets_to_skip.append(s)
+                    continue
 
             if merge_column in sheet_df.columns:
-                if sheet_df[merge_column].duplicated().any():
-                    raise Exception(f"A coluna {merge_column} possui valores duplicados na planilha {s}.")
                 sheets_to_merge.append(s)
-                sheet_dfs.append(self.process_data(sheet_df))
+                sheet_dfs.append(sheet_df)
                 merge_column_dtypes.append(sheet_df[merge_column].dtype)
             else:
                 sheets_to_skip.append(s)
 
         # Verifica se a coluna de mescla tem o mesmo dtype em todas as abas. Se não tiver, converte todas para string
-        if len(set(merge_column_dtypes)) > 1:
-            for s in sheet_dfs:
-                s[merge_column] = s[merge_column].astype(str)
+        convert_to_str = len(set(merge_column_dtypes)) > 1
+
+        if progress is not None:
+            progress(100, "Mesclando as planilhas...")
+
+        # Indexa cada aba pela coluna de mescla, verificando se os identificadores são únicos
+        indexed_dfs, used_columns = [], {merge_column} if geometry_sheet is None else {merge_column, "geometry"}
+        for s, sheet_df in zip(sheets_to_merge, sheet_dfs):
+            keys = sheet_df[merge_column].astype(str) if convert_to_str else sheet_df[merge_column]
+            index = pandas.Index(keys, name=merge_column)
+            if not index.is_unique:
+                duplicates = index[index.duplicated()].unique()
+                raise Exception(f"A coluna {merge_column} possui valores duplicados na planilha {s}: "
+                                f"{', '.join(map(str, duplicates[:10]))}.")
 
-        # Mescla as abas com base na coluna de mescla selecionada pelo usuário
-        df = sheet_dfs[0]
-        for i in range(1, len(sheet_dfs)):
-            df = pandas.merge(df, sheet_dfs[i], how='outer', on=merge_column)
+            sheet_df = sheet_df.drop(columns=merge_column).set_axis(index, axis="index")
+            if s == geometry_sheet:
+                geometry = sheet_df.pop("geometry")
 
-        # Restaura a ordem correta das colunas
-        cols = df.columns.to_list()
-        cols.remove(merge_column)
-        columns = [merge_column] + cols
-        df = df[columns]
+            # Colunas com o mesmo nome em mais de uma aba recebem o nome da aba como sufixo
+            renamed = {col: f"{col}_{s}" for col in sheet_df.columns if col in used_columns}
+            if renamed:
+                sheet_df = sheet_df.rename(columns=renamed)
+            used_columns.update(sheet_df.columns)
+            indexed_dfs.append(sheet_df)
 
-        self.gdf = geopandas.GeoDataFrame(df, geometry=None if no_coordinates_mode else self.gdf.geometry,
-                                          crs=None if no_coordinates_mode else self.gdf.crs)
+        # Ordem das linhas: identificadores da primeira aba, seguidos dos que aparecem apenas nas abas seguintes
+        keys = indexed_dfs[0].index.append([df.index for df in indexed_dfs[1:]]).unique()
+
+        # Mescla todas as abas de uma só vez, alinhando-as pelo índice
+        df = pandas.concat([sheet_df.reindex(keys) for sheet_df in indexed_dfs], axis="columns", join="outer")
+        df = df.reset_index()
+
+        if geometry is not None:
+            df["geometry"] = geometry.reindex(keys).values
+            self.gdf = geopandas.GeoDataFrame(df, geometry="geometry", crs=crs)
+        else:
+            self.gdf = geopandas.GeoDataFrame(df)
+        self.invalidate_column_cache()
+        self.history.push(f"Mesclar planilhas pela coluna {merge_column}", previous_state, None)
+        self.recipe.record("merge_sheets", merge_column=merge_column)
 
         return sheets_to_merge, sheets_to_skip
 
+    def rank_datetime_formats(self, column: str, sample_size: int = DATETIME_SAMPLE_SIZE) -> list[tuple[str, float]]:
+        """
+        Testa todos os formatos do DATETIME_FORMATS em uma amostra aleatória dos valores preenchidos de uma coluna e os
+        ordena pela proporção de valores que cada um consegue converter.
+        :param column: O rótulo da coluna.
+        :param sample_size: Número máximo de valores testados.
+        :return: Lista de tuplas (chave do formato, proporção de valores convertidos), do melhor para o pior formato.
+        """
+        values = self.gdf[column].dropna()
+        if len(values.index) > sample_size:
+            values = values.sample(sample_size, random_state=0)
+        if len(values.index) == 0:
+            return [(key, 1.0) for key in DATETIME_FORMATS]
+
+        ranking = [(key, float(pandas.to_datetime(values, format=fmt, errors="coerce").notna().mean()))
+                   for key, fmt in DATETIME_FORMATS.items()]
+        return sorted(ranking, key=lambda item: item[1], reverse=True)
+
+    def parse_datetime_column(self, column: str, datetime_format: str, errors: str = "raise") -> pandas.Series:
+        """
+        Converte os valores de uma coluna para data e hora em uma única passada, sem alterar o GeoDataFrame.
+        :param column: O rótulo da coluna.
+        :param datetime_format: A chave do formato no DATETIME_FORMATS. Ex: "DD/MM/YYYY".
+        :param errors: "raise" para levantar DatetimeConversionError caso algum valor não corresponda ao formato ou
+            "coerce" para deixar esses valores vazios.
+        :return: A coluna convertida.
+        """
+        return parse_datetime_values(self.gdf[column], column, datetime_format, errors)
+
+    def get_value_counts(self, column: str) -> (pandas.Series, int):
+        """
+        Retorna os valores únicos de uma coluna e o número de ocorrências de cada um. A contagem é feita uma única vez
+        e guardada no atributo "value_counts" até que a coluna seja alterada.
+        :param column: O rótulo da coluna.
+        :return: Uma Series com os valores únicos no índice e as contagens, ordenada da maior para a menor contagem, e
+            o número de células vazias/nulas da coluna.
+        """
+        cached = self.value_counts.get(column)
+        if cached is None:
+            values = self.gdf[column]
+            counts = values.value_counts(dropna=True, sort=True)
+            if isinstance(values.dtype, pandas.CategoricalDtype):
+                counts = counts[counts > 0]  # Categorias que não aparecem na coluna
+            cached = counts, int(values.isna().sum())
+            self.value_counts[column] = cached
+        return cached
+
+    def factorize_column(self, column: str) -> (numpy.ndarray, list[str]):
+        """
+        Codifica uma coluna em uma única passada, atribuindo um código inteiro a cada valor distinto (-1 para células
+        vazias). Os códigos da última coluna codificada ficam guardados até que ela seja alterada, para que a mesma
+        codificação sirva para preencher as opções da interface e para converter a coluna em seguida.
+        :param column: O rótulo da coluna.
+        :return: O array de códigos de cada linha e a lista de rótulos (valores distintos como texto) de cada código.
+        """
+        if self.factorized_column is None or self.factorized_column[0] != column:
+            codes, uniques = pandas.factorize(self.gdf[column], use_na_sentinel=True)
+            self.factorized_column = (column, codes, [str(value) for value in uniques])
+        return self.factorized_column[1], self.factorized_column[2]
+
+    def invalidate_column_cache(self, columns: list[str] | None = None) -> None:
+        """
+        Descarta os perfis e as contagens de valores guardados para as colunas alteradas.
+        :param columns: Rótulos das colunas alteradas. None para descartar os dados de todas as colunas.
+        :return: Nada.
+        """
+        if columns is None:
+            with self.cache_lock:
+                self.column_profiles.clear()
+            self.value_counts.clear()
+            self.factorized_column = None
+            return
+        with self.cache_lock:
+            for col in columns:
+                self.column_profiles.pop(col, None)
+        for col in columns:
+            self.value_counts.pop(col, None)
+        if self.factorized_column is not None and self.factorized_column[0] in columns:
+            self.factorized_column = None
+
+    def get_state(self, columns: list[str] = ()) -> dict:
+        """
+        Retorna o estado atual dos dados para o histórico de edições. O GeoDataFrame é guardado como uma cópia rasa,
+        que só passa a ocupar memória própria nas colunas que forem substituídas depois. As colunas que a edição vai
+        alterar no próprio lugar (ex: com gdf.loc) recebem cópias no GeoDataFrame atual, para que a edição não altere os
+        arrays compartilhados com os estados guardados e com o cache de planilhas.
+        :param columns: As colunas que a edição vai alterar sem substituí-las.
+        :return: Dicionário com o GeoDataFrame, o SRC, as colunas de coordenadas e a receita.
+        """
+        state = {"gdf": None if self.gdf is None else self.gdf.copy(deep=False), "crs_key": self.crs_key,
+                 "x_column": self.x_column, "y_column": self.y_column, "z_column": self.z_column,
+                 "recipe": self.recipe.copy()}
+        for column in columns:
+            self.gdf[column] = self.gdf[column].copy(deep=True)
+        return state
+
+    def set_state(self, state: dict) -> None:
+        """
+        Restaura um estado retornado por get_state.
+        :param state: O estado.
+        :return: Nada.
+        """
+        self.gdf = state["gdf"]
+        self.crs_key, self.x_column, self.y_column, self.z_column = (
+            state["crs_key"], state["x_column"], state["y_column"], state["z_column"]
+        )
+        self.recipe = state["recipe"].copy()
+        self.invalidate_column_cache()
+
+    def undo(self) -> str | None:
+        """
+        Desfaz a última edição do GeoDataFrame (renomear, excluir, converter, mesclar ou reprojetar).
+        :return: A descrição da edição desfeita ou None, caso não haja o que desfazer.
+        """
+        step = self.history.undo(self.get_state())
+        if step is None:
+            return None
+        description, state = step
+        self.set_state(state)
+        return description
+
+    def redo(self) -> str | None:
+        """
+        Refaz a última edição desfeita.
+        :return: A descrição da edição refeita ou None, caso não haja o que refazer.
+        """
+        step = self.history.redo(self.get_state())
+        if step is None:
+            return None
+        description, state = step
+        self.set_state(state)
+        return description
+
+    def rename_column(self, column: str, new_name: str) -> None:
+        """
+        Renomeia uma coluna do GeoDataFrame, mantendo o perfil e a contagem de valores já calculados.
+        :param column: O rótulo atual da coluna.
+        :param new_name: O novo rótulo.
+        :return: Nada.
+        """
+        if new_name in self.gdf.columns:
+            raise ValueError("O nome inserido já está sendo utilizado por outra coluna do GeoDataFrame.")
+        previous_state = self.get_state()
+        self.gdf.rename(columns={column: new_name}, inplace=True)
+        self.history.push(f"Renomear a coluna {column} para {new_name}", previous_state, [])
+        self.recipe.record("rename_column", column=column, new_name=new_name)
+
+        for cache in (self.column_profiles, self.value_counts):
+            if column in cache:
+                cache[new_name] = cache.pop(column)
+        if self.factorized_column is not None and self.factorized_column[0] == column:
+            self.factorized_column = (new_name, *self.factorized_column[1:])
+        for attribute in ("x_column", "y_column", "z_column"):
+            if getattr(self, attribute) == column:
+                setattr(self, attribute, new_name)
+
+    def delete_column(self, column: str) -> None:
+        """
+        Exclui uma coluna do GeoDataFrame.
+        :param column: O rótulo da coluna.
+        :return: Nada.
+        """
+        previous_state = self.get_state()
+        self.gdf.drop(columns=[column], inplace=True)
+        self.invalidate_column_cache([column])
+        self.history.push(f"Excluir a coluna {column}", previous_state, [column])
+        self.recipe.record("delete_column", column=column)
+        for attribute in ("x_column", "y_column", "z_column"):
+            if getattr(self, attribute) == column:
+                setattr(self, attribute, None)
+
     def change_column_dtype(self, column: str, target_dtype_key: str, **kwargs) -> None:
         """
         Muda o tipo de dado de uma coluna.
@@ -358,66 +1340,993 @@ class DataHandler:
         :kwarg true_key: O valor encontrado na coluna a ser considerado como True (necessário apenas ao converter para Boolean). Ex: "Verdadeiro".
         :kwarg false_key: O valor encontrado na coluna a ser considerado como False (necessário apenas ao converter para Boolean). Ex: "Falso".
         :kwarg datetime_format: O formato de data e hora (necessário apenas ao converter para Datetime)
+        :kwarg errors: "raise" para levantar DatetimeConversionError caso algum valor não corresponda ao formato de data
+            e hora ou "coerce" para deixar esses valores vazios (apenas ao converter para Datetime).
         :return: Nada
         """
-        def switch_to_boolean(c, t, f):
-            t = pandas.NA if t == "<Células vazias>" else t
-            f = pandas.NA if f == "<Células vazias>" else f
-            if not self.gdf[c].astype("string").isin((t, f)).all():
-                raise ValueError(f"A coluna deve conter apenas os valores indicados para verdadeiro e falso ({t} e {f}).")
-            if str(t) == "<Nenhum>":
-                self.gdf[c] = self.gdf[c].astype("string").map({t: False, f: False}).astype(bool)
-            elif str(f) == "<Nenhum>":
-                self.gdf[c] = self.gdf[c].astype("string").map({t: True, f: True}).astype(bool)
-            else:
-                self.gdf[c] = self.gdf[c].astype("string").map({t: True, f: False}).astype(bool)
+        self._change_column_dtypes([(column, target_dtype_key, kwargs)],
+                                   f"Converter a coluna {column} para {target_dtype_key}")
+        self.recipe.record("change_column_dtype", column=column, target_dtype_key=target_dtype_key, **kwargs)
 
+    def change_column_dtypes(self, conversions: list) -> None:
+        """
+        Muda o tipo de dado de várias colunas em um único passo do histórico. As conversões de uma mesma coluna são
+        aplicadas em sequência sobre os valores já convertidos, e o GeoDataFrame só é alterado ao final, quando todas
+        tiverem dado certo. É o passo que substitui sequências de change_column_dtype nas receitas otimizadas.
+        :param conversions: Lista de (coluna, tipo de dado de destino, dicionário com os kwargs de change_column_dtype).
+        :return: Nada.
+        """
+        columns = list(dict.fromkeys(column for column, _, _ in conversions))
+        self._change_column_dtypes(conversions, f"Converter as colunas {', '.join(map(str, columns))}")
+        self.recipe.record("change_column_dtypes", conversions=[list(conversion) for conversion in conversions])
+
+    def _change_column_dtypes(self, conversions: list, description: str) -> None:
+        previous_state = self.get_state()
+        new_values = {}
+        for column, target_dtype_key, options in conversions:
+            new_values[column] = self.convert_column_values(column, target_dtype_key, new_values.get(column),
+                                                            **options)
+        for column, values in new_values.items():
+            self.gdf[column] = values
+        self.invalidate_column_cache(list(new_values))
+        self.history.push(description, previous_state, list(new_values))
+
+    def convert_column_values(self, column: str, target_dtype_key: str, values: pandas.Series | None = None,
+                              **kwargs) -> pandas.Series:
+        """
+        Converte os valores de uma coluna para outro tipo de dado, sem alterar o GeoDataFrame. Ver change_column_dtype.
+        :param column: O rótulo da coluna.
+        :param target_dtype_key: O tipo de dado de destino (String, Integer, Float, Boolean ou Datetime).
+        :param values: Valores da coluna já convertidos por uma conversão anterior. None para usar os do GeoDataFrame.
+        :return: Os valores convertidos.
+        """
         if target_dtype_key == "Boolean":
-            true, false = kwargs.get("true_key", "Sim"), kwargs.get("false_key", "Não")
-            switch_to_boolean(column, true, false)
-        elif target_dtype_key == "Datetime":
-            datetime_format = kwargs.get("datetime_format", "DD-MM-YYYY")
-            self.gdf[column] = pandas.to_datetime(self.gdf[column], format=DATETIME_FORMATS[datetime_format], errors="raise")
-        else:
-            target_dtype = DTYPES_DICT[target_dtype_key]["pandas_dtypes"][0]
-            self.gdf[column] = self.gdf[column].astype(target_dtype, errors="raise")
+            if values is None:
+                codes, labels = self.factorize_column(column)
+            else:
+                codes, uniques = pandas.factorize(values, use_na_sentinel=True)
+                labels = [str(value) for value in uniques]
+            booleans = boolean_values(codes, labels, kwargs.get("true_key", "Sim"), kwargs.get("false_key", "Não"))
+            return pandas.Series(booleans, index=self.gdf.index, name=column)
 
-    def reproject_geodataframe(self, target_crs_key: str) -> None:
+        values = self.gdf[column] if values is None else values
+        if target_dtype_key == "Datetime":
+            return parse_datetime_values(values, column, kwargs.get("datetime_format", "DD-MM-YYYY"),
+                                         kwargs.get("errors", "raise"))
+        return values.astype(DTYPES_DICT[target_dtype_key]["pandas_dtypes"][0], errors="raise")
+
+    def reproject_geodataframe(self, target_crs_key: str, x_column: str | None = None, y_column: str | None = None,
+                               z_column: str | None = None, max_workers: int | None = None, progress=None,
+                               target_crs: pyproj.CRS | None = None) -> None:
         """
-        Reprojeta o GeoDataFrame para um SRC de destino.
+        Reprojeta o GeoDataFrame para um SRC de destino. As coordenadas são extraídas das geometrias de uma só vez e
+        transformadas em partes de REPROJECTION_CHUNK_SIZE pontos, distribuídas entre threads. Opcionalmente, grava as
+        novas coordenadas em colunas, a partir dos mesmos arrays usados para criar as geometrias.
         :param target_crs_key: A chave para o dicionário de SRCs (CRS_DICT) do SRC de destino, no formato "name (auth:code)". Ex: "SIRGAS 2000 (EPSG:4674)".
+        :param x_column: Nome da coluna onde as coordenadas X reprojetadas serão gravadas. None para não gravar.
+        :param y_column: Nome da coluna onde as coordenadas Y reprojetadas serão gravadas. None para não gravar.
+        :param z_column: Nome da coluna onde as coordenadas Z reprojetadas serão gravadas (apenas para SRCs geográficos 3D). None para não gravar.
+        :param max_workers: Número máximo de threads. Se None, usa o padrão do ThreadPoolExecutor.
+        :param progress: Função opcional progress(percent, message), chamada a cada parte reprojetada.
+        :param target_crs: O pyproj.CRS de target_crs_key, já criado. Se None, é obtido do atributo "projection_cache"
+            (ver set_geodataframe_geometry).
         :return: Nada
         """
-        target_crs = pyproj.CRS.from_authority(CRS_DICT[target_crs_key]["auth_name"], CRS_DICT[target_crs_key]["code"])
-        self.gdf = self.gdf.to_crs(crs=target_crs)
+        previous_state = self.get_state()
+        if target_crs is None:
+            target_crs = self.projection_cache.get_crs(target_crs_key)
+        source_crs = self.gdf.crs
+        geometries = self.gdf.geometry.values
+        include_z = bool(shapely.has_z(geometries).any())
+
+        # Geometrias nulas ou vazias não têm coordenadas. O índice indica a linha de cada coordenada
+        coordinates, index = shapely.get_coordinates(geometries, include_z=include_z, return_index=True)
+        x = numpy.ascontiguousarray(coordinates[:, 0])
+        y = numpy.ascontiguousarray(coordinates[:, 1])
+        z = numpy.ascontiguousarray(coordinates[:, 2]) if include_z else None
+        del coordinates
+
+        # Se todas as geometrias forem pontos (o caso comum), cada thread também cria os novos pontos da sua parte.
+        # Do contrário, as geometrias são recriadas ao final, a partir das coordenadas transformadas
+        only_points = bool((shapely.get_type_id(geometries[index]) == 0).all())
+        new_geometries = numpy.full(len(geometries), None, dtype=object)
+
+        # Os objetos pyproj.Transformer não podem ser compartilhados entre threads, então cada thread cria o seu
+        thread_data = threading.local()
+
+        def transform_chunk(start):
+            if not hasattr(thread_data, "transformer"):
+                thread_data.transformer = pyproj.Transformer.from_crs(source_crs, target_crs, always_xy=True)
+            chunk = slice(start, start + REPROJECTION_CHUNK_SIZE)
+            thread_data.transformer.transform(x[chunk], y[chunk], None if z is None else z[chunk], inplace=True)
+            if only_points:
+                new_geometries[index[chunk]] = shapely.points(x[chunk], y[chunk], None if z is None else z[chunk])
+
+        starts = range(0, len(x), REPROJECTION_CHUNK_SIZE)
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            futures = [executor.submit(transform_chunk, start) for start in starts]
+            try:
+                for i, future in enumerate(concurrent.futures.as_completed(futures)):
+                    future.result()
+                    if progress is not None:
+                        progress(100 * (i + 1) // len(futures), "Reprojetando os pontos...")
+            except BaseException:
+                # Em caso de erro ou cancelamento, as partes que ainda não começaram não são executadas
+                executor.shutdown(cancel_futures=True)
+                raise
+
+        if not only_points:
+            new_coordinates = numpy.column_stack([x, y] if z is None else [x, y, z])
+            new_geometries = shapely.set_coordinates(numpy.array(geometries, dtype=object), new_coordinates)
+
+        gdf = self.gdf.copy(deep=False)
+        gdf[gdf.geometry.name] = geopandas.array.from_shapely(new_geometries, crs=target_crs)
+
+        # Grava as coordenadas em colunas. As linhas sem geometria ficam vazias (NaN)
+        is_3d = CRS_DICT[target_crs_key]["type"] == "Geographic 3D CRS"
+        coordinate_columns = []
+        for column, values in ((x_column, x), (y_column, y), (z_column, z if is_3d else None)):
+            if column is not None and values is not None:
+                column_values = numpy.full(len(gdf.index), numpy.nan)
+                column_values[index] = values
+                gdf[column] = column_values
+                coordinate_columns.append(column)
+
+        # Reordena as colunas para que a geometria fique no final
+        if x_column is not None or y_column is not None:
+            geometry_name = gdf.geometry.name
+            gdf = gdf[[col for col in gdf.columns if col != geometry_name] + [geometry_name]]
+
+        self.gdf = gdf
         self.crs_key = target_crs_key
+        self.invalidate_column_cache(coordinate_columns)
+        self.history.push(f"Reprojetar para {target_crs_key}", previous_state, [gdf.geometry.name, *coordinate_columns])
+        self.recipe.record("reproject_geodataframe", target_crs_key=target_crs_key, x_column=x_column,
+                           y_column=y_column, z_column=z_column)
 
-    def export_geodataframe(self, path: str, layer_name: str = "pontos"):
+    def export_geodataframe(self, path: str, layer_name: str = "pontos", spatial_index: str = "write",
+                            compression: str = "snappy", row_group_size: int | None = None, progress=None) -> dict:
         """
-        Exporta o GeoDataFrame armazenado no atributo "gdf" da classe para um arquivo vetorial ou tabela.
+        Exporta o GeoDataFrame armazenado no atributo "gdf" da classe para um arquivo vetorial ou tabela. Um relatório
+        da exportação é guardado no atributo "last_export_report".
         :param path: Caminho do arquivo de saída.
         :param layer_name: Nome da camada (para arquivos geopackage).
-        :return: Nada
+        :param spatial_index: Quando criar o índice espacial de arquivos geopackage (uma das chaves do
+            SPATIAL_INDEX_MODES): "write" (durante a gravação), "after" (após a gravação) ou "none" (não criar).
+        :param compression: O algoritmo de compressão de arquivos Parquet (um dos PARQUET_COMPRESSIONS).
+        :param row_group_size: Número de linhas de cada grupo de linhas (row group) de arquivos Parquet. Se None, usa
+            o padrão do pyarrow.
+        :param progress: Função opcional progress(percent, message), chamada antes da gravação de cada lote de linhas
+            (ver export_dataframe).
+        :return: Dicionário com o caminho, o formato, o motor de gravação, o número de linhas e o tempo gasto (s).
+        """
+        self.last_export_report = export_dataframe(self.gdf, path, layer_name, spatial_index, compression,
+                                                   row_group_size, progress)
+        self.recipe.record("export_geodataframe", path=path, layer_name=layer_name, spatial_index=spatial_index,
+                           compression=compression, row_group_size=row_group_size)
+        return self.last_export_report
+
+    def export_geodataframes(self, paths: list[str], layer_name: str = "pontos", spatial_index: str = "write",
+                             compression: str = "snappy", row_group_size: int | None = None,
+                             max_workers: int | None = None, progress=None) -> list[dict]:
+        """
+        Exporta o GeoDataFrame para vários arquivos (ex: GPKG, Shapefile, GeoJSON e CSV) ao mesmo tempo, cada um em uma
+        thread. Todas as threads leem a mesma cópia rasa do GeoDataFrame, que não é alterada durante a exportação.
+        :param paths: Caminhos dos arquivos de saída.
+        :param layer_name: Nome da camada (para arquivos geopackage).
+        :param spatial_index: Quando criar o índice espacial de arquivos geopackage (uma das chaves do SPATIAL_INDEX_MODES).
+        :param compression: O algoritmo de compressão de arquivos Parquet (um dos PARQUET_COMPRESSIONS).
+        :param row_group_size: Número de linhas de cada grupo de linhas de arquivos Parquet.
+        :param max_workers: Número máximo de arquivos gravados ao mesmo tempo. Se None, grava ao mesmo tempo até um
+            arquivo por processador.
+        :param progress: Função opcional progress(percent, message), chamada pelas threads antes da gravação de cada
+            lote de linhas. Caso ela levante uma exceção (ex: cancelamento pela interface), os arquivos que ainda não
+            começaram a ser gravados são descartados e a exceção é levantada novamente ao final.
+        :return: Lista com os relatórios de cada arquivo (ver export_geodataframe), na ordem de paths. Os relatórios
+            também contêm a chave "error", com a mensagem de erro caso a gravação do arquivo tenha falhado.
+        """
+        if not paths:
+            return []
+        snapshot = self.gdf.copy(deep=False)
+        file_progress, interruptions = None, []
+        if progress is not None:
+            file_progress, interruptions = interruptible(lambda percent, message: progress(-1, message))
+        with concurrent.futures.ThreadPoolExecutor(max_workers or min(len(paths), os.cpu_count() or 1)) as executor:
+            futures = [
+                executor.submit(export_dataframe, snapshot, path, layer_name, spatial_index, compression, row_group_size,
+                                file_progress)
+                for path in paths
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                if interruptions:
+                    executor.shutdown(cancel_futures=True)
+                    break
+        if interruptions:
+            raise interruptions[0]
+
+        reports = []
+        for path, future in zip(paths, futures):
+            try:
+                report = {**future.result(), "error": None}
+            except Exception as error:
+                report = {"path": path, "format": os.path.splitext(path)[1].lower(), "engine": None, "rows": 0,
+                          "seconds": None, "error": str(error)}
+            reports.append(report)
+        self.recipe.record("export_geodataframes", paths=list(paths), layer_name=layer_name,
+                           spatial_index=spatial_index, compression=compression, row_group_size=row_group_size)
+        return reports
+
+    def run_recipe(self, recipe: Recipe, input_path: str | None = None, output_paths: list[str] | None = None,
+                   progress=None) -> list[dict]:
         """
-        if path.endswith(".shp"):
-            unsupported_dtypes = ("category", "timedelta64[ns]", "datetime64[ns]", "<M8[ns]", ">M8[ns]")
+        Reaplica uma receita, em geral a outra tabela com a mesma estrutura. A receita é otimizada antes (ver
+        Recipe.optimized) e executada de uma só vez, sem guardar o histórico de edições.
+        :param recipe: A receita.
+        :param input_path: Caminho da tabela a ser lida no lugar da tabela original da receita. None para manter.
+        :param output_paths: Caminhos dos arquivos de saída no lugar dos da última exportação da receita. None para manter.
+        :param progress: Função opcional progress(percent, message), chamada antes de cada passo.
+        :return: Lista com os relatórios dos arquivos exportados (ver export_geodataframes).
+        """
+        steps = recipe.with_paths(input_path, output_paths).optimized().steps
+        memory_budget, self.history.memory_budget = self.history.memory_budget, 0
+        reports = []
+        try:
+            for i, step in enumerate(steps):
+                if progress is not None:
+                    progress(100 * i // len(steps), f"Passo {i + 1} de {len(steps)}: {step['operation']}...")
+                result = getattr(self, step["operation"])(**step["params"])
+                if step["operation"] == "export_geodataframe":
+                    reports.append({**result, "error": None})
+                elif step["operation"] == "export_geodataframes":
+                    reports.extend(result)
+        finally:
+            self.history.memory_budget = memory_budget
+        return reports
+
+
+def export_dataframe(gdf: geopandas.GeoDataFrame, path: str, layer_name: str = "pontos", spatial_index: str = "write",
+                     compression: str = "snappy", row_group_size: int | None = None, progress=None) -> dict:
+    """
+    Grava um GeoDataFrame em um arquivo vetorial ou tabela, sem alterá-lo. Ver DataHandler.export_geodataframe.
+    :param gdf: O GeoDataFrame.
+    :param path: Caminho do arquivo de saída.
+    :param layer_name: Nome da camada (para arquivos geopackage).
+    :param spatial_index: Quando criar o índice espacial de arquivos geopackage (uma das chaves do SPATIAL_INDEX_MODES).
+    :param compression: O algoritmo de compressão de arquivos Parquet (um dos PARQUET_COMPRESSIONS).
+    :param row_group_size: Número de linhas de cada grupo de linhas de arquivos Parquet. Se None, usa o padrão do pyarrow.
+    :param progress: Função opcional progress(percent, message), chamada antes da gravação de cada lote de
+        EXPORT_BATCH_SIZE linhas (CSV e arquivos vetoriais gravados via Arrow) ou uma única vez (demais formatos). Caso
+        ela levante uma exceção (ex: cancelamento pela interface), a gravação é interrompida e o arquivo incompleto é
+        excluído, se ele ainda não existia.
+    :return: Dicionário com o caminho, o formato, o motor de gravação, o número de linhas e o tempo gasto (s).
+    """
+    start = time.perf_counter()
+    stem, extension = os.path.splitext(path)
+    extension = extension.lower()
+    if progress is None:
+        progress = lambda percent, message: None
+    message = f"Gravando {os.path.basename(path)}..."
+
+    # Arquivos criados pela exportação (o Shapefile é gravado em vários arquivos), excluídos caso ela seja interrompida
+    created_paths = [f"{stem}{ext}" for ext in (SHAPEFILE_EXTENSIONS if extension == ".shp" else (extension,))]
+    created_paths = [file_path for file_path in created_paths if not os.path.exists(file_path)]
+    try:
+        engine = _write_dataframe(gdf, path, extension, layer_name, spatial_index, compression, row_group_size,
+                                  progress, message)
+    except BaseException:
+        for file_path in created_paths:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        raise
+
+    return {
+        "path": path,
+        "format": extension,
+        "engine": engine,
+        "rows": len(gdf.index),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def _write_dataframe(gdf: geopandas.GeoDataFrame, path: str, extension: str, layer_name: str, spatial_index: str,
+                     compression: str, row_group_size: int | None, progress, message: str) -> str:
+
+    # As colunas com tipos não suportados pelo formato são convertidas para texto apenas nas partes que estão sendo
+    # gravadas, sem alterar o GeoDataFrame
+    text_columns = get_unsupported_export_columns(gdf, extension)
+
+    if extension == ".csv":
+        for batch_start in range(0, max(len(gdf.index), 1), EXPORT_BATCH_SIZE):
+            progress(100 * batch_start // max(len(gdf.index), 1), message)
+            batch = gdf.iloc[batch_start:batch_start + EXPORT_BATCH_SIZE]
+            pandas.DataFrame(convert_export_batch(batch, text_columns), copy=False).to_csv(
+                path, sep=";", decimal=".", index=False, encoding="utf-8",
+                mode="w" if batch_start == 0 else "a", header=batch_start == 0
+            )
+        engine = "pandas"
+    elif extension == ".xlsx":
+        progress(-1, message)
+        df = pandas.DataFrame(convert_export_batch(gdf, text_columns), copy=False)
+        df.to_excel(path, index=False)
+        engine = "openpyxl"
+    elif extension == ".parquet":
+        if pyarrow is None:
+            raise ImportError("A biblioteca pyarrow é necessária para gravar arquivos Parquet.")
+        if compression not in PARQUET_COMPRESSIONS:
+            raise ValueError(f"Algoritmo de compressão inválido: {compression}.")
+        options = {"compression": None if compression == "none" else compression, "row_group_size": row_group_size}
+        progress(-1, message)
+        df = convert_export_batch(gdf, text_columns)
+        if get_geometry_name(df) is not None:
+            df.to_parquet(path, index=False, **options)  # GeoParquet, com a geometria em WKB
+        else:
+            pyarrow.parquet.write_table(pyarrow.Table.from_pandas(pandas.DataFrame(df), preserve_index=False),
+                                        path, **options)
+        engine = "pyarrow"
+    else:  # Geopackage, GeoJSON e Shapefile
+        engine = write_vector_file(gdf, path, layer_name, spatial_index, text_columns,
+                                   lambda percent: progress(percent, message))
+    return engine
+
+
+def select_excel_engine(path: str, engine: str = "auto") -> str:
+    """
+    Escolhe o leitor de planilhas para um arquivo.
+    :param path: Caminho do arquivo.
+    :param engine: Uma das chaves do EXCEL_ENGINES ou "auto" para usar o leitor mais rápido instalado que suporte o formato.
+    :return: A chave do leitor no EXCEL_ENGINES.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    available = get_available_excel_engines(extension)
+    if engine == "auto":
+        if not available:
+            raise ValueError(f"Nenhum leitor instalado suporta arquivos {extension}.")
+        return available[0]
+    if engine not in available:
+        raise ValueError(f"O leitor {engine} não está instalado ou não suporta arquivos {extension}.")
+    return engine
+
+
+def get_available_excel_engines(extension: str) -> list[str]:
+    """
+    :param extension: A extensão do arquivo. Ex: ".xlsx".
+    :return: Lista com as chaves dos leitores instalados que suportam a extensão, em ordem de preferência.
+    """
+    return [
+        engine for engine, info in EXCEL_ENGINES.items()
+        if extension in info["extensions"] and importlib.util.find_spec(info["module"]) is not None
+    ]
+
+
+def open_workbook(path: str, engine: str) -> pandas.ExcelFile:
+    """
+    Abre uma pasta de trabalho do Excel/OpenDocument com o leitor escolhido.
+    :param path: Caminho do arquivo.
+    :param engine: A chave do leitor no EXCEL_ENGINES.
+    :return: A pasta de trabalho (pandas.ExcelFile).
+    """
+    return pandas.ExcelFile(path, engine=engine)
+
+
+def resolve_sheet_name(sheet: str | int, sheet_names: list[str]) -> str:
+    """
+    Encontra uma planilha pelo nome ou pelo índice. Textos numéricos (ex: "2" na linha de comando) são usados como
+    índice apenas quando não há uma planilha com esse nome (ex: "2024").
+    :param sheet: O nome (str) ou índice (int ou texto numérico) da planilha.
+    :param sheet_names: Os nomes das planilhas da pasta de trabalho, em ordem.
+    :return: O nome da planilha.
+    """
+    if isinstance(sheet, str) and sheet in sheet_names:
+        return sheet
+    if isinstance(sheet, int) or sheet.isdigit():
+        if int(sheet) < len(sheet_names):
+            return sheet_names[int(sheet)]
+    raise ValueError(f"Planilha não encontrada: {sheet}.")
+
+
+def benchmark_excel_engines(path: str, sheet: str | int = 0) -> dict[str, float]:
+    """
+    Mede o tempo que cada leitor instalado leva para abrir o arquivo e ler uma planilha, para ajudar a escolher o
+    leitor mais rápido para cada formato.
+    :param path: Caminho do arquivo.
+    :param sheet: O nome (str) ou índice (int ou texto numérico) da planilha a ser lida (ver resolve_sheet_name).
+    :return: Dicionário no formato {leitor: tempo em segundos}, do leitor mais rápido ao mais lento.
+    """
+    timings = {}
+    for engine in get_available_excel_engines(os.path.splitext(path)[1].lower()):
+        start = time.perf_counter()
+        workbook = open_workbook(path, engine)
+        try:
+            workbook.parse(sheet_name=resolve_sheet_name(sheet, workbook.sheet_names))
+        finally:
+            workbook.close()
+        timings[engine] = time.perf_counter() - start
+    return dict(sorted(timings.items(), key=lambda item: item[1]))
+
+
+def get_vector_write_engine() -> str:
+    """
+    :return: O motor de gravação de arquivos vetoriais disponível, em ordem de preferência: "pyogrio_arrow" (pyogrio
+        com pyarrow e GDAL 3.8 ou superior), "pyogrio" ou "fiona".
+    """
+    if pyogrio is None:
+        return "fiona"
+    if pyarrow is not None and pyogrio.__gdal_version__ >= (3, 8, 0):
+        return "pyogrio_arrow"
+    return "pyogrio"
+
+
+def write_vector_file(gdf: geopandas.GeoDataFrame, path: str, layer_name: str = "pontos",
+                      spatial_index: str = "write", text_columns: list[str] = (), progress=None) -> str:
+    """
+    Grava um GeoDataFrame em um arquivo vetorial (GPKG, GeoJSON ou Shapefile) usando o motor mais rápido disponível.
+    Via Arrow, as linhas são enviadas ao GDAL em lotes de EXPORT_BATCH_SIZE, dentro de uma única transação.
+    :param gdf: O GeoDataFrame.
+    :param path: Caminho do arquivo de saída.
+    :param layer_name: Nome da camada (para arquivos geopackage).
+    :param spatial_index: Quando criar o índice espacial de arquivos geopackage (uma das chaves do SPATIAL_INDEX_MODES).
+    :param text_columns: Colunas gravadas como texto (ver get_unsupported_export_columns).
+    :param progress: Função opcional progress(percent), chamada antes de cada lote (via Arrow) ou uma única vez (demais
+        motores). Uma exceção levantada por ela interrompe a gravação e é levantada novamente.
+    :return: O motor usado na gravação.
+    """
+    if spatial_index not in SPATIAL_INDEX_MODES:
+        raise ValueError(f"Modo de índice espacial inválido: {spatial_index}.")
+
+    driver = VECTOR_DRIVERS[os.path.splitext(path)[1].lower()]
+    is_gpkg = driver == "GPKG"
+    layer_options = {"SPATIAL_INDEX": "NO" if spatial_index == "none" else "YES"} if is_gpkg else None
+    # O GDAL monta o índice espacial em segundo plano enquanto as linhas são gravadas. No modo "after", ele cria o
+    # índice de uma só vez ao final da camada, a partir da tabela já gravada
+    config_options = {"OGR_GPKG_THREADED_RTREE": "NO"} if is_gpkg and spatial_index == "after" else {}
+
+    engine = get_vector_write_engine()
+    with gdal_config_options(engine, **config_options):
+        if engine == "pyogrio_arrow":
+            geometry_types = gdf.geometry.geom_type.dropna().unique()
+            if len(geometry_types) == 1:
+                geometry_type = geometry_types[0] + (" Z" if gdf.geometry.has_z.any() else "")
+            else:
+                geometry_type = "Unknown"
+            # O GDAL lê os lotes em código nativo e substitui as exceções levantadas durante a leitura por seus próprios
+            # erros. A exceção original (ex: cancelamento pela interface) é guardada e levantada no lugar deles
+            batch_progress, interruptions = interruptible(progress) if progress is not None else (None, [])
+            try:
+                pyogrio.write_arrow(
+                    geodataframe_to_record_batches(gdf, EXPORT_BATCH_SIZE, text_columns, batch_progress), path,
+                    layer=layer_name if is_gpkg else None, driver=driver, geometry_name=gdf.geometry.name,
+                    geometry_type=geometry_type, crs=gdf.crs.to_wkt() if gdf.crs is not None else None,
+                    encoding="UTF-8" if driver == "ESRI Shapefile" else None, layer_options=layer_options
+                )
+            except Exception:
+                if interruptions:
+                    raise interruptions[0]
+                raise
+        else:
+            if progress is not None:
+                progress(-1)
+            # O pyogrio recebe as opções da camada em um dicionário, já o fiona as recebe como parâmetros nomeados
+            options = {}
+            if is_gpkg:
+                options = {"layer_options": layer_options} if engine == "pyogrio" else layer_options
+            convert_export_batch(gdf, text_columns).to_file(filename=path, layer=layer_name if is_gpkg else None,
+                                                            driver=driver, encoding="utf-8", engine=engine, **options)
+
+    return engine
+
+
+_gdal_config_lock = threading.Lock()
+_gdal_config_users = {}
+
+
+@contextlib.contextmanager
+def gdal_config_options(engine: str, **options):
+    """
+    Define opções de configuração do GDAL enquanto o bloco é executado. No fiona, elas valem apenas para a thread
+    atual. No pyogrio, valem para todo o processo, então são restauradas apenas quando a última gravação em andamento
+    que as usa termina (ex: exportação de vários arquivos em paralelo).
+    :param engine: O motor de gravação (ver get_vector_write_engine).
+    :param options: As opções de configuração. Ex: OGR_GPKG_THREADED_RTREE="NO".
+    :return: Nada.
+    """
+    if not options:
+        yield
+        return
+    if engine == "fiona":
+        import fiona
+        with fiona.Env(**options):
+            yield
+        return
+
+    with _gdal_config_lock:
+        for name in options:
+            previous, users = _gdal_config_users.get(name, (pyogrio.get_gdal_config_option(name), 0))
+            _gdal_config_users[name] = (previous, users + 1)
+        pyogrio.set_gdal_config_options(options)
+    try:
+        yield
+    finally:
+        with _gdal_config_lock:
+            for name in options:
+                previous, users = _gdal_config_users.pop(name)
+                if users > 1:
+                    _gdal_config_users[name] = (previous, users - 1)
+                else:
+                    pyogrio.set_gdal_config_options({name: previous})
+
+
+def geodataframe_to_record_batches(gdf: geopandas.GeoDataFrame, batch_size: int, text_columns: list[str] = (),
+                                   progress=None) -> "pyarrow.RecordBatchReader":
+    """
+    Converte um GeoDataFrame para um fluxo de lotes Arrow (geometria em WKB). Cada lote é convertido apenas quando é
+    lido, de modo que a tabela Arrow completa nunca fica na memória.
+    :param gdf: O GeoDataFrame.
+    :param batch_size: Número de linhas de cada lote.
+    :param text_columns: Colunas convertidas para texto em cada lote (ver get_unsupported_export_columns).
+    :param progress: Função opcional progress(percent), chamada antes da conversão de cada lote.
+    :return: Um pyarrow.RecordBatchReader.
+    """
+    def to_arrow(start):
+        if progress is not None:
+            progress(100 * start // max(len(gdf.index), 1))
+        batch = convert_export_batch(gdf.iloc[start:start + batch_size], text_columns)
+        return pyarrow.table(batch.to_arrow(index=False))
+
+    first_table = to_arrow(0)
+    schema = first_table.schema
+
+    def batches():
+        yield from first_table.to_batches()
+        for start in range(batch_size, len(gdf.index), batch_size):
+            # Mantém o esquema do primeiro lote (ex: colunas vazias em um lote e preenchidas em outro)
+            yield from to_arrow(start).cast(schema).to_batches()
+
+    return pyarrow.RecordBatchReader.from_batches(schema, batches())
+
+
+def interruptible(progress) -> (callable, list):
+    """
+    Envolve uma função de progresso guardando as exceções levantadas por ela (ex: TaskCancelled, quando o usuário
+    cancela a tarefa), para que possam ser levantadas novamente depois de passar por código que as substitui ou as
+    guarda (ex: o GDAL ou as threads de um concurrent.futures.Executor).
+    :param progress: A função de progresso.
+    :return: A função envolvida e a lista em que as exceções são guardadas.
+    """
+    interruptions = []
+
+    def wrapper(*args):
+        try:
+            return progress(*args)
+        except BaseException as error:
+            interruptions.append(error)
+            raise
+
+    return wrapper, interruptions
+
+
+def get_unsupported_export_columns(df: pandas.DataFrame, extension: str) -> list[str]:
+    """
+    Lista as colunas cujos tipos de dados não são suportados pelo formato de saída e que, por isso, devem ser gravadas
+    como texto: colunas com valores de tipos misturados, categorias e intervalos de tempo (exceto no Parquet) e datas
+    no formato Shapefile.
+    :param df: O DataFrame a ser exportado.
+    :param extension: A extensão do arquivo de saída. Ex: ".shp".
+    :return: Lista com os rótulos das colunas.
+    """
+    def unsupported(column, dtype):
+        # Colunas de texto misturado com números (ex: 1, "a") não podem ser convertidas para Arrow
+        if pandas.api.types.is_object_dtype(dtype):
+            return pandas.api.types.infer_dtype(df[column], skipna=True).startswith("mixed")
+        if extension == ".parquet":  # O Parquet suporta todos os tipos de dados do pandas
+            return False
+        if isinstance(dtype, pandas.CategoricalDtype) or pandas.api.types.is_timedelta64_dtype(dtype):
+            return True
+        return extension == ".shp" and pandas.api.types.is_datetime64_any_dtype(dtype)
+
+    return [c for c, dtype in df.dtypes.items()
+            if not isinstance(dtype, geopandas.array.GeometryDtype) and unsupported(c, dtype)]
+
+
+def convert_export_batch(df: pandas.DataFrame, text_columns: list[str]) -> pandas.DataFrame:
+    """
+    Monta uma visão de uma parte dos dados para exportação, com as colunas text_columns convertidas para texto. As
+    demais colunas são reaproveitadas sem cópia e o DataFrame original não é alterado.
+    :param df: O DataFrame ou GeoDataFrame (ou uma fatia dele).
+    :param text_columns: Colunas a serem convertidas para texto.
+    :return: O DataFrame ou GeoDataFrame convertido.
+    """
+    if not text_columns:
+        return df
+    # As células vazias continuam vazias, em vez de virarem os textos "nan" ou "NaT"
+    data = {c: (df[c].astype(str).mask(df[c].isna(), None) if c in text_columns else df[c]) for c in df.columns}
+    geometry_name = get_geometry_name(df)
+    if geometry_name is not None:
+        return geopandas.GeoDataFrame(data, geometry=geometry_name, crs=df.crs, copy=False)
+    return pandas.DataFrame(data, copy=False)
+
+
+def get_geometry_name(df: pandas.DataFrame) -> str | None:
+    """
+    :param df: O DataFrame ou GeoDataFrame.
+    :return: O nome da coluna de geometria ativa (que não precisa se chamar "geometry", ex: "geom" em arquivos
+        GeoParquet) ou None, caso o DataFrame não tenha geometria ativa.
+    """
+    if not isinstance(df, geopandas.GeoDataFrame):
+        return None
+    try:
+        return df.geometry.name
+    except AttributeError:  # GeoDataFrame sem geometria ativa (ex: tabela importada sem coordenadas)
+        return None
+
+
+def read_parquet_schema(path: str) -> (list[str], list[str]):
+    """
+    Lê apenas o esquema de um arquivo Parquet, sem carregar os dados.
+    :param path: Caminho do arquivo.
+    :return: Listas com os nomes de todas as colunas e das colunas de geometria (vazia caso não seja um GeoParquet).
+    """
+    schema = pyarrow.parquet.read_schema(path)
+    metadata = schema.metadata or {}
+    geometry_columns = list(json.loads(metadata[b"geo"])["columns"]) if b"geo" in metadata else []
+    # Ignora as colunas criadas pelo pandas para guardar o índice do DataFrame
+    columns = [name for name in schema.names if not name.startswith("__index_level_")]
+    return columns, geometry_columns
+
+
+def get_crs_key(crs: pyproj.CRS) -> str | None:
+    """
+    Encontra a chave do CRS_DICT correspondente a um SRC.
+    :param crs: O SRC.
+    :return: A chave no formato "name (auth:code)" ou None, caso o SRC não tenha código ou não esteja no CRS_DICT.
+    """
+    authority = crs.to_authority()
+    if authority is not None:
+        code = f"{authority[0]}:{authority[1]}"
+        matches = [key for key in CRS_DICT.search(code) if key.upper().endswith(f"({code.upper()})")]
+        if matches:
+            return matches[0]
+
+    # O OGC:CRS84 (longitude, latitude), padrão do GeoParquet, pode vir sem código ou estar fora do catálogo. Ele é
+    # equivalente ao EPSG:4326 a menos da ordem dos eixos, que não importa aqui (as coordenadas são sempre x, y)
+    if crs.is_geographic:
+        for key in LONLAT_CRS_KEYS:
+            if key not in CRS_DICT:
+                continue
+            lonlat_crs = pyproj.CRS.from_authority(CRS_DICT[key]["auth_name"], CRS_DICT[key]["code"])
+            if crs.equals(lonlat_crs, ignore_axis_order=True):
+                return key
+    return None
+
+
+def sniff_csv_format(path: str, decimal: str = ',') -> (str, str):
+    """
+    Identifica o delimitador de células de um arquivo CSV a partir do seu início.
+    :param path: Caminho do arquivo.
+    :param decimal: O separador decimal usado no arquivo.
+    :return: O delimitador de células e o separador decimal a serem usados na leitura.
+    """
+    with open(path, "r") as f:
+        data = f.read(4096)
+    sep = str(csv.Sniffer().sniff(data).delimiter)
+
+    # Retirar isso caso seja implementada alguma seleção manual de separador decimal
+    if sep == ',':
+        decimal = '.'
+
+    return sep, decimal
+
+
+def points_from_columns(df: pandas.DataFrame, crs: pyproj.CRS, x_column: str, y_column: str,
+                        z_column: str | None = None, dms: bool = False) -> geopandas.array.GeometryArray:
+    """
+    Cria a geometria de pontos a partir das colunas de coordenadas de um DataFrame.
+    :param df: O DataFrame.
+    :param crs: O SRC das coordenadas.
+    :param x_column: O rótulo da coluna que contém as coordenadas do eixo X.
+    :param y_column: O rótulo da coluna que contém as coordenadas do eixo Y.
+    :param z_column: O rótulo da coluna que contém as coordenadas do eixo Z.
+    :param dms: True caso as coordenadas estejam em formato Graus, Minutos e Segundos. Do contrário, False.
+    :return: Os pontos (geopandas.array.GeometryArray).
+    """
+    if dms:
+        x, y = dms_column_values(df, x_column, "x"), dms_column_values(df, y_column, "y")
+    else:
+        x, y = numeric_column_values(df, x_column), numeric_column_values(df, y_column)
+
+    z = numeric_column_values(df, z_column) if z_column is not None else None
+
+    return geopandas.points_from_xy(x, y, z, crs=crs)
+
+
+def chunk_schema(df: pandas.DataFrame) -> dict:
+    """
+    Define os tipos de dados de uma conversão em partes a partir da primeira parte. Inteiros e booleanos passam para os
+    tipos anuláveis do pandas (Int64 e boolean), pois as partes seguintes podem ter células vazias nessas colunas.
+    Colunas sem nenhum valor na primeira parte são tratadas como texto, que aceita qualquer valor das partes seguintes.
+    :param df: A primeira parte.
+    :return: Dicionário {coluna: dtype}.
+    """
+    schema = {}
+    for col, dtype in df.dtypes.items():
+        if df[col].isna().all():
+            schema[col] = pandas.StringDtype()
+        elif pandas.api.types.is_bool_dtype(dtype):
+            schema[col] = pandas.BooleanDtype()
+        elif pandas.api.types.is_integer_dtype(dtype):
+            schema[col] = pandas.Int64Dtype()
+        else:
+            schema[col] = dtype
+    return schema
+
+
+def conform_chunk(df: pandas.DataFrame, schema: dict, fixed_schema: bool = True) -> pandas.DataFrame:
+    """
+    Converte as colunas de uma parte de uma conversão em partes para os tipos do schema (ver chunk_schema). Caso os
+    valores de uma coluna não caibam no tipo (ex: decimais em uma coluna de inteiros ou texto em uma coluna numérica),
+    a coluna passa para um tipo mais amplo (float ou texto), que também é usado nas partes seguintes.
+    :param df: A parte.
+    :param schema: Dicionário {coluna: dtype}, atualizado quando uma coluna muda de tipo.
+    :param fixed_schema: True se o formato de saída não permite mudar o tipo de uma coluna depois de gravar a primeira
+        parte (ex: GeoPackage e Parquet). Nesse caso, é levantado um erro no lugar da mudança.
+    :return: A parte convertida.
+    """
+    for col, dtype in schema.items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        try:
+            df[col] = df[col].astype(dtype)
+        except (TypeError, ValueError):
+            both_numeric = pandas.api.types.is_numeric_dtype(dtype) and pandas.api.types.is_numeric_dtype(df[col].dtype)
+            wider_dtype = numpy.dtype(float) if both_numeric and not pandas.api.types.is_bool_dtype(dtype) \
+                else numpy.dtype(object)
+            if fixed_schema:
+                raise ValueError(f"A coluna {col} mudou de tipo ao longo do arquivo ({dtype} no início e "
+                                 f"{df[col].dtype} adiante). Converta o arquivo sem dividi-lo em partes ou para CSV.")
+            schema[col] = wider_dtype
+            df[col] = df[col].astype(wider_dtype)
+    return df
+
+
+def numeric_column_values(df: pandas.DataFrame, column: str) -> numpy.ndarray:
+    """
+    Retorna os valores de uma coluna convertidos para float, aceitando vírgula como separador decimal.
+    :param df: O DataFrame.
+    :param column: O rótulo da coluna.
+    :return: Array de floats (NaN nas células vazias).
+    """
+    values = parse_numeric_column(df[column])
+    if values is None:
+        raise ValueError(f"A coluna {column} possui valores que não são números.")
+    return values
+
+
+def dms_column_values(df: pandas.DataFrame, column: str, axis: str) -> numpy.ndarray:
+    """
+    Retorna as coordenadas em formato GMS de uma coluna convertidas para graus decimais.
+    :param df: O DataFrame.
+    :param column: O rótulo da coluna.
+    :param axis: "x" (longitude) ou "y" (latitude).
+    :return: Array de floats.
+    """
+    decimal, invalid = parse_dms_coordinates(df[column], axis)
+    if invalid.any():
+        rows = df.index[invalid].to_list()
+        raise ValueError(f"A coluna {column} possui coordenadas GMS inválidas nas linhas {rows[:10]}"
+                         f"{' (entre outras)' if len(rows) > 10 else ''}.")
+    return decimal
+
+
+def parse_numeric_column(values: pandas.Series) -> numpy.ndarray | None:
+    """
+    Converte uma coluna para float sem alterá-la, aceitando vírgula como separador decimal em colunas de texto.
+    Colunas booleanas, de datas e de geometria não são consideradas numéricas.
+    :param values: Os valores da coluna.
+    :return: Array de floats (NaN nas células vazias) ou None, caso algum valor não seja um número.
+    """
+    if pandas.api.types.is_bool_dtype(values):
+        return None
+    if pandas.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float, na_value=numpy.nan)
+    if not (pandas.api.types.is_object_dtype(values) or pandas.api.types.is_string_dtype(values)):
+        return None
+
+    text = values.astype("string").str.strip().str.replace(",", ".", regex=False)
+    numbers = pandas.to_numeric(text, errors="coerce")
+    if numbers.isna().sum() != values.isna().sum():
+        return None
+    return numbers.to_numpy(dtype=float, na_value=numpy.nan)
+
+
+def profile_within_bounds(profile: dict, minimum: float, maximum: float) -> bool:
+    """
+    Verifica se os valores de uma coluna estão dentro de um intervalo, usando o perfil calculado por
+    DataHandler.get_column_profile. Colunas numéricas completamente vazias são consideradas válidas.
+    :param profile: O perfil da coluna.
+    :param minimum: O limite inferior do intervalo.
+    :param maximum: O limite superior do intervalo.
+    :return: True se todos os valores estiverem dentro do intervalo e False do contrário.
+    """
+    if not profile["numeric"]:
+        return False
+    if numpy.isnan(profile["min"]):
+        return True
+    return minimum <= profile["min"] and profile["max"] <= maximum
+
+
+def optimize_column_dtype(series: pandas.Series, category_ratio: float = CATEGORY_RATIO) -> pandas.Series | None:
+    """
+    Converte uma coluna para um tipo de dado mais compacto, sem perda de informação (ver DataHandler.optimize_dtypes).
+    :param series: A coluna.
+    :param category_ratio: Proporção máxima de valores distintos para que uma coluna de texto vire category.
+    :return: A coluna convertida ou None, caso não haja um tipo mais compacto.
+    """
+    dtype = series.dtype
+    if pandas.api.types.is_bool_dtype(dtype) or isinstance(dtype, pandas.CategoricalDtype):
+        return None
+
+    if pandas.api.types.is_integer_dtype(dtype) and isinstance(dtype, numpy.dtype):
+        if series.empty:
+            return None
+        downcast = "unsigned" if series.min() >= 0 else "integer"
+        values = pandas.to_numeric(series, downcast=downcast)
+        return values if values.dtype.itemsize < dtype.itemsize else None
+
+    if dtype == "float64":
+        values = series.astype("float32")
+        # Só converte se todos os valores forem representados exatamente em 32 bits
+        lossless = (values.astype("float64") == series) | series.isna()
+        return values if lossless.all() else None
+
+    if pandas.api.types.is_object_dtype(dtype) and pandas.api.types.infer_dtype(series, skipna=True) == "string":
+        if series.nunique(dropna=True) <= category_ratio * len(series.index):
+            return series.astype("category")
+        if pyarrow is not None:
+            return series.astype("string[pyarrow]")
+
+    return None
+
+
+def parse_dms_coordinates(values: pandas.Series, axis: str) -> (numpy.ndarray, numpy.ndarray):
+    """
+    Valida e converte de uma só vez uma coluna de coordenadas em formato GMS (GG°MM'SS,sss"D) para graus decimais.
+    Espaços são ignorados e hemisférios S e W/O resultam em coordenadas negativas. Apenas os valores únicos da coluna
+    são interpretados, usando o pyarrow (quando instalado) para aplicar a expressão regular em código nativo.
+    :param values: Os valores da coluna.
+    :param axis: "x" (longitude, hemisférios E/W/O/L) ou "y" (latitude, hemisférios N/S).
+    :return: Um array com as coordenadas em graus decimais (NaN nas linhas inválidas) e um array booleano indicando as linhas inválidas.
+    """
+    codes, uniques = pandas.factorize(values, use_na_sentinel=True)
+    uniques = pandas.Series(uniques, dtype=object).astype(str).str.replace(" ", "", regex=False)
+
+    if pyarrow is not None:
+        parts = pyarrow.compute.extract_regex(pyarrow.array(uniques.to_numpy(), type=pyarrow.string()), DMS_PATTERNS[axis])
+        parts = {
+            name: pyarrow.compute.struct_field(parts, name) for name in ("degrees", "minutes", "seconds", "hemisphere")
+        }
+        parts["seconds"] = pyarrow.compute.replace_substring(parts["seconds"], ",", ".")
+        degrees, minutes, seconds = (
+            parts[name].cast(pyarrow.float64()).to_numpy(zero_copy_only=False) for name in ("degrees", "minutes", "seconds")
+        )
+        negative = pyarrow.compute.is_in(pyarrow.compute.utf8_upper(parts["hemisphere"]), value_set=pyarrow.array(["S", "W", "O"]))
+        negative = negative.fill_null(False).to_numpy(zero_copy_only=False)
+    else:
+        parts = uniques.str.extract(DMS_PATTERNS[axis])
+        degrees = pandas.to_numeric(parts["degrees"]).to_numpy(dtype=float, na_value=numpy.nan)
+        minutes = pandas.to_numeric(parts["minutes"]).to_numpy(dtype=float, na_value=numpy.nan)
+        seconds = pandas.to_numeric(parts["seconds"].str.replace(",", ".", regex=False)).to_numpy(dtype=float, na_value=numpy.nan)
+        negative = parts["hemisphere"].str.upper().isin(("S", "W", "O")).to_numpy(dtype=bool)
+
+    max_degrees = 180 if axis == "x" else 90
+    with numpy.errstate(invalid="ignore"):
+        invalid = ~((degrees <= max_degrees) & (minutes <= 60) & (seconds <= 60))
+
+    decimal = degrees + (minutes / 60) + (seconds / 3600)
+    decimal[negative] *= -1
+    decimal[invalid] = numpy.nan
+
+    # Distribui os resultados dos valores únicos para todas as linhas. Células vazias são inválidas
+    empty = codes < 0
+    decimal, invalid = decimal[codes], invalid[codes]
+    decimal[empty], invalid[empty] = numpy.nan, True
+
+    return decimal, invalid
+
+
+def sort_row_positions(values: pandas.Series, ascending: bool = True,
+                       rows: numpy.ndarray | None = None) -> numpy.ndarray:
+    """
+    Ordena as linhas de uma coluna sem reordenar o DataFrame, retornando apenas as posições das linhas. Células vazias
+    ficam no final. Colunas com tipos misturados são ordenadas como texto.
+    :param values: Os valores da coluna.
+    :param ascending: True para ordem crescente, False para decrescente.
+    :param rows: Posições das linhas a serem ordenadas (ex: as linhas que passaram em um filtro). None para todas.
+    :return: Array com as posições das linhas (em relação à coluna completa) na nova ordem.
+    """
+    subset = values if rows is None else values.iloc[rows]
+    subset = pandas.Series(subset.to_numpy(), copy=False)
+    try:
+        order = subset.sort_values(ascending=ascending, na_position="last", kind="stable").index.to_numpy()
+    except TypeError:
+        order = subset.sort_values(ascending=ascending, na_position="last", kind="stable",
+                                   key=lambda s: s.astype("string")).index.to_numpy()
+    return order if rows is None else rows[order]
+
+
+def filter_row_positions(values: pandas.Series, text: str) -> numpy.ndarray:
+    """
+    Retorna as posições das linhas de uma coluna que contêm um texto, sem diferenciar maiúsculas e minúsculas.
+    :param values: Os valores da coluna.
+    :param text: O texto procurado.
+    :return: Array com as posições das linhas encontradas.
+    """
+    mask = values.astype("string").str.contains(text, case=False, regex=False, na=False)
+    return numpy.flatnonzero(mask.to_numpy(dtype=bool))
+
+
+def boolean_values(codes: numpy.ndarray, labels: list[str], true_key: str, false_key: str) -> numpy.ndarray:
+    """
+    Converte uma coluna codificada por pandas.factorize para booleanos, por meio de uma tabela com o valor de cada
+    código, sem comparar os valores linha a linha.
+    :param codes: Os códigos de cada linha (-1 nas células vazias).
+    :param labels: Os rótulos (valores distintos como texto) de cada código.
+    :param true_key: O rótulo a ser considerado como True. Ex: "Verdadeiro".
+    :param false_key: O rótulo a ser considerado como False. Ex: "Falso".
+    :return: Array de booleanos.
+    """
+    # O código -1 (células vazias) seleciona o último rótulo. "<Nenhum>" não corresponde a nenhum rótulo
+    labels = numpy.array(labels + ["<Células vazias>"], dtype=object)
+    booleans = numpy.full(len(labels), -1, dtype=numpy.int8)
+    booleans[labels == false_key] = 0
+    booleans[labels == true_key] = 1
+
+    values = booleans[codes]
+    invalid = values < 0
+    if invalid.any():
+        invalid_labels = labels[numpy.unique(codes[invalid])]
+        raise ValueError(f"A coluna deve conter apenas os valores indicados para verdadeiro e falso ({true_key} e "
+                         f"{false_key}). Outros valores encontrados: {', '.join(invalid_labels[:10])}.")
+    return values.astype(bool)
+
+
+def parse_datetime_values(values: pandas.Series, column: str, datetime_format: str,
+                          errors: str = "raise") -> pandas.Series:
+    """
+    Converte valores para data e hora. Ver DataHandler.parse_datetime_column.
+    :param values: Os valores.
+    :param column: O rótulo da coluna (para a mensagem de erro).
+    :param datetime_format: A chave do formato no DATETIME_FORMATS. Ex: "DD/MM/YYYY".
+    :param errors: "raise" para levantar DatetimeConversionError caso algum valor não corresponda ao formato ou
+        "coerce" para deixar esses valores vazios.
+    :return: Os valores convertidos.
+    """
+    converted = pandas.to_datetime(values, format=DATETIME_FORMATS[datetime_format], errors="coerce")
+    failed = converted.isna() & values.notna()
+    if errors == "raise" and failed.any():
+        rows = values.index[failed.to_numpy()].to_list()
+        raise DatetimeConversionError(
+            f"Os valores de {len(rows)} linha(s) da coluna {column} não correspondem ao formato {datetime_format} "
+            f"(linhas {', '.join(map(str, rows[:10]))}{' entre outras' if len(rows) > 10 else ''}).", rows
+        )
+    return converted
+
+
+def estimate_memory_usage(df: pandas.DataFrame, sample_size: int = 1000) -> int:
+    """
+    Estima a memória ocupada por um DataFrame. Colunas numéricas são medidas exatamente. Para colunas de texto e de
+    objetos, o tamanho médio dos valores é medido em uma amostra, para não percorrer todas as linhas.
+    :param df: O DataFrame.
+    :param sample_size: Número de valores medidos em cada coluna de texto ou de objetos.
+    :return: O número estimado de bytes.
+    """
+    total = 0
+    for col in range(len(df.columns)):
+        values = df.iloc[:, col]
+        if pandas.api.types.is_string_dtype(values.dtype) and len(values.index) > sample_size:
+            sample = values.sample(sample_size, random_state=0)
+            total += int(sample.memory_usage(index=False, deep=True) / sample_size * len(values.index))
         else:
-            unsupported_dtypes = ("category", "timedelta64[ns]")
-
-        for c in self.gdf.columns:
-            if self.gdf[c].dtype in unsupported_dtypes:
-                self.gdf[c] = self.gdf[c].astype(str)
-
-        if path.endswith(".gpkg"):
-            self.gdf.to_file(filename=path, layer=layer_name, driver="GPKG", encoding="utf-8")
-        elif path.endswith(".csv"):
-            df = pandas.DataFrame(self.gdf)
-            df.to_csv(path, sep=";", decimal=".", index=False, encoding="utf-8")
-        elif path.endswith(".xlsx"):
-            df = pandas.DataFrame(self.gdf)
-            df.to_excel(path, index=False)
-        else:  # GeoJSON e Shapefile
-            self.gdf.to_file(filename=path, encoding="utf-8")
+            total += int(values.memory_usage(index=False, deep=True))
+    return total
 
 
 def get_dtype_key(value: str) -> str | None:
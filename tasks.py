@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+import threading
+import traceback
+from PyQt6 import QtCore
+from icecream import ic
+
+
+class TaskCancelled(Exception):
+    """ Levantado dentro de uma tarefa quando o usuário cancela a operação. """
+
+
+class TaskSignals(QtCore.QObject):
+    progress = QtCore.pyqtSignal(int, str)  # Porcentagem (-1 para indeterminado), mensagem
+    finished = QtCore.pyqtSignal(object)  # Resultado da função
+    failed = QtCore.pyqtSignal(object)  # Exceção levantada pela função
+    cancelled = QtCore.pyqtSignal()
+
+
+class Task(QtCore.QRunnable):
+    """
+    Executa uma função em uma thread do QThreadPool. A função recebe como primeiro parâmetro uma função progress(percent,
+    message), que informa o progresso à interface e levanta TaskCancelled caso o usuário tenha cancelado a tarefa. Os
+    resultados são entregues à thread da interface pelos sinais do atributo "signals".
+    """
+    def __init__(self, function, *args, **kwargs):
+        super().__init__()
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = TaskSignals()
+        self._cancel_event = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def progress(self, percent: int = -1, message: str = "") -> None:
+        if self._cancel_event.is_set():
+            raise TaskCancelled()
+        self.signals.progress.emit(int(percent), message)
+
+    def run(self) -> None:
+        try:
+            result = self.function(self.progress, *self.args, **self.kwargs)
+        except TaskCancelled:
+            self.signals.cancelled.emit()
+        except Exception as error:
+            ic(traceback.format_exc())
+            self.signals.failed.emit(error)
+        else:
+            self.signals.finished.emit(result)
+
+
+class TaskRunner(QtCore.QObject):
+    """
+    Executa as operações do modelo fora da thread da interface, uma de cada vez, para que a janela continue
+    respondendo durante leituras, mesclagens, reprojeções e exportações de tabelas grandes.
+    """
+    started = QtCore.pyqtSignal(str)  # Descrição da tarefa
+    progress = QtCore.pyqtSignal(int, str)
+    stopped = QtCore.pyqtSignal()  # Emitido quando a tarefa termina, falha ou é cancelada
+
+    def __init__(self, parent: QtCore.QObject = None):
+        super().__init__(parent)
+        self.pool = QtCore.QThreadPool.globalInstance()
+        self.current_task = None
+
+    def is_running(self) -> bool:
+        return self.current_task is not None
+
+    def start(self, description: str, function, *args, on_finished=None, on_failed=None, on_cancelled=None,
+              **kwargs) -> Task:
+        """
+        Inicia uma tarefa.
+        :param description: Descrição da tarefa exibida na interface. Ex: "Exportando pontos...".
+        :param function: A função a ser executada. Recebe a função progress como primeiro parâmetro.
+        :param args: Demais parâmetros da função.
+        :param on_finished: Função chamada na thread da interface com o resultado da função.
+        :param on_failed: Função chamada na thread da interface com a exceção levantada pela função.
+        :param on_cancelled: Função chamada na thread da interface caso a tarefa seja cancelada.
+        :param kwargs: Demais parâmetros nomeados da função.
+        :return: A tarefa.
+        """
+        if self.is_running():
+            raise RuntimeError("Aguarde o término da operação em andamento.")
+
+        task = Task(function, *args, **kwargs)
+        task.signals.progress.connect(self.progress)
+        for signal, callback in ((task.signals.finished, on_finished), (task.signals.failed, on_failed),
+                                 (task.signals.cancelled, on_cancelled)):
+            signal.connect(lambda *result, c=callback: self._task_stopped(c, *result))
+
+        self.current_task = task
+        self.started.emit(description)
+        self.pool.start(task)
+        return task
+
+    def cancel(self) -> None:
+        if self.current_task is not None:
+            self.current_task.cancel()
+
+    def _task_stopped(self, callback, *result) -> None:
+        self.current_task = None
+        self.stopped.emit()
+        if callback is not None:
+            callback(*result)
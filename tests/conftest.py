@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+import os
+import sys
+import time
+import types
+
+import pytest
+
+# Os módulos do aplicativo ficam na raiz do projeto. Os testes da interface rodam sem tela
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def import_controller():
+    # As janelas de gráficos usam a sintaxe de f-strings do Python 3.12. Em versões anteriores, são substituídas por
+    # módulos vazios, pois não participam dos testes
+    for module_name, class_name in (("extensions.stereogram", "StereogramWindow"),
+                                    ("extensions.rose_chart", "RoseChartWindow")):
+        try:
+            __import__(module_name)
+        except SyntaxError:
+            sys.modules[module_name] = types.SimpleNamespace(**{class_name: None})
+    return pytest.importorskip("controller")
+
+
+@pytest.fixture
+def ui(monkeypatch):
+    controller = import_controller()
+    from PyQt6 import QtWidgets
+
+    monkeypatch.chdir(ROOT_DIR)  # Os ícones são lidos a partir da raiz do projeto
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    popups = []
+    monkeypatch.setattr(controller, "show_popup", lambda message, *args, **kwargs: popups.append(message))
+    monkeypatch.setattr(controller, "show_file_dialog",
+                        lambda *args, **kwargs: f"{ROOT_DIR}/exemplo_dados_entrada.xlsx")
+    ui = controller.UIController()
+    yield app, ui, popups
+    ui.stop_candidate_columns_task(wait=True)
+    ui.view.close()
+
+
+def wait_for_tasks(app, ui, timeout=60):
+    deadline = time.monotonic() + timeout
+    while ui.task_runner.is_running() or ui.candidate_columns_pool.activeThreadCount():
+        assert time.monotonic() < deadline, "A tarefa não terminou."
+        app.processEvents()
+        time.sleep(0.01)
+    app.processEvents()
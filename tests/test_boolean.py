@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+import geopandas
+import numpy
+import pandas
+import pytest
+
+import model
+from conftest import import_controller
+
+
+def make_handler(values):
+    handler = model.DataHandler()
+    handler.gdf = geopandas.GeoDataFrame({"aflorante": pandas.Series(values, dtype=object)},
+                                         geometry=geopandas.points_from_xy(range(len(values)), range(len(values))),
+                                         crs="EPSG:4674")
+    return handler
+
+
+def count_factorize_calls(monkeypatch):
+    calls = []
+    factorize = pandas.factorize
+    monkeypatch.setattr(pandas, "factorize", lambda *args, **kwargs: (calls.append(args), factorize(*args, **kwargs))[1])
+    return calls
+
+
+def test_boolean_values():
+    labels = ["Sim", "Não", "Talvez"]
+
+    assert model.boolean_values(numpy.array([0, 1, 1, 0]), labels, "Sim", "Não").tolist() == [True, False, False, True]
+    # As células vazias (código -1) podem ser indicadas como verdadeiro ou falso
+    assert model.boolean_values(numpy.array([0, -1, 0]), labels, "Sim", "<Células vazias>").tolist() == [
+        True, False, True]
+    with pytest.raises(ValueError, match="Outros valores encontrados: Talvez."):
+        model.boolean_values(numpy.array([0, 1, 2, 2]), labels, "Sim", "Não")
+    # Com "<Nenhum>", nenhum valor é considerado falso
+    with pytest.raises(ValueError, match="Outros valores encontrados: <Células vazias>, Não."):
+        model.boolean_values(numpy.array([0, 1, -1]), labels, "Sim", "<Nenhum>")
+
+
+def test_change_column_dtype_to_boolean(monkeypatch):
+    handler = make_handler(["S", "N", "S", "N"])
+    calls = count_factorize_calls(monkeypatch)
+
+    # A codificação usada para preencher as opções da interface é reaproveitada na conversão
+    _, labels = handler.factorize_column("aflorante")
+    handler.change_column_dtype("aflorante", "Boolean", true_key="S", false_key="N")
+
+    assert labels == ["S", "N"]
+    assert len(calls) == 1
+    assert handler.gdf["aflorante"].dtype == bool
+    assert handler.gdf["aflorante"].tolist() == [True, False, True, False]
+    # A codificação guardada é descartada depois que a coluna muda
+    assert handler.factorized_column is None
+    assert handler.recipe.steps[-1]["params"] == {"column": "aflorante", "target_dtype_key": "Boolean",
+                                                  "true_key": "S", "false_key": "N"}
+
+
+def test_change_column_dtype_to_boolean_with_other_values():
+    handler = make_handler(["S", None, "talvez", "S"])
+    original = handler.gdf.copy()
+
+    with pytest.raises(ValueError, match="Outros valores encontrados: <Células vazias>, talvez."):
+        handler.change_column_dtype("aflorante", "Boolean", true_key="S", false_key="N")
+
+    pandas.testing.assert_frame_equal(handler.gdf, original)
+    assert len(handler.recipe) == 0
+
+
+def test_change_numeric_column_dtype_to_boolean():
+    # Os rótulos são os valores como texto, como exibidos nas opções da interface
+    handler = make_handler([1, 0, 1])
+
+    handler.change_column_dtype("aflorante", "Boolean", true_key="1", false_key="0")
+
+    assert handler.gdf["aflorante"].tolist() == [True, False, True]
+
+
+def test_boolean_conversion_dialog(ui, monkeypatch):
+    controller = import_controller()
+    app, ui, popups = ui
+    ui.model = make_handler(["Sim", None, "Sim", None])
+    ui.show_imported_data()
+    calls = count_factorize_calls(monkeypatch)
+    dialogs = []
+    answers = iter(["Sim", "<Células vazias>"])
+
+    def select(message, items, *args, **kwargs):
+        dialogs.append(list(items))
+        return next(answers), True
+
+    monkeypatch.setattr(controller, "show_selection_dialog", select)
+
+    ui.column_dtype_changed(0, "Boolean")
+
+    # As opções são os valores distintos da coluna, seguidos das opções para células vazias e para nenhum valor
+    assert dialogs == [["Sim", "<Células vazias>", "<Nenhum>"]] * 2
+    assert len(calls) == 1
+    assert popups == []
+    assert ui.model.gdf["aflorante"].tolist() == [True, False, True, False]
+    assert ui.view.columns_model.columns[0] == "aflorante"
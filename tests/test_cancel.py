@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+import os
+import time
+
+import geopandas
+import pandas
+import pytest
+import shapely
+
+import model
+from tasks import Task
+
+
+class Cancelled(Exception):
+    pass
+
+
+def make_handler(rows=6):
+    handler = model.DataHandler()
+    handler.gdf = geopandas.GeoDataFrame({"codigo": [f"P{i}" for i in range(rows)]},
+                                         geometry=geopandas.points_from_xy(range(rows), range(rows)), crs="EPSG:4674")
+    handler.crs_key = "SIRGAS 2000 (EPSG:4674)"
+    return handler
+
+
+def cancel_after(calls):
+    # Simula o usuário cancelando a tarefa depois de algumas chamadas de progress
+    messages = []
+
+    def progress(percent, message):
+        messages.append(message)
+        if len(messages) > calls:
+            raise Cancelled()
+
+    return progress, messages
+
+
+@pytest.mark.parametrize("extension", [".gpkg", ".shp", ".csv"])
+def test_cancel_export_between_batches(tmp_path, monkeypatch, extension):
+    monkeypatch.setattr(model, "EXPORT_BATCH_SIZE", 2)
+    handler = make_handler()
+    path = str(tmp_path / f"pontos{extension}")
+    progress, messages = cancel_after(1)
+
+    # A exceção do cancelamento chega intacta, mesmo passando pelo GDAL, e o arquivo incompleto é excluído
+    with pytest.raises(Cancelled):
+        handler.export_geodataframe(path, progress=progress)
+
+    assert len(messages) == 2
+    assert os.listdir(tmp_path) == []
+    assert len(handler.recipe) == 0
+
+
+def test_export_reports_progress_per_batch(tmp_path, monkeypatch):
+    monkeypatch.setattr(model, "EXPORT_BATCH_SIZE", 2)
+    progress, messages = cancel_after(10)
+
+    make_handler().export_geodataframe(str(tmp_path / "pontos.gpkg"), progress=progress)
+
+    assert messages == ["Gravando pontos.gpkg..."] * 3
+
+
+def test_cancel_export_does_not_remove_existing_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(model, "EXPORT_BATCH_SIZE", 2)
+    path = tmp_path / "pontos.csv"
+    path.write_text("anterior")
+
+    with pytest.raises(Cancelled):
+        make_handler().export_geodataframe(str(path), progress=cancel_after(1)[0])
+
+    assert path.exists()
+
+
+def test_cancel_multiple_file_export(tmp_path, monkeypatch):
+    monkeypatch.setattr(model, "EXPORT_BATCH_SIZE", 2)
+    paths = [str(tmp_path / f"pontos{extension}") for extension in (".gpkg", ".geojson", ".csv")]
+
+    with pytest.raises(Cancelled):
+        make_handler().export_geodataframes(paths, max_workers=1, progress=cancel_after(1)[0])
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_cancel_running_export_task(tmp_path, monkeypatch):
+    monkeypatch.setattr(model, "EXPORT_BATCH_SIZE", 2)
+    handler = make_handler()
+    path = str(tmp_path / "pontos.gpkg")
+    task = Task(lambda progress: handler.export_geodataframe(path, progress=progress))
+    results = []
+    task.signals.progress.connect(lambda percent, message: task.cancel())  # Cancela durante o primeiro lote
+    task.signals.cancelled.connect(lambda: results.append("cancelled"))
+    task.signals.failed.connect(results.append)
+    task.signals.finished.connect(results.append)
+
+    task.run()
+
+    assert results == ["cancelled"]
+    assert not os.path.exists(path)
+
+
+def test_cancel_reprojection_skips_pending_chunks(monkeypatch):
+    monkeypatch.setattr(model, "REPROJECTION_CHUNK_SIZE", 1)
+    handler = make_handler(rows=50)
+    original = handler.gdf.copy()
+    chunks = []
+    create_points = shapely.points
+
+    def points(*args):
+        chunks.append(args)
+        time.sleep(0.01)
+        return create_points(*args)
+
+    monkeypatch.setattr(model.shapely, "points", points)
+
+    with pytest.raises(Cancelled):
+        handler.reproject_geodataframe("SIRGAS 2000 / UTM zone 22S (EPSG:31982)", max_workers=1,
+                                       progress=cancel_after(0)[0])
+
+    # As partes que ainda não tinham começado não são reprojetadas, e os dados não são alterados
+    assert len(chunks) < 50
+    pandas.testing.assert_frame_equal(handler.gdf, original)
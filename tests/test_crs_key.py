@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+import pyproj
+
+import model
+
+
+def test_crs84_key(monkeypatch):
+    assert model.get_crs_key(pyproj.CRS("OGC:CRS84")) is not None
+
+    # Bancos do PROJ sem a autoridade OGC no catálogo: o SRC é comparado aos SRCs geográficos comuns
+    search = model.CRS_DICT.search
+    monkeypatch.setattr(model.CRS_DICT, "search", lambda prefix, limit=None: [] if prefix.upper().startswith("OGC")
+                        else search(prefix, limit))
+    monkeypatch.setattr(model, "LONLAT_CRS_KEYS", ("WGS 84 (EPSG:4326)",))
+    assert model.get_crs_key(pyproj.CRS("OGC:CRS84")) == "WGS 84 (EPSG:4326)"
+    assert model.get_crs_key(pyproj.CRS("EPSG:4674")) == "SIRGAS 2000 (EPSG:4674)"
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+import geopandas
+import pandas
+import pytest
+
+import model
+from conftest import import_controller
+
+
+def make_handler(**columns):
+    handler = model.DataHandler()
+    rows = len(next(iter(columns.values())))
+    handler.gdf = geopandas.GeoDataFrame(columns, geometry=geopandas.points_from_xy(range(rows), range(rows)),
+                                         crs="EPSG:4674")
+    return handler
+
+
+def test_rank_datetime_formats():
+    handler = make_handler(data=["25/12/2023", "01/02/2024", None, "31/01/2024", "13/13/2024"])
+
+    ranking = handler.rank_datetime_formats("data")
+
+    # As células vazias não contam. Apenas DD/MM/YYYY converte 3 dos 4 valores preenchidos
+    assert ranking[0] == ("DD/MM/YYYY", 0.75)
+    assert ranking[1] == ("MM/DD/YYYY", 0.25)
+    assert [key for key, _ in ranking] == sorted(model.DATETIME_FORMATS, key=dict(ranking).get, reverse=True)
+
+
+def test_rank_datetime_formats_ambiguous_sample():
+    # Dias até 12 são válidos tanto como DD/MM quanto como MM/DD
+    handler = make_handler(data=["01/02/2024", "03/04/2024", "12/11/2024"])
+
+    ranking = handler.rank_datetime_formats("data", sample_size=2)
+
+    assert {key for key, rate in ranking if rate == 1.0} == {"DD/MM/YYYY", "MM/DD/YYYY"}
+
+
+def test_parse_datetime_column_reports_failed_rows():
+    handler = make_handler(data=["25/12/2023", "texto", None, "2024-01-31"])
+
+    with pytest.raises(model.DatetimeConversionError) as error:
+        handler.parse_datetime_column("data", "DD/MM/YYYY")
+
+    assert error.value.rows == [1, 3]
+    converted = handler.parse_datetime_column("data", "DD/MM/YYYY", errors="coerce")
+    assert converted.tolist()[0] == pandas.Timestamp("2023-12-25")
+    assert converted.isna().tolist() == [False, True, True, True]
+
+
+@pytest.mark.parametrize("values, asked, expected", [
+    # Apenas um formato converte toda a amostra: ele é aplicado sem perguntar ao usuário
+    (["25/12/2023", "31/01/2024"], False, "2023-12-25"),
+    # DD/MM e MM/DD convertem toda a amostra: o usuário escolhe o formato
+    (["01/02/2024", "03/04/2024"], True, "2024-02-01"),
+])
+def test_datetime_conversion_asks_only_when_ambiguous(ui, monkeypatch, values, asked, expected):
+    controller = import_controller()
+    app, ui, popups = ui
+    ui.model = make_handler(data=values)
+    ui.show_imported_data()
+    dialogs = []
+
+    def select(message, items, *args, **kwargs):
+        dialogs.append(items)
+        return next(item for item in items if item.startswith("DD/MM/YYYY ")), True
+
+    monkeypatch.setattr(controller, "show_selection_dialog", select)
+
+    ui.column_dtype_changed(0, "Datetime")
+
+    assert bool(dialogs) == asked
+    if asked:
+        # As opções vêm do formato mais ao menos compatível, com a proporção da amostra convertida por cada um
+        assert dialogs[0][0].endswith("(100% da amostra)") and dialogs[0][-1].endswith("(0% da amostra)")
+    assert popups == []
+    assert ui.model.gdf["data"].iloc[0] == pandas.Timestamp(expected)
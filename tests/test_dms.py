@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+import numpy
+import pandas
+import pytest
+
+import model
+
+
+@pytest.fixture(params=["pyarrow", "pandas"])
+def engine(request, monkeypatch):
+    # O pyarrow é opcional: as duas formas de interpretar as coordenadas devem dar o mesmo resultado
+    if request.param == "pandas":
+        monkeypatch.setattr(model, "pyarrow", None)
+    elif model.pyarrow is None:
+        pytest.skip("pyarrow não instalado")
+    return request.param
+
+
+def test_parse_dms_coordinates(engine):
+    values = pandas.Series(["48°30'00\"W", "48º 30' 36,5\" O", "10°15′30.25″E", "48°30'00\"W", None, "48°61'00\"W",
+                            "27°30'00\"S", "texto"], index=range(10, 18))
+
+    decimal, invalid = model.parse_dms_coordinates(values, "x")
+
+    assert invalid.tolist() == [False, False, False, False, True, True, True, True]
+    numpy.testing.assert_allclose(decimal[:4], [-48.5, -(48.5 + 36.5 / 3600), 10 + 15 / 60 + 30.25 / 3600, -48.5])
+    assert numpy.isnan(decimal[4:]).all()
+
+
+def test_parse_dms_latitude_limits(engine):
+    values = pandas.Series(["27°30'00\"S", "27°30'00''N", "91°00'00\"N", "48°30'00\"W"])
+
+    decimal, invalid = model.parse_dms_coordinates(values, "y")
+
+    assert invalid.tolist() == [False, False, True, True]
+    numpy.testing.assert_allclose(decimal[:2], [-27.5, 27.5])
+
+
+def test_dms_column_values_reports_invalid_rows(engine):
+    df = pandas.DataFrame({"lat": ["27°30'00\"S", "x", "27°30'00\"S"]}, index=[5, 6, 7])
+
+    with pytest.raises(ValueError, match=r"linhas \[6\]"):
+        model.dms_column_values(df, "lat", "y")
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+import pandas
+
+import model
+
+
+def test_undo_restores_shared_columns():
+    # A importação do modelo não deve mudar as opções globais do pandas
+    assert not pandas.get_option("mode.copy_on_write")
+
+    handler = model.DataHandler()
+    handler.read_excel_file(f"{model.os.path.dirname(model.__file__)}/exemplo_dados_entrada.xlsx")
+    handler.read_excel_sheet(0)
+    original = handler.gdf.copy(deep=True)
+
+    handler.change_column_dtype("amostras", "String")
+    handler.rename_column("altitude", "cota")
+    handler.delete_column("datum")
+    while handler.undo() is not None:
+        pass
+    pandas.testing.assert_frame_equal(handler.gdf, original)
+
+    # O cache de planilhas continua com os dados originais
+    pandas.testing.assert_frame_equal(handler.get_parsed_sheet(handler.sheet_name), original, check_frame_type=False)
+
+
+def test_in_place_edit_keeps_undo_states():
+    handler = model.DataHandler()
+    handler.read_excel_file(f"{model.os.path.dirname(model.__file__)}/exemplo_dados_entrada.xlsx")
+    handler.read_excel_sheet(0)
+    sheet = handler.gdf.copy(deep=True)
+    handler.set_geodataframe_geometry("SIRGAS 2000 (EPSG:4674)", "longitude", "latitude")
+    original = handler.gdf.copy(deep=True)
+
+    # Uma edição que altera a coluna no próprio lugar não pode alterar os estados guardados nem o cache de planilhas
+    handler.rename_column("datum", "datum_original")
+    renamed = handler.gdf.copy(deep=True)
+    previous_state = handler.get_state(["altitude"])
+    handler.gdf.loc[handler.gdf.index[0], "altitude"] = -1
+    handler.history.push("Editar a coluna altitude", previous_state, ["altitude"])
+
+    handler.undo()
+    pandas.testing.assert_frame_equal(handler.gdf, renamed)
+    handler.undo()
+    pandas.testing.assert_frame_equal(handler.gdf, original)
+    pandas.testing.assert_frame_equal(handler.get_parsed_sheet(handler.sheet_name), sheet, check_frame_type=False)
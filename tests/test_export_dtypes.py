@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+import geopandas
+import pandas
+import pytest
+import shapely
+
+import model
+
+
+def make_gdf():
+    return geopandas.GeoDataFrame({
+        "misto": pandas.Series([1, "a", None], dtype=object),
+        "texto": ["x", "y", None],
+        "categoria": pandas.Categorical(["A", "B", "A"]),
+        "data": pandas.to_datetime(["2024-01-01", None, "2024-01-03"]),
+        "duracao": pandas.to_timedelta([1, 2, None], unit="D"),
+        "numero": [1.0, 2.0, 3.0],
+    }, geometry=[shapely.Point(-48.5, -27.5), shapely.Point(-48.6, -27.6), None], crs="EPSG:4674")
+
+
+@pytest.mark.parametrize("extension, expected", [
+    (".gpkg", ["misto", "categoria", "duracao"]),
+    (".shp", ["misto", "categoria", "data", "duracao"]),
+    (".parquet", ["misto"]),
+])
+def test_unsupported_export_columns(extension, expected):
+    assert model.get_unsupported_export_columns(make_gdf(), extension) == expected
+
+
+def test_convert_export_batch_does_not_change_the_data():
+    gdf = make_gdf()
+    original = gdf.copy(deep=True)
+
+    batch = model.convert_export_batch(gdf.iloc[1:], ["misto", "duracao"])
+
+    assert isinstance(batch, geopandas.GeoDataFrame)
+    assert batch.crs == gdf.crs
+    # As células vazias continuam vazias e as demais colunas não são convertidas
+    assert batch["misto"].tolist() == ["a", None]
+    assert batch["duracao"].tolist() == ["2 days", None]
+    assert batch["numero"].dtype == float
+    pandas.testing.assert_frame_equal(gdf, original)
+    assert model.convert_export_batch(gdf, []) is gdf
+
+
+def test_export_geopackage_with_unsupported_dtypes(tmp_path):
+    handler = model.DataHandler()
+    handler.gdf = make_gdf()
+    original = handler.gdf.copy(deep=True)
+    path = str(tmp_path / "pontos.gpkg")
+
+    report = handler.export_geodataframe(path)
+
+    assert report["rows"] == 3
+    result = geopandas.read_file(path)
+    assert result["misto"].tolist()[:2] == ["1", "a"]
+    assert result["categoria"].tolist() == ["A", "B", "A"]
+    pandas.testing.assert_frame_equal(handler.gdf, original)
+
+
+def test_export_with_geometry_column_not_named_geometry(tmp_path):
+    handler = model.DataHandler()
+    handler.gdf = make_gdf().rename_geometry("geom")
+
+    assert model.get_unsupported_export_columns(handler.gdf, ".gpkg") == ["misto", "categoria", "duracao"]
+    batch = model.convert_export_batch(handler.gdf, ["categoria"])
+    assert isinstance(batch, geopandas.GeoDataFrame)
+    assert batch.geometry.name == "geom"
+
+    paths = [str(tmp_path / "pontos.gpkg"), str(tmp_path / "pontos.geojson")]
+    reports = handler.export_geodataframes(paths)
+
+    assert [report["error"] for report in reports] == [None, None]
+    for path in paths:
+        result = geopandas.read_file(path)
+        assert result["categoria"].tolist() == ["A", "B", "A"]
+        assert result.geometry.x.tolist()[:2] == [-48.5, -48.6]
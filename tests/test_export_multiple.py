@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+import geopandas
+import pandas
+import pyarrow.parquet
+
+import model
+
+
+def make_handler():
+    handler = model.DataHandler()
+    handler.gdf = geopandas.GeoDataFrame({"codigo": ["P1", "P2", "P3"], "altitude": [10.0, 20.0, 30.0]},
+                                         geometry=geopandas.points_from_xy([-48.5, -48.6, -48.7], [-27.5, -27.6, -27.7]),
+                                         crs="EPSG:4674")
+    return handler
+
+
+def test_export_several_formats(tmp_path):
+    handler = make_handler()
+    extensions = [".gpkg", ".shp", ".geojson", ".csv", ".xlsx", ".parquet"]
+    paths = [str(tmp_path / f"pontos{extension}") for extension in extensions]
+    # Um caminho inválido não impede a gravação dos demais arquivos
+    paths.insert(2, str(tmp_path / "pasta inexistente" / "pontos.gpkg"))
+
+    reports = handler.export_geodataframes(paths, max_workers=3)
+
+    # Os relatórios seguem a ordem dos caminhos, não a ordem em que as gravações terminaram
+    assert [report["path"] for report in reports] == paths
+    assert [report["format"] for report in reports] == [".gpkg", ".shp", ".gpkg", *extensions[2:]]
+    errors = [report["error"] for report in reports]
+    assert errors[2] is not None and reports[2]["rows"] == 0
+    assert errors[:2] + errors[3:] == [None] * 6
+    assert all(report["rows"] == 3 for i, report in enumerate(reports) if i != 2)
+
+    for path in paths[:2] + paths[3:5]:
+        assert geopandas.read_file(path)["codigo"].tolist() == ["P1", "P2", "P3"]
+    assert pandas.read_excel(paths[5])["codigo"].tolist() == ["P1", "P2", "P3"]
+    assert pyarrow.parquet.read_table(paths[6]).num_rows == 3
+    assert handler.recipe.steps[-1]["params"]["paths"] == paths
+
+
+def test_export_no_paths():
+    handler = make_handler()
+
+    assert handler.export_geodataframes([]) == []
+    assert len(handler.recipe) == 0
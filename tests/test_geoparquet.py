@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+import geopandas
+import pandas
+import pyarrow.parquet
+import shapely
+
+import cli
+import model
+
+
+def test_geoparquet_round_trip_with_geom_column(tmp_path):
+    # DuckDB e GDAL costumam gravar a geometria na coluna "geom"
+    source_path = str(tmp_path / "entrada.parquet")
+    geopandas.GeoDataFrame({"codigo": ["P1", "P2"], "altitude": [10.0, 20.0]},
+                           geometry=[shapely.Point(-48.5, -27.5), shapely.Point(-48.6, -27.6)],
+                           crs="EPSG:4674").rename_geometry("geom").to_parquet(source_path)
+
+    handler = model.DataHandler()
+    assert handler.read_parquet_file(source_path)
+    assert handler.gdf.geometry.name == "geom"
+    assert handler.crs_key == "SIRGAS 2000 (EPSG:4674)"
+
+    output_path = str(tmp_path / "saida.parquet")
+    report = handler.export_geodataframe(output_path, compression="zstd", row_group_size=1)
+
+    assert report["rows"] == 2
+    assert pyarrow.parquet.ParquetFile(output_path).metadata.num_row_groups == 2
+    result = geopandas.read_parquet(output_path)
+    assert result.geometry.name == "geom"
+    assert result.crs.to_epsg() == 4674
+    pandas.testing.assert_frame_equal(result, handler.gdf)
+
+
+def test_cli_row_group_size(tmp_path):
+    input_path = str(tmp_path / "pontos.csv")
+    pandas.DataFrame({"codigo": ["P1", "P2", "P3"], "longitude": [-48.5, -48.6, -48.7],
+                      "latitude": [-27.5, -27.6, -27.7]}).to_csv(input_path, sep=";", index=False)
+    output_path = str(tmp_path / "pontos.parquet")
+
+    assert cli.main(["convert", input_path, "-o", output_path, "--x", "longitude", "--y", "latitude",
+                     "--row-group-size", "2"]) == 0
+
+    assert pyarrow.parquet.ParquetFile(output_path).metadata.num_row_groups == 2
+    assert geopandas.read_parquet(output_path).crs.to_epsg() == 4674
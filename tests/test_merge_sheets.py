@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+import openpyxl
+
+import model
+
+
+def write_workbook(path):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Geral"
+    for row in (("id", "nome"), (3, "c"), (1, "a"), (2, "b")):
+        sheet.append(row)
+    sheet = workbook.create_sheet("Pontos")
+    for row in (("id", "nome", "longitude", "latitude"), ("2", "B", -48.2, -27.2), ("4", "D", -48.4, -27.4),
+                ("X9", "X", -48.9, -27.9)):
+        sheet.append(row)
+    sheet = workbook.create_sheet("Notas")
+    for row in (("codigo", "nota"), (1, "x")):
+        sheet.append(row)
+    workbook.save(path)
+    return str(path)
+
+
+def test_merge_sheets_with_base_sheet_after_the_first(tmp_path):
+    handler = model.DataHandler()
+    handler.read_excel_file(write_workbook(tmp_path / "pontos.xlsx"))
+    handler.read_excel_sheet("Pontos")
+    handler.set_geodataframe_geometry("SIRGAS 2000 (EPSG:4674)", "longitude", "latitude")
+
+    merged, skipped = handler.merge_sheets("id")
+
+    assert merged == ["Geral", "Pontos"]
+    assert skipped == ["Notas"]
+    gdf = handler.gdf
+    # Os identificadores são inteiros em uma aba e texto na outra, então todos são comparados como texto
+    assert gdf["id"].tolist() == ["3", "1", "2", "4", "X9"]
+    # A coluna repetida recebe o nome da aba como sufixo e a geometria fica no final
+    assert gdf.columns.tolist() == ["id", "nome", "nome_Pontos", "longitude", "latitude", "geometry"]
+    assert gdf["nome"].tolist()[:3] == ["c", "a", "b"]
+    assert gdf["nome_Pontos"].tolist()[2:] == ["B", "D", "X"]
+    # A geometria acompanha as linhas da aba base
+    assert gdf.geometry.isna().tolist() == [True, True, False, False, False]
+    assert gdf.geometry.x.tolist()[2:] == [-48.2, -48.4, -48.9]
+    assert gdf.crs.to_epsg() == 4674
+
+    handler.undo()
+    assert handler.gdf["id"].tolist() == ["2", "4", "X9"]
+
+
+def test_merge_sheets_keeps_matching_key_dtypes(tmp_path):
+    handler = model.DataHandler()
+    handler.read_excel_file(write_workbook(tmp_path / "pontos.xlsx"))
+    handler.read_excel_sheet("Geral")
+    handler.rename_column("id", "codigo")
+
+    merged, skipped = handler.merge_sheets("codigo")
+
+    assert merged == ["Geral", "Notas"]
+    assert handler.gdf["codigo"].tolist() == [3, 1, 2]
+    assert handler.gdf["nota"].isna().tolist() == [True, False, True]
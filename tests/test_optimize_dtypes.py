@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+import geopandas
+import pandas
+import pytest
+
+import model
+
+
+def make_handler():
+    handler = model.DataHandler()
+    handler.gdf = geopandas.GeoDataFrame({
+        "codigo": ["P1", "P2", "P3", "P4"],
+        "litologia": ["Granito", "Gnaisse", "Granito", "Granito"],
+        "amostras": [1, 2, 3, 250],
+        "mergulho": [-10, 20, -30, 40],
+        "azimute": [0.5, 90.25, 180.0, 270.75],
+        "teor": [0.1, 0.2, 0.3, 0.4],
+        "aflorante": [True, False, True, True],
+    }, geometry=geopandas.points_from_xy([-48.5, -48.6, -48.7, -48.8], [-27.5, -27.6, -27.7, -27.8]), crs="EPSG:4674")
+    return handler
+
+
+def test_optimize_dtypes():
+    handler = make_handler()
+    original = handler.gdf.copy()
+
+    report = handler.optimize_dtypes()
+
+    dtypes = {column: str(dtype) for column, dtype in handler.gdf.dtypes.items()}
+    assert dtypes["amostras"] == "uint8"
+    assert dtypes["mergulho"] == "int8"
+    assert dtypes["azimute"] == "float32"
+    # 0.1 não é representado exatamente em 32 bits
+    assert dtypes["teor"] == "float64"
+    assert dtypes["litologia"] == "category"
+    assert dtypes["codigo"] == "string"
+    assert dtypes["aflorante"] == "bool"
+    assert set(report["columns"]) == {"codigo", "litologia", "amostras", "mergulho", "azimute"}
+    assert report["after"] < report["before"]
+    # Os tipos continuam nos mesmos grupos do DTYPES_DICT e os valores não mudam
+    for column in original.columns.drop("geometry"):
+        assert model.get_dtype_key(str(handler.gdf[column].dtype)) == model.get_dtype_key(str(original[column].dtype))
+        assert handler.gdf[column].tolist() == original[column].tolist()
+
+
+@pytest.mark.parametrize("category_ratio, expected", [(0.5, "category"), (0.25, "string")])
+def test_optimize_dtypes_category_ratio(category_ratio, expected):
+    # A coluna litologia tem 2 valores distintos em 4 linhas (proporção de 0.5)
+    handler = make_handler()
+
+    handler.optimize_dtypes(category_ratio)
+
+    assert str(handler.gdf["litologia"].dtype) == expected
+    assert handler.recipe.steps[-1] == {"operation": "optimize_dtypes", "params": {"category_ratio": category_ratio}}
+
+
+@pytest.mark.parametrize("extension", [".gpkg", ".parquet", ".csv"])
+def test_export_optimized_dtypes(tmp_path, extension):
+    handler = make_handler()
+    original = handler.gdf.copy()
+    handler.optimize_dtypes()
+    path = str(tmp_path / f"pontos{extension}")
+
+    handler.export_geodataframe(path)
+
+    result = geopandas.read_parquet(path) if extension == ".parquet" else geopandas.read_file(path)
+    for column in ("codigo", "litologia", "amostras", "mergulho", "azimute"):
+        values = result[column].tolist()
+        if extension == ".csv":  # O GDAL lê todas as colunas de arquivos CSV como texto
+            values = [str(value) for value in values]
+            assert values == [str(value) for value in original[column]]
+        else:
+            assert values == original[column].tolist()
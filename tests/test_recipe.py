@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+import pandas
+
+import model
+
+
+def step(operation, **params):
+    return {"operation": operation, "params": params}
+
+
+def test_optimized_fuses_conversions_and_drops_deleted_columns():
+    recipe = model.Recipe([
+        step("read_csv_file", path="pontos.csv", decimal=",", nrows=None),
+        step("change_column_dtype", column="a", target_dtype_key="String"),
+        step("change_column_dtype", column="b", target_dtype_key="Datetime", datetime_format="DD/MM/YYYY"),
+        step("change_column_dtype", column="c", target_dtype_key="Float"),
+        step("rename_column", column="b", new_name="data"),
+        step("change_column_dtype", column="d", target_dtype_key="Integer"),
+        step("delete_column", column="c"),
+        step("delete_column", column="d"),
+    ])
+
+    steps = recipe.optimized().steps
+
+    # As conversões de c e d são descartadas, pois as colunas são excluídas sem serem usadas antes
+    assert [s["operation"] for s in steps] == ["read_csv_file", "change_column_dtypes", "rename_column",
+                                               "delete_column", "delete_column"]
+    assert steps[1]["params"]["conversions"] == [["a", "String", {}],
+                                                 ["b", "Datetime", {"datetime_format": "DD/MM/YYYY"}]]
+    # A receita original não é alterada
+    assert len(recipe) == 8
+
+
+def test_optimized_keeps_conversions_of_columns_used_before_deletion():
+    recipe = model.Recipe([
+        step("read_csv_file", path="pontos.csv", decimal=",", nrows=None),
+        step("change_column_dtype", column="x", target_dtype_key="Float"),
+        step("set_geodataframe_geometry", crs_key="SIRGAS 2000 (EPSG:4674)", x_column="x", y_column="y",
+             z_column=None, dms=False),
+        step("delete_column", column="x"),
+    ])
+
+    assert recipe.optimized().steps == recipe.steps
+
+
+def test_optimized_prunes_parquet_columns(tmp_path):
+    path = str(tmp_path / "pontos.parquet")
+    pandas.DataFrame({"codigo": ["P1", "P2"], "lixo": [1, 2], "nota": ["a", "b"], "x": [1.0, 2.0]}).to_parquet(path)
+    recipe = model.Recipe([
+        step("read_parquet_file", path=path, columns=None),
+        step("change_column_dtype", column="lixo", target_dtype_key="String"),
+        step("delete_column", column="lixo"),
+        step("rename_column", column="nota", new_name="obs"),
+        step("delete_column", column="obs"),
+        step("delete_column", column="x"),
+    ])
+
+    steps = recipe.optimized().steps
+
+    # Colunas excluídas sem uso nem chegam a ser lidas. A coluna renomeada antes de ser excluída é lida normalmente
+    assert steps[0] == step("read_parquet_file", path=path, columns=["codigo", "nota"])
+    assert [s["operation"] for s in steps[1:]] == ["rename_column", "delete_column"]
+
+    handler = model.DataHandler()
+    handler.run_recipe(recipe)
+    optimized = handler.gdf
+    for original_step in recipe.steps:
+        getattr(handler, original_step["operation"])(**original_step["params"])
+    pandas.testing.assert_frame_equal(optimized, handler.gdf)
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+import geopandas
+import numpy
+import pytest
+import shapely
+
+import model
+
+
+def make_handler(geometries, crs_key="SIRGAS 2000 (EPSG:4674)"):
+    handler = model.DataHandler()
+    handler.gdf = geopandas.GeoDataFrame({"codigo": [f"P{i}" for i in range(len(geometries))]},
+                                         geometry=geometries, crs=handler.projection_cache.get_crs(crs_key))
+    handler.crs_key = crs_key
+    return handler
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    # Partes pequenas, para que a reprojeção seja dividida entre várias threads
+    monkeypatch.setattr(model, "REPROJECTION_CHUNK_SIZE", 2)
+
+
+def test_reproject_points_with_null_geometries():
+    points = [shapely.Point(-48.5 - i / 10, -27.5 - i / 10) for i in range(5)]
+    handler = make_handler([points[0], None, points[2], shapely.Point(), points[4]])
+    expected = handler.gdf.to_crs(epsg=31982)
+
+    handler.reproject_geodataframe("SIRGAS 2000 / UTM zone 22S (EPSG:31982)", "x", "y", max_workers=3)
+
+    gdf = handler.gdf
+    assert gdf.crs.to_epsg() == 31982
+    assert gdf.columns.tolist() == ["codigo", "x", "y", "geometry"]
+    # Geometrias nulas ou vazias não têm coordenadas, então ficam nulas e as colunas ficam vazias
+    assert gdf.geometry.isna().tolist() == [False, True, False, True, False]
+    valid = gdf.geometry.notna().to_numpy()
+    numpy.testing.assert_allclose(gdf.geometry.x[valid], expected.geometry.x[valid])
+    numpy.testing.assert_allclose(gdf["x"][valid], expected.geometry.x[valid])
+    numpy.testing.assert_allclose(gdf["y"][valid], expected.geometry.y[valid])
+    assert gdf["x"].isna().tolist() == [False, True, False, True, False]
+
+
+def test_reproject_mixed_geometry_types():
+    geometries = [shapely.Point(-48.5, -27.5), shapely.LineString([(-48.6, -27.6), (-48.7, -27.7), (-48.8, -27.8)]),
+                  None, shapely.Point(-48.9, -27.9)]
+    handler = make_handler(geometries)
+    expected = handler.gdf.to_crs(epsg=31982)
+
+    handler.reproject_geodataframe("SIRGAS 2000 / UTM zone 22S (EPSG:31982)")
+
+    gdf = handler.gdf
+    assert gdf.geom_type.tolist() == ["Point", "LineString", None, "Point"]
+    for result, reference in zip(gdf.geometry[[0, 1, 3]], expected.geometry[[0, 1, 3]]):
+        numpy.testing.assert_allclose(shapely.get_coordinates(result), shapely.get_coordinates(reference))
+    # Sem colunas de coordenadas, a ordem das colunas não muda
+    assert gdf.columns.tolist() == ["codigo", "geometry"]
+
+
+def test_reproject_z_column_only_for_3d_crs():
+    handler = make_handler([shapely.Point(-48.5, -27.5, 10.0), shapely.Point(-48.6, -27.6, 20.0)],
+                           "WGS 84 (3D) (EPSG:4979)")
+
+    handler.reproject_geodataframe("SIRGAS 2000 / UTM zone 22S (EPSG:31982)", "x", "y", "z")
+
+    # O SRC de destino não é 3D: a coluna z não é criada nem marcada como alterada no histórico
+    assert "z" not in handler.gdf.columns
+    assert handler.history.undo_steps[-1][2] == ["geometry", "x", "y"]
+    assert shapely.has_z(handler.gdf.geometry.values).all()
+
+    handler.reproject_geodataframe("WGS 84 (3D) (EPSG:4979)", "lon", "lat", "h")
+
+    numpy.testing.assert_allclose(handler.gdf["lon"], [-48.5, -48.6])
+    numpy.testing.assert_allclose(handler.gdf["lat"], [-27.5, -27.6])
+    numpy.testing.assert_allclose(handler.gdf["h"], [10.0, 20.0], atol=1e-6)
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+import threading
+
+import pyproj
+
+from conftest import wait_for_tasks
+
+
+def test_reproject_task_creates_crs_on_gui_thread(ui, monkeypatch):
+    app, ui, popups = ui
+
+    # Criar SRCs nas threads do QThreadPool derrubava o aplicativo
+    crs_threads = []
+    from_authority = pyproj.CRS.from_authority
+    monkeypatch.setattr(pyproj.CRS, "from_authority", lambda *args, **kwargs: (
+        crs_threads.append(threading.current_thread()), from_authority(*args, **kwargs))[1])
+
+    ui.import_button_clicked()
+    wait_for_tasks(app, ui)
+    ui.view.crs_cbx.setCurrentText("SIRGAS 2000 (EPSG:4674)")
+    ui.import_ok_button_clicked()
+    wait_for_tasks(app, ui)
+
+    ui.reproject_button_clicked()
+    ui.view.target_crs_cbx.setCurrentText("SIRGAS 2000 / UTM zone 22S (EPSG:31982)")
+    ui.reproject_ok_button_clicked()
+    wait_for_tasks(app, ui)
+
+    assert popups[-1] == "Pontos reprojetados com sucesso!"
+    assert ui.model.gdf.crs.to_epsg() == 31982
+    assert ui.model.crs_key == "SIRGAS 2000 / UTM zone 22S (EPSG:31982)"
+    assert crs_threads and all(thread is threading.main_thread() for thread in crs_threads)
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+import numpy
+import pandas
+
+import model
+
+
+def test_sort_row_positions():
+    # O índice do DataFrame não importa: as posições são sempre relativas à coluna
+    values = pandas.Series([3.0, None, 1.0, 2.0, 1.0], index=[10, 11, 12, 13, 14])
+
+    assert model.sort_row_positions(values).tolist() == [2, 4, 3, 0, 1]
+    assert model.sort_row_positions(values, ascending=False).tolist() == [0, 3, 2, 4, 1]
+    # Apenas as linhas informadas são ordenadas, mantendo as posições em relação à coluna completa
+    assert model.sort_row_positions(values, rows=numpy.array([0, 1, 4])).tolist() == [4, 0, 1]
+
+
+def test_sort_row_positions_mixed_types_as_text():
+    values = pandas.Series(["b", 10, "a", None, 2], dtype=object)
+
+    assert model.sort_row_positions(values).tolist() == [1, 4, 2, 0, 3]
+
+
+def test_filter_row_positions():
+    values = pandas.Series(["Granito", "gnaisse", None, "GRANITO rosa", 42], dtype=object, index=list("abcde"))
+
+    assert model.filter_row_positions(values, "granito").tolist() == [0, 3]
+    assert model.filter_row_positions(values, "4").tolist() == [4]
+    assert model.filter_row_positions(values, "xisto").tolist() == []
+
+    # Filtro seguido de ordenação, como na janela de visualização dos dados
+    rows = model.filter_row_positions(values, "n")
+    assert model.sort_row_positions(values, rows=rows).tolist() == [3, 0, 1]
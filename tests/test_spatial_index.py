@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+import sqlite3
+
+import geopandas
+import pyogrio
+import pytest
+
+import model
+
+
+def rtree_tables(path):
+    # As extensões registradas no GeoPackage indicam as tabelas e colunas com índice espacial (rtree_<tabela>_<coluna>)
+    with sqlite3.connect(path) as connection:
+        if connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'gpkg_extensions'").fetchone() is None:
+            return []
+        return [f"rtree_{table}_{column}" for table, column in connection.execute(
+            "SELECT table_name, column_name FROM gpkg_extensions WHERE extension_name = 'gpkg_rtree_index'"
+        )]
+
+
+@pytest.mark.parametrize("spatial_index, indexed", [("write", True), ("after", True), ("none", False)])
+def test_geopackage_spatial_index(tmp_path, spatial_index, indexed):
+    handler = model.DataHandler()
+    handler.gdf = geopandas.GeoDataFrame({"codigo": ["P1", "P2", "P3"]},
+                                         geometry=geopandas.points_from_xy([-48.5, -48.6, -48.7], [-27.5, -27.6, -27.7]),
+                                         crs="EPSG:4674")
+    path = str(tmp_path / "pontos.gpkg")
+
+    handler.export_geodataframe(path, spatial_index=spatial_index)
+
+    # A opção do GDAL usada no modo "after" vale apenas durante a gravação
+    assert pyogrio.get_gdal_config_option("OGR_GPKG_THREADED_RTREE") is None
+    tables = rtree_tables(path)
+    assert len(tables) == int(indexed)
+    assert len(geopandas.read_file(path).index) == 3
+    if indexed:
+        # O índice contém todos os pontos, tanto quando é montado durante a gravação quanto ao final
+        with sqlite3.connect(path) as connection:
+            assert connection.execute(f"SELECT COUNT(*) FROM {tables[0]}").fetchone()[0] == 3
+
+
+def test_invalid_spatial_index_mode(tmp_path):
+    handler = model.DataHandler()
+    handler.gdf = geopandas.GeoDataFrame(geometry=geopandas.points_from_xy([0], [0]), crs="EPSG:4674")
+
+    with pytest.raises(ValueError, match="índice espacial"):
+        handler.export_geodataframe(str(tmp_path / "pontos.gpkg"), spatial_index="depois")
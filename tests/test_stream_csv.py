@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+""" @author: Gabriel Maccari """
+
+import os
+
+import pandas
+import pytest
+
+import model
+
+
+def write_csv(path, rows):
+    with open(path, "w") as f:
+        f.write("codigo;longitude;latitude;amostras;obs\n")
+        for row in rows:
+            f.write(";".join(row) + "\n")
+    return str(path)
+
+
+def test_later_chunks_with_empty_cells_keep_the_first_chunk_types(tmp_path):
+    path = write_csv(tmp_path / "pontos.csv", [
+        ("P1", "-48,5", "-27,5", "1", ""),
+        ("P2", "-48,6", "-27,6", "2", ""),
+        ("P3", "-48,7", "-27,7", "", "texto"),
+    ])
+    output_path = str(tmp_path / "pontos.parquet")
+
+    rows = model.DataHandler().stream_csv_file(path, output_path, "SIRGAS 2000 (EPSG:4674)", "longitude", "latitude",
+                                               chunk_size=2)
+
+    assert rows == 3
+    result = pandas.read_parquet(output_path)
+    # Inteiros passam a aceitar células vazias e a coluna vazia na primeira parte é gravada como texto
+    assert str(result["amostras"].dtype) == "Int64"
+    assert result["amostras"].isna().tolist() == [False, False, True]
+    assert result["obs"].tolist()[2] == "texto"
+    assert set(os.listdir(tmp_path)) == {"pontos.csv", "pontos.parquet"}  # O arquivo temporário é removido
+
+
+def test_column_changing_type_widens_csv_and_aborts_fixed_schema(tmp_path):
+    path = write_csv(tmp_path / "pontos.csv", [
+        ("P1", "-48,5", "-27,5", "1", "a"),
+        ("P2", "-48,6", "-27,6", "2", "b"),
+        ("P3", "-48,7", "-27,7", "2,5", "c"),
+    ])
+
+    # Em CSV, a coluna passa para float a partir da parte em que os valores deixam de ser inteiros
+    csv_path = str(tmp_path / "saida.csv")
+    assert model.DataHandler().stream_csv_file(path, csv_path, None, chunk_size=2) == 3
+    assert pandas.read_csv(csv_path, sep=";")["amostras"].tolist() == [1, 2, 2.5]
+
+    # GeoPackage e Parquet não permitem mudar o tipo, e o arquivo de saída não é criado
+    gpkg_path = str(tmp_path / "saida.gpkg")
+    with pytest.raises(ValueError, match="amostras mudou de tipo"):
+        model.DataHandler().stream_csv_file(path, gpkg_path, "SIRGAS 2000 (EPSG:4674)", "longitude", "latitude",
+                                            chunk_size=2)
+    assert set(os.listdir(tmp_path)) == {"pontos.csv", "saida.csv"}
+
+
+def test_conform_chunk_widens_the_schema():
+    schema = model.chunk_schema(pandas.DataFrame({"n": [1, 2], "t": [None, None]}))
+    assert schema == {"n": pandas.Int64Dtype(), "t": pandas.StringDtype()}
+
+    chunk = model.conform_chunk(pandas.DataFrame({"n": [1.5, None], "t": ["x", None]}), schema, fixed_schema=False)
+    assert schema["n"] == float
+    assert chunk["n"].tolist()[0] == 1.5
+    assert chunk["t"].dtype == pandas.StringDtype()
+
+    chunk = model.conform_chunk(pandas.DataFrame({"n": ["texto", "1"], "t": ["y", "z"]}), schema, fixed_schema=False)
+    assert schema["n"] == object
+    assert chunk["n"].tolist() == ["texto", "1"]
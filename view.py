@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
 """ @author: Gabriel Maccari """
 
+import pandas
 from PyQt6 import QtWidgets, QtGui, QtCore
 from platform import platform
 
-from model import DTYPES_DICT, get_dtype_key
+from model import DTYPES_DICT, get_dtype_key, sort_row_positions, filter_row_positions
 
 OS = platform()
 
@@ -32,14 +33,32 @@ class MainWindow(QtWidgets.QMainWindow):
         self.layout.addWidget(self.merge_button, 0, 1, 1, 1)
         self.reproject_button = ToolbarButton(self, "Reprojetar os pontos para outro SRC", "reproject.png")
         self.layout.addWidget(self.reproject_button, 0, 2, 1, 1)
-        self.export_button = ToolbarButton(self, "Exportar como camada vetorial de pontos ou tabela", "layers.png")
+        self.export_button = ToolbarButton(self, "Exportar como camada vetorial de pontos ou tabela", "layers.png",
+                                           click_menu=True)
         self.layout.addWidget(self.export_button, 0, 3, 1, 1)
         self.graph_button = ToolbarButton(self, "Criar gráfico", "graph.png", click_menu=True)
         self.layout.addWidget(self.graph_button, 0, 4, 1, 1)
+        self.preview_button = ToolbarButton(self, "Visualizar os dados", "list.png")
+        self.layout.addWidget(self.preview_button, 0, 5, 1, 1)
 
         self.graph_stereogram_action = self.graph_button.click_menu.addAction("Estereograma")
         self.graph_rosediagram_action = self.graph_button.click_menu.addAction("Diagrama de roseta")
 
+        # ATALHOS DE DESFAZER (CTRL+Z) E REFAZER (CTRL+Y)
+        self.undo_action = QtGui.QAction("Desfazer", self)
+        self.undo_action.setShortcut(QtGui.QKeySequence.StandardKey.Undo)
+        self.undo_action.setEnabled(False)
+        self.addAction(self.undo_action)
+        self.redo_action = QtGui.QAction("Refazer", self)
+        self.redo_action.setShortcuts([QtGui.QKeySequence("Ctrl+Y"), QtGui.QKeySequence.StandardKey.Redo])
+        self.redo_action.setEnabled(False)
+        self.addAction(self.redo_action)
+
+        self.export_file_action = self.export_button.click_menu.addAction("Exportar arquivo")
+        self.export_multiple_action = self.export_button.click_menu.addAction("Exportar em vários formatos")
+        self.export_button.click_menu.addSeparator()
+        self.save_recipe_action = self.export_button.click_menu.addAction("Salvar receita")
+
         # PAGINADOR
         self.frame_stack = QtWidgets.QStackedWidget(self)
         self.frame_stack.setFixedSize(410, 480)
@@ -50,10 +69,21 @@ class MainWindow(QtWidgets.QMainWindow):
 
         # PAGINADOR → PÁGINA DE COLUNAS
         self.frame_stack.addWidget(self.columns_stack)
-        self.columns_list = QtWidgets.QListWidget(self.columns_stack)
+        self.columns_model = ColumnListModel(self.columns_stack)
+        self.columns_list = QtWidgets.QListView(self.columns_stack)
+        self.columns_list.setModel(self.columns_model)
+        self.columns_list.setItemDelegate(ColumnItemDelegate(self.columns_list))
+        self.columns_list.setUniformItemSizes(True)
+        self.columns_list.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
         self.columns_list.setFixedSize(410, 480)
         self.columns_list.setIconSize(QtCore.QSize(22, 22))
         self.columns_list.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.columns_list.setContextMenuPolicy(QtCore.Qt.ContextMenuPolicy.CustomContextMenu)
+
+        self.column_menu = QtWidgets.QMenu(self.columns_list)
+        self.rename_action = self.column_menu.addAction(QtGui.QIcon("icons/rename.png"), "Renomear")
+        self.delete_action = self.column_menu.addAction(QtGui.QIcon("icons/delete.png"), "Excluir")
+        self.show_uniques_action = self.column_menu.addAction(QtGui.QIcon("icons/list.png"), "Listar valores únicos")
 
         # PAGINADOR → PÁGINA DE IMPORTAÇÃO
         self.frame_stack.addWidget(self.import_stack)
@@ -79,6 +109,8 @@ class MainWindow(QtWidgets.QMainWindow):
         self.z_ok_icon.setFlat(True)
         self.z_ok_icon.setEnabled(False)
         self.no_coordinates_chk = QtWidgets.QCheckBox("O arquivo não possui coordenadas", self.import_stack)
+        self.optimize_dtypes_chk = QtWidgets.QCheckBox("Otimizar o uso de memória (tipos de dados compactos)",
+                                                       self.import_stack)
         self.import_ok_btn = QtWidgets.QPushButton("OK", self.import_stack)
         self.import_cancel_btn = QtWidgets.QPushButton("Cancelar", self.import_stack)
 
@@ -109,6 +141,8 @@ class MainWindow(QtWidgets.QMainWindow):
         row += 1
         self.import_stack_layout.addWidget(self.no_coordinates_chk, row, 0, 1, 20)
         row += 1
+        self.import_stack_layout.addWidget(self.optimize_dtypes_chk, row, 0, 1, 20)
+        row += 1
         self.import_stack_layout.addWidget(self.import_ok_btn, row, 0, 1, 4)
         self.import_stack_layout.addWidget(self.import_cancel_btn, row, 4, 1, 4)
         row += 1
@@ -178,6 +212,17 @@ class MainWindow(QtWidgets.QMainWindow):
         self.bottom_label.setStyleSheet("font-size: 8pt")
         self.layout.addWidget(self.bottom_label, 22, 0, 1, 8)
 
+        # BARRA DE PROGRESSO (substitui o rótulo inferior durante as operações em segundo plano)
+        self.progress_bar = QtWidgets.QProgressBar(self)
+        self.progress_bar.setStyleSheet("font-size: 8pt")
+        self.progress_bar.setFixedHeight(18)
+        self.progress_bar.setVisible(False)
+        self.layout.addWidget(self.progress_bar, 22, 0, 1, 6)
+        self.cancel_task_btn = QtWidgets.QPushButton("Cancelar", self)
+        self.cancel_task_btn.setVisible(False)
+        self.layout.addWidget(self.cancel_task_btn, 22, 6, 1, 2)
+        self.busy_widgets_state = {}
+
         # Conexões dos botões de cancelar de cada página
         self.import_cancel_btn.clicked.connect(self.switch_stack)
         self.reproject_cancel_btn.clicked.connect(self.switch_stack)
@@ -185,6 +230,42 @@ class MainWindow(QtWidgets.QMainWindow):
     def switch_stack(self, stack_index: int = 0):
         self.frame_stack.setCurrentIndex(stack_index)
 
+    def set_busy(self, busy: bool, description: str = "") -> None:
+        """
+        Bloqueia a interface enquanto uma operação é executada em segundo plano, exibindo a barra de progresso e o
+        botão de cancelar no lugar do rótulo inferior. Ao desbloquear, restaura o estado anterior dos botões.
+        :param busy: True para bloquear a interface, False para desbloquear.
+        :param description: Descrição da operação exibida na barra de progresso.
+        :return: Nada.
+        """
+        widgets = (self.import_button, self.merge_button, self.reproject_button, self.export_button,
+                   self.graph_button, self.preview_button, self.frame_stack, self.undo_action, self.redo_action)
+        if busy:
+            self.busy_widgets_state = {widget: widget.isEnabled() for widget in widgets}
+            for widget in widgets:
+                widget.setEnabled(False)
+            self.show_progress(-1, description)
+        else:
+            for widget, enabled in self.busy_widgets_state.items():
+                widget.setEnabled(enabled)
+            self.busy_widgets_state = {}
+
+        self.bottom_label.setVisible(not busy)
+        self.progress_bar.setVisible(busy)
+        self.cancel_task_btn.setVisible(busy)
+        self.cancel_task_btn.setEnabled(busy)
+
+    def show_progress(self, percent: int, message: str = "") -> None:
+        # Porcentagens negativas indicam progresso indeterminado (barra animada)
+        if percent < 0:
+            self.progress_bar.setRange(0, 0)
+        else:
+            self.progress_bar.setRange(0, 100)
+            self.progress_bar.setValue(percent)
+        if message:
+            self.progress_bar.setFormat(message)
+            self.progress_bar.setTextVisible(True)
+
 
 class ToolbarButton(QtWidgets.QToolButton):
     def __init__(self, parent, tooltip, icon, enabled=False, click_menu=False):
@@ -199,50 +280,163 @@ class ToolbarButton(QtWidgets.QToolButton):
             self.click_menu = QtWidgets.QMenu(self)
 
 
-class ListRow(QtWidgets.QWidget):
-    def __init__(self, column_name, column_dtype):
-        super().__init__()
-
-        self.field = column_name
-        self.dtype = column_dtype
-
-        self.column_lbl = QtWidgets.QLabel(self)
-        self.column_lbl.setText(self.field)
-        self.column_lbl.setGeometry(5, 0, 225, 30)
-
-        self.dtype_cbx = QtWidgets.QComboBox(self)
-        y = 4 if OS.startswith("Windows") else 2
-        h = 22 if OS.startswith("Windows") else 26
-        self.dtype_cbx.setGeometry(240, y, 120, h)
-
-        if self.dtype == "geometry":
-            self.dtype_cbx.addItems(["POINT"])
-        else:
-            self.dtype_cbx.addItems(DTYPES_DICT.keys())
-            self.dtype_cbx.setCurrentText(get_dtype_key(self.dtype))
-
-            self.context_menu = QtWidgets.QMenu(self)
-            self.rename_action = self.context_menu.addAction(QtGui.QIcon("icons/rename.png"), "Renomear")
-            self.delete_action = self.context_menu.addAction(QtGui.QIcon("icons/delete.png"), "Excluir")
-            self.show_uniques_action = self.context_menu.addAction(QtGui.QIcon("icons/list.png"), "Listar valores únicos")
-
-    def get_icon(self):
-        try:
-            if self.dtype == "geometry":
-                img = "icons/geometry"
-            else:
-                dt_key = get_dtype_key(self.dtype)
-                img = DTYPES_DICT[dt_key]["icon"]
-        except KeyError:
-            img = "icons/unknown"
-        return QtGui.QIcon(img)
-
-    def contextMenuEvent(self, event):
-        self.context_menu.exec(event.globalPos())
+class ColumnListModel(QtCore.QAbstractListModel):
+    """
+    Modelo da lista de colunas do GeoDataFrame. Guarda apenas os nomes e tipos das colunas, e cada alteração atualiza
+    somente a linha da coluna alterada.
+    """
+    DTYPE_ROLE = QtCore.Qt.ItemDataRole.UserRole
+    dtype_edited = QtCore.pyqtSignal(int, str)  # Linha, tipo de dado escolhido pelo usuário
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.columns = []
+        self.dtypes = []
+        self.icons = {}
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role in (QtCore.Qt.ItemDataRole.DisplayRole, QtCore.Qt.ItemDataRole.ToolTipRole):
+            return str(self.columns[row])
+        if role == QtCore.Qt.ItemDataRole.DecorationRole:
+            return self.get_icon(self.dtypes[row])
+        if role == self.DTYPE_ROLE:
+            return "POINT" if self.dtypes[row] == "geometry" else get_dtype_key(self.dtypes[row])
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.ItemDataRole.EditRole) -> bool:
+        # A conversão é feita pelo controlador, que atualiza a linha com update_column caso ela dê certo
+        if index.isValid() and role == self.DTYPE_ROLE and value != self.data(index, role):
+            self.dtype_edited.emit(index.row(), value)
+        return False
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.ItemFlag.NoItemFlags
+        if self.dtypes[index.row()] == "geometry":
+            return QtCore.Qt.ItemFlag.NoItemFlags
+        return QtCore.Qt.ItemFlag.ItemIsEnabled | QtCore.Qt.ItemFlag.ItemIsSelectable | QtCore.Qt.ItemFlag.ItemIsEditable
+
+    def get_icon(self, dtype: str) -> QtGui.QIcon:
+        if dtype not in self.icons:
+            try:
+                img = "icons/geometry" if dtype == "geometry" else DTYPES_DICT[get_dtype_key(dtype)]["icon"]
+            except KeyError:
+                img = "icons/unknown"
+            self.icons[dtype] = QtGui.QIcon(img)
+        return self.icons[dtype]
+
+    def set_columns(self, columns: list[str], dtypes: list[str]) -> None:
+        self.beginResetModel()
+        self.columns, self.dtypes = list(columns), list(dtypes)
+        self.endResetModel()
+
+    def update_column(self, row: int, column: str, dtype: str) -> None:
+        self.columns[row], self.dtypes[row] = column, dtype
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def remove_column(self, row: int) -> None:
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        del self.columns[row], self.dtypes[row]
+        self.endRemoveRows()
+
+
+class ColumnItemDelegate(QtWidgets.QStyledItemDelegate):
+    """
+    Desenha cada linha da lista de colunas com o nome da coluna e uma caixa com o tipo de dado. A caixa de seleção real
+    (QComboBox) só é criada quando o usuário clica sobre ela.
+    """
+    DTYPE_WIDTH = 120
+
+    def dtype_rect(self, rect: QtCore.QRect) -> QtCore.QRect:
+        height = 22 if OS.startswith("Windows") else 26
+        return QtCore.QRect(rect.right() - self.DTYPE_WIDTH - 25, rect.center().y() - height // 2 + 1,
+                            self.DTYPE_WIDTH, height)
+
+    def sizeHint(self, option, index) -> QtCore.QSize:
+        return QtCore.QSize(option.rect.width(), 30)
+
+    def paint(self, painter, option, index):
+        style = option.widget.style()
+        style.drawPrimitive(QtWidgets.QStyle.PrimitiveElement.PE_PanelItemViewItem, option, painter, option.widget)
+
+        name_option = QtWidgets.QStyleOptionViewItem(option)
+        name_option.rect = option.rect.adjusted(0, 0, -self.DTYPE_WIDTH - 30, 0)
+        super().paint(painter, name_option, index)
+
+        combo = QtWidgets.QStyleOptionComboBox()
+        combo.rect = self.dtype_rect(option.rect)
+        combo.currentText = index.data(ColumnListModel.DTYPE_ROLE) or ""
+        combo.state = option.state & QtWidgets.QStyle.StateFlag.State_Enabled
+        combo.palette = option.palette
+        style.drawComplexControl(QtWidgets.QStyle.ComplexControl.CC_ComboBox, combo, painter, option.widget)
+        style.drawControl(QtWidgets.QStyle.ControlElement.CE_ComboBoxLabel, combo, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index) -> bool:
+        if (event.type() == QtCore.QEvent.Type.MouseButtonRelease
+                and index.flags() & QtCore.Qt.ItemFlag.ItemIsEditable
+                and self.dtype_rect(option.rect).contains(event.position().toPoint())):
+            self.parent().setCurrentIndex(index)
+            self.parent().edit(index)
+            return True
+        return super().editorEvent(event, model, option, index)
+
+    def createEditor(self, parent, option, index):
+        editor = QtWidgets.QComboBox(parent)
+        editor.addItems(DTYPES_DICT.keys())
+        editor.activated.connect(lambda _: (self.commitData.emit(editor), self.closeEditor.emit(editor)))
+        QtCore.QTimer.singleShot(0, editor.showPopup)
+        return editor
+
+    def updateEditorGeometry(self, editor, option, index):
+        editor.setGeometry(self.dtype_rect(option.rect))
+
+    def setEditorData(self, editor, index):
+        editor.setCurrentText(index.data(ColumnListModel.DTYPE_ROLE))
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.currentText(), ColumnListModel.DTYPE_ROLE)
+
+
+class ValueCountsModel(QtCore.QAbstractTableModel):
+    """
+    Modelo da tabela de valores únicos. Guarda apenas a referência aos valores e contagens, e o texto de cada célula é
+    montado somente quando a tabela precisa desenhá-la.
+    """
+    HEADERS = ("Valor", "Ocorrências")
+
+    def __init__(self, value_counts, parent=None):
+        super().__init__(parent)
+        self.values = value_counts.index
+        self.counts = value_counts.to_numpy()
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.counts)
+
+    def columnCount(self, parent=QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != QtCore.Qt.ItemDataRole.DisplayRole:
+            return None
+        if index.column() == 0:
+            return str(self.values[index.row()])
+        return str(self.counts[index.row()])
+
+    def headerData(self, section, orientation, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if role == QtCore.Qt.ItemDataRole.DisplayRole and orientation == QtCore.Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return None
 
 
 class ListWindow(QtWidgets.QMainWindow):
-    def __init__(self, values_list: list[any], has_nan: bool, parent):
+    def __init__(self, value_counts, nulls: int, parent):
         super(ListWindow, self).__init__(parent)
         self.parent = parent
 
@@ -256,12 +450,22 @@ class ListWindow(QtWidgets.QMainWindow):
 
         self.setCentralWidget(self.widget)
 
-        self.list_wgt = QtWidgets.QListWidget(self)
-        self.list_wgt.addItems(values_list)
-        self.layout.addWidget(self.list_wgt)
-
-        if has_nan:
-            self.nan_lbl = QtWidgets.QLabel("Obs: A coluna possui células vazias/nulas.")
+        self.count_lbl = QtWidgets.QLabel(f"{len(value_counts)} valores únicos:")
+        self.layout.addWidget(self.count_lbl)
+
+        # Com linhas de altura fixa, a tabela consulta o modelo apenas para as linhas visíveis
+        self.values_model = ValueCountsModel(value_counts, self)
+        self.values_tbl = QtWidgets.QTableView(self)
+        self.values_tbl.setModel(self.values_model)
+        self.values_tbl.verticalHeader().hide()
+        self.values_tbl.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Fixed)
+        self.values_tbl.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.ResizeMode.Stretch)
+        self.values_tbl.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows)
+        self.values_tbl.setShowGrid(False)
+        self.layout.addWidget(self.values_tbl)
+
+        if nulls > 0:
+            self.nan_lbl = QtWidgets.QLabel(f"Obs: A coluna possui {nulls} células vazias/nulas.")
             self.layout.addWidget(self.nan_lbl)
 
         self.close_button = QtWidgets.QPushButton("Fechar")
@@ -269,6 +473,148 @@ class ListWindow(QtWidgets.QMainWindow):
         self.layout.addWidget(self.close_button)
 
 
+class DataFrameTableModel(QtCore.QAbstractTableModel):
+    """
+    Modelo da tabela de pré-visualização dos dados. Lê diretamente o GeoDataFrame e formata apenas as células visíveis.
+    A ordenação e o filtro são guardados como um array com as posições das linhas, sem copiar os dados.
+    """
+    def __init__(self, gdf, parent=None):
+        super().__init__(parent)
+        self.gdf = gdf
+        self.rows = None  # Posições das linhas exibidas. None para exibir todas, na ordem original
+        self.filter_rows = None
+        self.sort_column, self.sort_order = -1, QtCore.Qt.SortOrder.AscendingOrder
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self.gdf.index) if self.rows is None else len(self.rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.gdf.columns)
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != QtCore.Qt.ItemDataRole.DisplayRole:
+            return None
+        row = index.row() if self.rows is None else self.rows[index.row()]
+        value = self.gdf.iat[row, index.column()]
+        try:
+            if value is None or value is pandas.NA or value != value:  # NaN, NaT
+                return ""
+        except (TypeError, ValueError):
+            pass
+        return str(value)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if role != QtCore.Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == QtCore.Qt.Orientation.Horizontal:
+            return str(self.gdf.columns[section])
+        return str(section + 1 if self.rows is None else self.rows[section] + 1)
+
+    def set_dataframe(self, gdf) -> None:
+        """
+        Exibe um novo GeoDataFrame (ou o mesmo, após alterações). O filtro e a ordem são descartados, pois as posições
+        das linhas foram calculadas a partir de colunas que podem ter sido renomeadas, excluídas ou convertidas.
+        """
+        self.beginResetModel()
+        self.rows, self.filter_rows = None, None
+        self.sort_column = -1
+        self.gdf = gdf
+        self.endResetModel()
+
+    def sort(self, column: int, order=QtCore.Qt.SortOrder.AscendingOrder) -> None:
+        self.layoutAboutToBeChanged.emit()
+        self.sort_column, self.sort_order = column, order
+        self.rows = self.get_sorted_rows(self.filter_rows)
+        self.layoutChanged.emit()
+
+    def filter(self, column: int, text: str) -> None:
+        self.beginResetModel()
+        self.filter_rows = filter_row_positions(self.gdf.iloc[:, column], text) if text else None
+        self.rows = self.get_sorted_rows(self.filter_rows)
+        self.endResetModel()
+
+    def get_sorted_rows(self, rows):
+        if not 0 <= self.sort_column < len(self.gdf.columns):
+            return rows
+        QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.CursorShape.WaitCursor)
+        try:
+            ascending = self.sort_order == QtCore.Qt.SortOrder.AscendingOrder
+            return sort_row_positions(self.gdf.iloc[:, self.sort_column], ascending, rows)
+        finally:
+            QtWidgets.QApplication.restoreOverrideCursor()
+
+
+class PreviewWindow(QtWidgets.QMainWindow):
+    def __init__(self, gdf, parent):
+        super(PreviewWindow, self).__init__(parent)
+        self.parent = parent
+
+        self.setWindowTitle('Dados')
+        self.setWindowIcon(QtGui.QIcon('icons/list.png'))
+        self.resize(800, 500)
+
+        self.layout = QtWidgets.QGridLayout()
+
+        self.widget = QtWidgets.QWidget()
+        self.widget.setLayout(self.layout)
+
+        self.setCentralWidget(self.widget)
+
+        self.filter_lbl = QtWidgets.QLabel("Filtrar:")
+        self.layout.addWidget(self.filter_lbl, 0, 0, 1, 1)
+        self.filter_column_cbx = QtWidgets.QComboBox()
+        self.layout.addWidget(self.filter_column_cbx, 0, 1, 1, 1)
+        self.filter_edt = QtWidgets.QLineEdit()
+        self.filter_edt.setPlaceholderText("Texto contido na coluna (Enter para aplicar)")
+        self.filter_edt.setClearButtonEnabled(True)
+        self.layout.addWidget(self.filter_edt, 0, 2, 1, 2)
+
+        # Com linhas de altura fixa, a tabela consulta o modelo apenas para as células visíveis
+        self.table_model = DataFrameTableModel(gdf, self)
+        self.table = QtWidgets.QTableView()
+        self.table.setModel(self.table_model)
+        self.table.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Fixed)
+        self.table.horizontalHeader().setSortIndicator(-1, QtCore.Qt.SortOrder.AscendingOrder)
+        self.table.setSortingEnabled(True)
+        self.layout.addWidget(self.table, 1, 0, 1, 4)
+
+        self.rows_lbl = QtWidgets.QLabel()
+        self.layout.addWidget(self.rows_lbl, 2, 0, 1, 3)
+        self.close_button = QtWidgets.QPushButton("Fechar")
+        self.close_button.clicked.connect(self.close)
+        self.layout.addWidget(self.close_button, 2, 3, 1, 1)
+        self.layout.setColumnStretch(2, 1)
+
+        self.filter_edt.returnPressed.connect(self.apply_filter)
+        self.table_model.modelReset.connect(self.update_labels)
+        self.update_labels()
+
+    def set_dataframe(self, gdf) -> None:
+        self.table_model.set_dataframe(gdf)
+        self.filter_edt.clear()
+        self.table.horizontalHeader().setSortIndicator(-1, QtCore.Qt.SortOrder.AscendingOrder)
+
+    def apply_filter(self) -> None:
+        QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.CursorShape.WaitCursor)
+        try:
+            self.table_model.filter(self.filter_column_cbx.currentIndex(), self.filter_edt.text())
+        finally:
+            QtWidgets.QApplication.restoreOverrideCursor()
+
+    def update_labels(self) -> None:
+        gdf = self.table_model.gdf
+        columns = [str(col) for col in gdf.columns]
+        if columns != [self.filter_column_cbx.itemText(i) for i in range(self.filter_column_cbx.count())]:
+            current = self.filter_column_cbx.currentText()
+            self.filter_column_cbx.clear()
+            self.filter_column_cbx.addItems(columns)
+            if current in columns:
+                self.filter_column_cbx.setCurrentText(current)
+        self.rows_lbl.setText(f"Exibindo {self.table_model.rowCount()} de {len(gdf.index)} linhas.")
+
+
 def center_window_on_point(window, center_point):
     geometry = window.geometry()
     geometry.moveCenter(center_point)